@@ -0,0 +1,44 @@
+"""Add materialized inventory stock balances
+
+Revision ID: 038
+Revises: 037
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '038'
+down_revision = '037'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'inventory_stock_balances',
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['item_id'], ['inventory_items.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('item_id')
+    )
+    op.create_index('ix_inventory_stock_balances_company_id', 'inventory_stock_balances', ['company_id'])
+
+    # Backfill from the movement ledger
+    op.execute("""
+        INSERT INTO inventory_stock_balances (item_id, company_id, quantity)
+        SELECT i.id, i.company_id, COALESCE(SUM(m.quantity), 0)
+        FROM inventory_items i
+        LEFT JOIN stock_movements m ON m.item_id = i.id
+        GROUP BY i.id, i.company_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_stock_balances_company_id', table_name='inventory_stock_balances')
+    op.drop_table('inventory_stock_balances')
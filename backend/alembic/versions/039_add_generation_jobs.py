@@ -0,0 +1,50 @@
+"""Add generation jobs table
+
+Revision ID: 039
+Revises: 038
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '039'
+down_revision = '038'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'generation_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('kind', sa.String(50), nullable=False),
+        sa.Column('status', sa.String(20), server_default='pending', nullable=False),
+        sa.Column('input_data', sa.JSON(), nullable=True),
+        sa.Column('iteration', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('tool_calls', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('input_tokens', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('output_tokens', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('progress_message', sa.Text(), nullable=True),
+        sa.Column('html', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_generation_jobs_user_id', 'generation_jobs', ['user_id'])
+    op.create_index('ix_generation_jobs_status', 'generation_jobs', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_generation_jobs_status', table_name='generation_jobs')
+    op.drop_index('ix_generation_jobs_user_id', table_name='generation_jobs')
+    op.drop_table('generation_jobs')
@@ -0,0 +1,50 @@
+"""Add appointment time range and per-doctor overlap exclusion constraint
+
+Revision ID: 041
+Revises: 040
+Create Date: 2026-10-17
+
+Existing overlapping active appointments make the upgrade fail. Find them with:
+
+    SELECT a.id, b.id FROM appointments a JOIN appointments b
+      ON a.doctor_id = b.doctor_id AND a.id < b.id AND a.date = b.date
+     AND a.start_time < b.end_time AND b.start_time < a.end_time
+     WHERE a.status IN ('pending', 'confirmed') AND b.status IN ('pending', 'confirmed');
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '041'
+down_revision = '040'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Needed for "doctor_id WITH =" in a GiST index
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    op.execute("""
+        ALTER TABLE appointments
+        ADD COLUMN time_range tsrange
+        GENERATED ALWAYS AS (
+            tsrange(
+                date + start_time,
+                date + end_time
+                    + CASE WHEN end_time <= start_time THEN interval '1 day' ELSE interval '0' END
+            )
+        ) STORED
+    """)
+
+    op.execute("""
+        ALTER TABLE appointments
+        ADD CONSTRAINT appointments_doctor_no_overlap
+        EXCLUDE USING gist (doctor_id WITH =, time_range WITH &&)
+        WHERE (status IN ('pending', 'confirmed'))
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE appointments DROP CONSTRAINT appointments_doctor_no_overlap")
+    op.execute("ALTER TABLE appointments DROP COLUMN time_range")
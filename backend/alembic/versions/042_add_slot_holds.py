@@ -0,0 +1,41 @@
+"""Add slot holds table
+
+Revision ID: 042
+Revises: 041
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '042'
+down_revision = '041'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'slot_holds',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('start_time', sa.Time(), nullable=False),
+        sa.Column('end_time', sa.Time(), nullable=False),
+        sa.Column('holder', sa.String(100), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['doctor_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_slot_holds_doctor_date', 'slot_holds', ['doctor_id', 'date'])
+    op.create_index('ix_slot_holds_holder', 'slot_holds', ['holder'])
+    op.create_index('ix_slot_holds_expires_at', 'slot_holds', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_slot_holds_expires_at', table_name='slot_holds')
+    op.drop_index('ix_slot_holds_holder', table_name='slot_holds')
+    op.drop_index('ix_slot_holds_doctor_date', table_name='slot_holds')
+    op.drop_table('slot_holds')
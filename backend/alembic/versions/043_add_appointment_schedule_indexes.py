@@ -0,0 +1,67 @@
+"""Add composite indexes for appointment and schedule lookups
+
+Revision ID: 043
+Revises: 042
+Create Date: 2026-10-17
+
+Indexes are built CONCURRENTLY so the tables stay writable.
+Check the plans with: TEST_DATABASE_URL=URL python -m pytest tests/test_query_plans.py
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '043'
+down_revision = '042'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    # Slot generation: a doctor's active appointments in a date range
+    dict(
+        index_name='ix_appointments_doctor_date_active',
+        table_name='appointments',
+        columns=['doctor_id', 'date'],
+        postgresql_where=sa.text("status IN ('pending', 'confirmed')"),
+    ),
+    # Calendar / list: a company's appointments by date
+    dict(
+        index_name='ix_appointments_company_date',
+        table_name='appointments',
+        columns=['company_id', 'date', 'start_time'],
+    ),
+    # Client stats per company
+    dict(
+        index_name='ix_appointments_client_company',
+        table_name='appointments',
+        columns=['client_id', 'company_id'],
+    ),
+    dict(
+        index_name='ix_schedule_exceptions_doctor_date',
+        table_name='schedule_exceptions',
+        columns=['doctor_id', 'date'],
+    ),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index in INDEXES:
+            op.create_index(
+                **index,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index in reversed(INDEXES):
+            op.drop_index(
+                index['index_name'],
+                table_name=index['table_name'],
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
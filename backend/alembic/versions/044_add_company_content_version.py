@@ -0,0 +1,27 @@
+"""Add companies.content_version
+
+Revision ID: 044
+Revises: 043
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '044'
+down_revision = '043'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'companies',
+        sa.Column('content_version', sa.Integer(), server_default='1', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('companies', 'content_version')
@@ -0,0 +1,31 @@
+"""Add companies.landing_digest
+
+Revision ID: 045
+Revises: 044
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '045'
+down_revision = '044'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('companies', sa.Column('landing_digest', sa.String(16), nullable=True))
+
+    # Same as app.services.landing_assets.landing_digest
+    op.execute("""
+        UPDATE companies
+        SET landing_digest = left(encode(sha256(convert_to(landing_html, 'UTF8')), 'hex'), 16)
+        WHERE landing_html IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('companies', 'landing_digest')
@@ -0,0 +1,67 @@
+"""Compress landing_versions.html, add reference_image_count
+
+Revision ID: 046
+Revises: 045
+Create Date: 2026-10-17
+
+"""
+import gzip
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '046'
+down_revision = '045'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 100
+
+
+def _convert_html(source: str, target: str, convert) -> None:
+    """Copy landing_versions.<source> into <target> in batches."""
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(f"SELECT id, {source} FROM landing_versions WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        for version_id, value in rows:
+            conn.execute(
+                sa.text(f"UPDATE landing_versions SET {target} = :value WHERE id = :id"),
+                {"value": convert(value), "id": version_id},
+            )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    op.add_column(
+        'landing_versions',
+        sa.Column('reference_image_count', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.execute("""
+        UPDATE landing_versions
+        SET reference_image_count = json_array_length(reference_images)
+        WHERE json_typeof(reference_images) = 'array'
+    """)
+
+    op.add_column('landing_versions', sa.Column('html_gz', sa.LargeBinary(), nullable=True))
+    _convert_html('html', 'html_gz', lambda html: gzip.compress(html.encode('utf-8'), mtime=0))
+    op.drop_column('landing_versions', 'html')
+    op.alter_column('landing_versions', 'html_gz', new_column_name='html', nullable=False)
+    # Already compressed - don't let TOAST try again
+    op.execute("ALTER TABLE landing_versions ALTER COLUMN html SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    op.add_column('landing_versions', sa.Column('html_text', sa.Text(), nullable=True))
+    _convert_html('html', 'html_text', lambda data: gzip.decompress(data).decode('utf-8'))
+    op.drop_column('landing_versions', 'html')
+    op.alter_column('landing_versions', 'html_text', new_column_name='html', nullable=False)
+
+    op.drop_column('landing_versions', 'reference_image_count')
@@ -0,0 +1,48 @@
+"""Add ai_usage ledger
+
+Revision ID: 047
+Revises: 046
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '047'
+down_revision = '046'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ai_usage',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('endpoint', sa.String(100), nullable=False),
+        sa.Column('model', sa.String(100), nullable=False),
+        sa.Column('input_tokens', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('output_tokens', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('cache_creation_input_tokens', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('cache_read_input_tokens', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('iterations', sa.Integer(), server_default='1', nullable=False),
+        sa.Column('tool_calls', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('duration_ms', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('cached', sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.Column('success', sa.Boolean(), server_default=sa.true(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ai_usage_created_at', 'ai_usage', ['created_at'])
+    op.create_index('ix_ai_usage_company_created', 'ai_usage', ['company_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ai_usage_company_created', table_name='ai_usage')
+    op.drop_index('ix_ai_usage_created_at', table_name='ai_usage')
+    op.drop_table('ai_usage')
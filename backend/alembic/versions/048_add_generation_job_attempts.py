@@ -0,0 +1,27 @@
+"""Add attempts to generation_jobs
+
+Revision ID: 048
+Revises: 047
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '048'
+down_revision = '047'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'generation_jobs',
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('generation_jobs', 'attempts')
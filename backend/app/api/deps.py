@@ -2,13 +2,13 @@ from typing import Annotated, Callable, Optional
 
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.security import decode_access_token
 from app.models.user import User
+from app.services.ai_usage import AIBudgetExceededError, check_ai_budget
+from app.services.principal_cache import load_principal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
@@ -33,12 +33,7 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
 
-    result = await db.execute(
-        select(User)
-        .where(User.id == int(user_id))
-        .options(selectinload(User.company_memberships))
-    )
-    user = result.scalar_one_or_none()
+    user = await load_principal(db, int(user_id))
 
     if user is None:
         raise credentials_exception
@@ -79,12 +74,7 @@ async def get_current_user_optional(
     if user_id is None:
         return None
 
-    result = await db.execute(
-        select(User)
-        .where(User.id == int(user_id))
-        .options(selectinload(User.company_memberships))
-    )
-    user = result.scalar_one_or_none()
+    user = await load_principal(db, int(user_id))
 
     if user is None or not user.is_active:
         return None
@@ -111,3 +101,14 @@ def require_superadmin(current_user: CurrentUser) -> User:
 
 # Annotated versions for common checks
 SuperadminUser = Annotated[User, Depends(require_superadmin)]
+
+
+async def require_ai_budget(current_user: CurrentUser, db: DbSession) -> None:
+    """Reject AI calls of companies that used up their monthly token budget."""
+    try:
+        await check_ai_budget(db, current_user.company_id)
+    except AIBudgetExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+        )
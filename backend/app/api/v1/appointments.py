@@ -2,16 +2,16 @@ from datetime import date, datetime, time, timedelta
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query, status
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import DbSession, CurrentUser
 from app.models.appointment import Appointment, AppointmentStatus
-from app.models.schedule import Schedule, ScheduleException, ScheduleExceptionType
 from app.models.service import Service
 from app.models.client import Client, ClientCompany
 from app.models.user import User
+from app.models.company_member import CompanyMember, MemberService
 from app.models.inventory import ServiceInventoryItem, StockMovement, MovementType
 from app.schemas.appointment import (
     AppointmentCreate,
@@ -19,12 +19,19 @@ from app.schemas.appointment import (
     AppointmentUpdate,
     AppointmentResponse,
     AvailableSlot,
+    SpecialistSlots,
 )
 from bots.notifications import notify_client_appointment_confirmed, notify_client_appointment_cancelled
 from app.services.google_calendar import update_appointment_in_calendar
+from app.services.stock import add_movement
+from app.services.availability import get_doctor_slots, load_availability_many, compute_slots
+from app.services.booking import commit_booking, SlotTakenError
+from app.services.slot_holds import client_holder
 
 router = APIRouter(prefix="/appointments")
 
+SLOT_TAKEN_DETAIL = "Time slot conflicts with an existing appointment"
+
 
 async def auto_deduct_inventory(
     db: AsyncSession,
@@ -59,7 +66,7 @@ async def auto_deduct_inventory(
             performed_by=performed_by_id,
             notes=f"Автосписание: {appointment.service.name if appointment.service else 'Послуга'}",
         )
-        db.add(movement)
+        await add_movement(db, movement)
 
 
 @router.get("", response_model=list[AppointmentResponse])
@@ -102,8 +109,13 @@ async def get_available_slots(
     service_id: int,
     date_from: date = Query(...),
     date_to: date = Query(...),
+    telegram_id: Optional[int] = None,
 ):
-    """Get available time slots for booking"""
+    """Get available time slots for booking.
+
+    Slots held by other clients are not returned; pass telegram_id to see
+    the client's own held slot.
+    """
     # Get service duration
     result = await db.execute(select(Service).where(Service.id == service_id))
     service = result.scalar_one_or_none()
@@ -113,131 +125,73 @@ async def get_available_slots(
             detail="Service not found",
         )
 
-    # Get doctor's schedule
-    result = await db.execute(
-        select(Schedule).where(Schedule.doctor_id == doctor_id)
+    holder = client_holder(telegram_id) if telegram_id else None
+    slots = await get_doctor_slots(
+        db, doctor_id, service.duration_minutes, date_from, date_to, holder
     )
-    schedules = {s.day_of_week: s for s in result.scalars().all()}
+    return [
+        AvailableSlot(date=slot_date, start_time=start_time, end_time=end_time)
+        for slot_date, start_time, end_time in slots
+    ]
 
-    # Get schedule exceptions in date range
-    result = await db.execute(
-        select(ScheduleException).where(
-            and_(
-                ScheduleException.doctor_id == doctor_id,
-                ScheduleException.date >= date_from,
-                ScheduleException.date <= date_to,
-            )
+
+@router.get("/available-slots/batch", response_model=list[SpecialistSlots])
+async def get_available_slots_batch(
+    db: DbSession,
+    service_id: int,
+    date_from: date = Query(...),
+    date_to: date = Query(...),
+    telegram_id: Optional[int] = None,
+):
+    """
+    Get available time slots of every specialist who performs the service.
+    Schedules, exceptions, appointments and holds of all specialists are loaded at once.
+    """
+    result = await db.execute(select(Service).where(Service.id == service_id))
+    service = result.scalar_one_or_none()
+    if not service:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Service not found",
         )
-    )
-    all_exceptions = result.scalars().all()
-
-    # Separate day-level exceptions from breaks
-    day_exceptions = {}  # One per day (day_off, modified, working)
-    breaks_by_date = {}  # Multiple per day (breaks)
-    for e in all_exceptions:
-        if e.type == ScheduleExceptionType.BREAK:
-            if e.date not in breaks_by_date:
-                breaks_by_date[e.date] = []
-            breaks_by_date[e.date].append(e)
-        else:
-            day_exceptions[e.date] = e
-
-    # Get existing appointments in date range
+
     result = await db.execute(
-        select(Appointment).where(
-            and_(
-                Appointment.doctor_id == doctor_id,
-                Appointment.date >= date_from,
-                Appointment.date <= date_to,
-                Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]),
-            )
+        select(CompanyMember, MemberService.custom_duration_minutes)
+        .join(MemberService, MemberService.member_id == CompanyMember.id)
+        .options(joinedload(CompanyMember.user))
+        .where(
+            MemberService.service_id == service_id,
+            MemberService.is_active == True,
+            CompanyMember.company_id == service.company_id,
+            CompanyMember.is_specialist == True,
+            CompanyMember.is_active == True,
         )
+        .order_by(CompanyMember.id)
+    )
+    members = result.all()
+
+    holder = client_holder(telegram_id) if telegram_id else None
+    availability = await load_availability_many(
+        db, list({member.user_id for member, _ in members}), date_from, date_to, holder
     )
-    existing_appointments = result.scalars().all()
-
-    # Build appointments dict by date
-    appointments_by_date = {}
-    for appt in existing_appointments:
-        if appt.date not in appointments_by_date:
-            appointments_by_date[appt.date] = []
-        appointments_by_date[appt.date].append(appt)
-
-    # Generate available slots
-    slots = []
-    current_date = date_from
-    slot_duration = timedelta(minutes=service.duration_minutes)
-
-    while current_date <= date_to:
-        day_of_week = current_date.weekday()
-        schedule = schedules.get(day_of_week)
-        day_exception = day_exceptions.get(current_date)
-        day_breaks = breaks_by_date.get(current_date, [])
-
-        # Determine working hours for this day
-        day_start_time = None
-        day_end_time = None
-
-        if day_exception:
-            if day_exception.type == ScheduleExceptionType.DAY_OFF:
-                # Full day off - no slots
-                current_date += timedelta(days=1)
-                continue
-            elif day_exception.type == ScheduleExceptionType.MODIFIED:
-                # Modified hours
-                if day_exception.start_time and day_exception.end_time:
-                    day_start_time = day_exception.start_time
-                    day_end_time = day_exception.end_time
-            elif day_exception.type == ScheduleExceptionType.WORKING:
-                # Working on normally non-working day
-                if day_exception.start_time and day_exception.end_time:
-                    day_start_time = day_exception.start_time
-                    day_end_time = day_exception.end_time
-        elif schedule and schedule.is_working_day:
-            day_start_time = schedule.start_time
-            day_end_time = schedule.end_time
-
-        if day_start_time and day_end_time:
-            # Generate time slots for this day
-            current_time = datetime.combine(current_date, day_start_time)
-            end_time = datetime.combine(current_date, day_end_time)
-
-            day_appointments = appointments_by_date.get(current_date, [])
-
-            while current_time + slot_duration <= end_time:
-                slot_start = current_time.time()
-                slot_end = (current_time + slot_duration).time()
-
-                # Check if slot conflicts with existing appointments
-                is_available = True
-                for appt in day_appointments:
-                    if not (slot_end <= appt.start_time or slot_start >= appt.end_time):
-                        is_available = False
-                        break
-
-                # Check if slot conflicts with breaks
-                if is_available:
-                    for brk in day_breaks:
-                        if brk.start_time and brk.end_time:
-                            if not (slot_end <= brk.start_time or slot_start >= brk.end_time):
-                                is_available = False
-                                break
-
-                # Don't show past slots
-                if current_date == date.today() and slot_start <= datetime.now().time():
-                    is_available = False
-
-                if is_available:
-                    slots.append(AvailableSlot(
-                        date=current_date,
-                        start_time=slot_start,
-                        end_time=slot_end,
-                    ))
-
-                current_time += timedelta(minutes=30)  # 30 min intervals
-
-        current_date += timedelta(days=1)
-
-    return slots
+
+    response = []
+    for member, custom_duration in members:
+        duration = custom_duration or service.duration_minutes
+        slots = compute_slots(availability[member.user_id], duration, date_from, date_to)
+        response.append(SpecialistSlots(
+            member_id=member.id,
+            user_id=member.user_id,
+            first_name=member.user.first_name,
+            last_name=member.user.last_name,
+            duration_minutes=duration,
+            slots=[
+                AvailableSlot(date=slot_date, start_time=start_time, end_time=end_time)
+                for slot_date, start_time, end_time in slots
+            ],
+        ))
+
+    return response
 
 
 @router.post("", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
@@ -300,23 +254,7 @@ async def create_appointment_admin(
         end_dt = start_dt + timedelta(minutes=service.duration_minutes)
         end_time = end_dt.time()
 
-    # Check for overlapping appointments
-    overlap_result = await db.execute(
-        select(Appointment).where(
-            Appointment.doctor_id == current_user.id,
-            Appointment.date == appointment_data.date,
-            Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]),
-            Appointment.end_time > appointment_data.start_time,
-            Appointment.start_time < end_time,
-        )
-    )
-    if overlap_result.scalars().first():
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Time slot conflicts with an existing appointment",
-        )
-
-    # Create appointment
+    # Create appointment (overlaps are rejected by the database)
     appointment = Appointment(
         company_id=current_user.company_id,
         doctor_id=current_user.id,
@@ -329,7 +267,13 @@ async def create_appointment_admin(
         status=appointment_data.status,
     )
     db.add(appointment)
-    await db.commit()
+    try:
+        await commit_booking(db)
+    except SlotTakenError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=SLOT_TAKEN_DETAIL,
+        )
 
     # Reload with relationships
     result = await db.execute(
@@ -393,10 +337,7 @@ async def update_appointment_status(
     if new_status == AppointmentStatus.COMPLETED and old_status != AppointmentStatus.COMPLETED:
         await auto_deduct_inventory(db, appointment, current_user.id)
 
-    await db.commit()
-    await db.refresh(appointment)
-
-    # Send notification to client if status changed
+    # Queue notification to client if status changed (sent after commit by the outbox dispatcher)
     if old_status != new_status and appointment.client and appointment.client.telegram_id:
         doctor_name = f"{current_user.first_name} {current_user.last_name}"
         service_name = appointment.service.name if appointment.service else "Послуга"
@@ -405,7 +346,8 @@ async def update_appointment_status(
         client_lang = appointment.client.language if hasattr(appointment.client, 'language') else "uk"
 
         if new_status == AppointmentStatus.CONFIRMED:
-            await notify_client_appointment_confirmed(
+            notify_client_appointment_confirmed(
+                db,
                 client_telegram_id=appointment.client.telegram_id,
                 doctor_name=doctor_name,
                 service_name=service_name,
@@ -414,7 +356,8 @@ async def update_appointment_status(
                 lang=client_lang,
             )
         elif new_status == AppointmentStatus.CANCELLED:
-            await notify_client_appointment_cancelled(
+            notify_client_appointment_cancelled(
+                db,
                 client_telegram_id=appointment.client.telegram_id,
                 service_name=service_name,
                 appointment_date=appointment_date,
@@ -422,6 +365,16 @@ async def update_appointment_status(
                 lang=client_lang,
             )
 
+    # Re-activating a cancelled appointment may overlap a newer one
+    try:
+        await commit_booking(db)
+    except SlotTakenError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=SLOT_TAKEN_DETAIL,
+        )
+    await db.refresh(appointment)
+
     # Sync with Google Calendar if event exists
     if old_status != new_status and appointment.google_event_id:
         await update_appointment_in_calendar(
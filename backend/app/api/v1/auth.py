@@ -11,7 +11,7 @@ from pydantic import BaseModel
 
 from app.api.deps import DbSession, CurrentUser, OptionalCurrentUser
 from app.core.config import settings
-from app.core.security import verify_password, get_password_hash, create_access_token, verify_telegram_auth
+from app.core.security import hash_password, verify_and_update_password, create_access_token, verify_telegram_auth
 from app.models.user import User
 from app.models.company import Company
 from app.models.company_member import CompanyMember
@@ -23,6 +23,7 @@ from app.services.google_calendar import (
     get_google_user_info,
     get_calendar_list,
 )
+from app.services.principal_cache import load_attributes
 
 router = APIRouter(prefix="/auth")
 
@@ -77,7 +78,7 @@ async def register(user_data: UserCreate, db: DbSession):
     # Create user
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await hash_password(user_data.password),
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         telegram_id=user_data.telegram_id,
@@ -108,7 +109,10 @@ async def login(db: DbSession, form_data: OAuth2PasswordRequestForm = Depends())
     user = result.scalar_one_or_none()
 
     # Check user exists, has password (not Telegram-only), and password is correct
-    if not user or not user.hashed_password or not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user and user.hashed_password:
+        valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -121,6 +125,11 @@ async def login(db: DbSession, form_data: OAuth2PasswordRequestForm = Depends())
             detail="User is inactive",
         )
 
+    if new_hash:
+        # Cost factor changed since the hash was made
+        user.hashed_password = new_hash
+        await db.commit()
+
     access_token = create_access_token(data={"sub": str(user.id)})
     return Token(access_token=access_token)
 
@@ -399,6 +408,7 @@ async def get_google_status(current_user: CurrentUser, db: DbSession):
     """Get current user's Google connection status."""
     calendars = []
 
+    await load_attributes(db, current_user)
     if current_user.google_id and current_user.google_access_token:
         try:
             # Refresh token if needed
@@ -20,6 +20,9 @@ from app.models.company import Company
 from app.models.appointment import Appointment, AppointmentStatus
 from app.models.service import Service
 from app.models.user import User
+from app.services.availability import get_doctor_slots
+from app.services.booking import flush_booking, SlotTakenError
+from app.services.slot_holds import client_holder, hold_slot, release_holds
 from app.services.google_calendar import sync_appointment_to_calendar
 
 router = APIRouter(prefix="/client")
@@ -87,6 +90,21 @@ class CreateAppointmentRequest(BaseModel):
     start_time: dt_time
 
 
+class SlotHoldRequest(BaseModel):
+    service_id: int
+    doctor_id: int
+    date: date
+    start_time: dt_time
+
+
+class SlotHoldResponse(BaseModel):
+    doctor_id: int
+    date: date
+    start_time: dt_time
+    end_time: dt_time
+    expires_at: datetime
+
+
 # --- Auth helpers ---
 
 def verify_telegram_auth(auth_data: TelegramAuthData) -> bool:
@@ -336,6 +354,65 @@ async def cancel_appointment(
     return {"message": "Appointment cancelled successfully"}
 
 
+@router.post("/slot-holds", response_model=SlotHoldResponse)
+async def create_slot_hold(
+    data: SlotHoldRequest,
+    telegram_id: int,
+    db: DbSession,
+):
+    """Hold a slot while the client confirms the booking.
+
+    Replaces the client's previous hold. Returns 409 if the slot is booked
+    or held by someone else.
+    """
+    client = await get_client_by_telegram_id(db, telegram_id)
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found",
+        )
+
+    service_result = await db.execute(
+        select(Service).where(Service.id == data.service_id, Service.is_active == True)
+    )
+    service = service_result.scalar_one_or_none()
+    if not service:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Service not found",
+        )
+
+    holder = client_holder(telegram_id)
+    slots = await get_doctor_slots(
+        db, data.doctor_id, service.duration_minutes, data.date, data.date, holder
+    )
+    slot = next((s for s in slots if s[1] == data.start_time), None)
+    expires_at = None
+    if slot:
+        expires_at = await hold_slot(db, data.doctor_id, data.date, slot[1], slot[2], holder)
+    if not expires_at:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This time is no longer available",
+        )
+
+    return SlotHoldResponse(
+        doctor_id=data.doctor_id,
+        date=data.date,
+        start_time=slot[1],
+        end_time=slot[2],
+        expires_at=expires_at,
+    )
+
+
+@router.delete("/slot-holds")
+async def delete_slot_hold(telegram_id: int, db: DbSession):
+    """Release the client's held slot."""
+    await release_holds(db, client_holder(telegram_id))
+    await db.commit()
+    return {"message": "Slot hold released"}
+
+
 @router.post("/appointments", response_model=AppointmentPortalResponse)
 async def create_appointment(
     data: CreateAppointmentRequest,
@@ -406,6 +483,15 @@ async def create_appointment(
         status=AppointmentStatus.PENDING,
     )
     db.add(appointment)
+    try:
+        await flush_booking(db)
+    except SlotTakenError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This time is no longer available",
+        )
+    # Only after the flush: the hold delete would autoflush the appointment
+    await release_holds(db, client_holder(telegram_id))
     await db.commit()
     await db.refresh(appointment)
 
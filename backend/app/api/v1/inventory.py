@@ -1,8 +1,8 @@
 from decimal import Decimal
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, status, Query
-from sqlalchemy import select, func, or_
+from fastapi import APIRouter, HTTPException, Request, Response, status, Query
+from sqlalchemy import select, func, or_, and_, not_
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import DbSession, CurrentUser
@@ -15,6 +15,7 @@ from app.models.inventory import (
     InventoryItem,
     InventoryItemAttribute,
     StockMovement,
+    StockBalance,
     CategoryAttributeGroup,
     ServiceInventoryItem,
     MovementType,
@@ -59,6 +60,9 @@ from app.schemas.inventory import (
     # Pagination
     PaginatedItemsResponse,
 )
+from app.services.stock import add_movement, get_stock, get_stock_many
+from app.services.content_version import get_content_version
+from app.utils.http_cache import PRIVATE_CACHE_CONTROL, make_etag, check_etag
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
@@ -147,11 +151,25 @@ def build_category_tree(
 
 async def calculate_stock(db: DbSession, item_id: int) -> int:
     """Подсчитать текущий остаток товара"""
-    result = await db.execute(
-        select(func.coalesce(func.sum(StockMovement.quantity), 0))
-        .where(StockMovement.item_id == item_id)
+    return await get_stock(db, item_id)
+
+
+async def calculate_stock_many(db: DbSession, item_ids: list[int]) -> dict[int, int]:
+    """Подсчитать остатки нескольких товаров одним запросом"""
+    return await get_stock_many(db, item_ids)
+
+
+def stock_level():
+    """SQL-вираз поточного залишку (потребує outerjoin з StockBalance)"""
+    return func.coalesce(StockBalance.quantity, 0)
+
+
+def is_low_stock_condition():
+    """SQL-умова низького залишку (потребує outerjoin з StockBalance)"""
+    return and_(
+        InventoryItem.min_stock_level.isnot(None),
+        stock_level() <= InventoryItem.min_stock_level,
     )
-    return result.scalar() or 0
 
 
 def get_all_descendant_category_ids(
@@ -198,8 +216,15 @@ async def get_categories(current_user: CurrentUser, db: DbSession):
 
 
 @router.get("/categories/tree", response_model=list[InventoryCategoryTreeResponse])
-async def get_categories_tree(current_user: CurrentUser, db: DbSession):
+async def get_categories_tree(request: Request, response: Response, current_user: CurrentUser, db: DbSession):
     """Получить категории как дерево"""
+    version = await get_content_version(db, current_user.company_id, cached=False)
+    check_etag(
+        request, response,
+        make_etag("inventory-categories", current_user.company_id, version),
+        PRIVATE_CACHE_CONTROL,
+    )
+
     result = await db.execute(
         select(InventoryCategory)
         .options(
@@ -980,9 +1005,17 @@ async def get_items(
             InventoryItem.barcode.ilike(f"%{search}%"),
         )
         base_filter.append(search_filter)
+    # Фільтр по низькому залишку (до пагінації, щоб total був коректним)
+    if is_low_stock is not None:
+        low_condition = is_low_stock_condition()
+        base_filter.append(low_condition if is_low_stock else not_(low_condition))
 
     # Підрахунок загальної кількості
-    count_query = select(func.count(InventoryItem.id)).where(*base_filter)
+    count_query = (
+        select(func.count(InventoryItem.id))
+        .outerjoin(StockBalance, StockBalance.item_id == InventoryItem.id)
+        .where(*base_filter)
+    )
     total_result = await db.execute(count_query)
     total = total_result.scalar() or 0
 
@@ -996,6 +1029,7 @@ async def get_items(
             selectinload(InventoryItem.collection),
             selectinload(InventoryItem.children),
         )
+        .outerjoin(StockBalance, StockBalance.item_id == InventoryItem.id)
         .where(*base_filter)
         .order_by(InventoryItem.order, InventoryItem.name)
         .offset(skip)
@@ -1004,16 +1038,17 @@ async def get_items(
     result = await db.execute(query)
     items = result.scalars().all()
 
+    # Залишки товарів сторінки та їх варіантів одним запросом
+    stocks = await calculate_stock_many(
+        db, [i.id for i in items] + [c.id for i in items for c in i.children]
+    )
+
     # Підраховуємо залишки та інформацію про варіанти
     response_items = []
     for item in items:
-        stock = await calculate_stock(db, item.id)
+        stock = stocks[item.id]
         is_low = item.min_stock_level is not None and stock <= item.min_stock_level
 
-        # Пропускаємо якщо фільтр по низькому залишку
-        if is_low_stock is not None and is_low_stock != is_low:
-            continue
-
         # Отримуємо головне фото
         main_image = None
         if item.images:
@@ -1046,7 +1081,7 @@ async def get_items(
 
             # Рахуємо залишки варіантів та будуємо список
             for variant in sorted(item.children, key=lambda x: (x.order, x.name)):
-                variant_stock = await calculate_stock(db, variant.id)
+                variant_stock = stocks[variant.id]
                 total_stock += variant_stock
                 variant_is_low = variant.min_stock_level is not None and variant_stock <= variant.min_stock_level
                 variants_list.append(VariantListItem(
@@ -1154,7 +1189,7 @@ async def create_item(
             performed_by=current_user.id,
             notes="Початковий залишок",
         )
-        db.add(movement)
+        await add_movement(db, movement)
 
     # Створюємо варіанти якщо передано
     created_variants = []
@@ -1195,7 +1230,7 @@ async def create_item(
                     performed_by=current_user.id,
                     notes="Початковий залишок",
                 )
-                db.add(v_movement)
+                await add_movement(db, v_movement)
 
     await db.commit()
 
@@ -1213,7 +1248,8 @@ async def create_item(
     )
     item = result.scalar_one()
 
-    stock = await calculate_stock(db, item.id)
+    stocks = await calculate_stock_many(db, [item.id] + [c.id for c in item.children])
+    stock = stocks[item.id]
     total_stock = stock  # Починаємо з залишку батьківського товару
 
     # Будуємо відповідь з варіантами
@@ -1223,7 +1259,7 @@ async def create_item(
     if item.children:
         prices = []
         for child in item.children:
-            child_stock = await calculate_stock(db, child.id)
+            child_stock = stocks[child.id]
             total_stock += child_stock  # Додаємо залишок варіанту
             variants_response.append(InventoryItemVariantResponse(
                 id=child.id,
@@ -1315,7 +1351,8 @@ async def get_item(item_id: int, current_user: CurrentUser, db: DbSession):
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    stock = await calculate_stock(db, item.id)
+    stocks = await calculate_stock_many(db, [item.id] + [c.id for c in item.children])
+    stock = stocks[item.id]
     total_stock = stock  # Починаємо з залишку батьківського товару
 
     # Будуємо відповідь з варіантами
@@ -1325,7 +1362,7 @@ async def get_item(item_id: int, current_user: CurrentUser, db: DbSession):
     if item.children:
         prices = []
         for child in sorted(item.children, key=lambda x: x.order):
-            child_stock = await calculate_stock(db, child.id)
+            child_stock = stocks[child.id]
             total_stock += child_stock  # Додаємо залишок варіанту до загального
             variants_response.append(InventoryItemVariantResponse(
                 id=child.id,
@@ -1448,7 +1485,8 @@ async def update_item(
     )
     item = result.scalar_one()
 
-    stock = await calculate_stock(db, item.id)
+    stocks = await calculate_stock_many(db, [item.id] + [c.id for c in item.children])
+    stock = stocks[item.id]
     total_stock = stock  # Починаємо з залишку батьківського товару
 
     # Будуємо відповідь з варіантами
@@ -1458,7 +1496,7 @@ async def update_item(
     if item.children:
         prices = []
         for child in sorted(item.children, key=lambda x: x.order):
-            child_stock = await calculate_stock(db, child.id)
+            child_stock = stocks[child.id]
             total_stock += child_stock  # Додаємо залишок варіанту
             variants_response.append(InventoryItemVariantResponse(
                 id=child.id,
@@ -1680,7 +1718,7 @@ async def create_movement(
         batch_number=data.batch_number,
         expiry_date=data.expiry_date,
     )
-    db.add(movement)
+    await add_movement(db, movement)
     await db.commit()
     await db.refresh(movement)
 
@@ -1766,10 +1804,11 @@ async def get_service_inventory_items(
         .where(ServiceInventoryItem.service_id == service_id)
     )
     items = result.scalars().all()
+    stocks = await calculate_stock_many(db, [si.item_id for si in items])
 
     response = []
     for si in items:
-        stock = await calculate_stock(db, si.item_id)
+        stock = stocks[si.item_id]
         response.append(ServiceInventoryItemResponse(
             id=si.id,
             service_id=si.service_id,
@@ -1893,12 +1932,13 @@ async def get_inventory_stats(current_user: CurrentUser, db: DbSession):
         )
     )
     items = items_result.scalars().all()
+    stocks = await calculate_stock_many(db, [item.id for item in items])
 
     low_stock_count = 0
     total_value = Decimal("0")
 
     for item in items:
-        stock = await calculate_stock(db, item.id)
+        stock = stocks[item.id]
         if item.min_stock_level is not None and stock <= item.min_stock_level:
             low_stock_count += 1
         if item.purchase_price and stock > 0:
@@ -1917,49 +1957,48 @@ async def get_inventory_stats(current_user: CurrentUser, db: DbSession):
 async def get_low_stock_items(current_user: CurrentUser, db: DbSession):
     """Получить товары с низким остатком"""
     result = await db.execute(
-        select(InventoryItem)
+        select(InventoryItem, stock_level())
         .options(selectinload(InventoryItem.category))
+        .outerjoin(StockBalance, StockBalance.item_id == InventoryItem.id)
         .where(
             InventoryItem.company_id == current_user.company_id,
             InventoryItem.is_active == True,
-            InventoryItem.min_stock_level.isnot(None),
+            is_low_stock_condition(),
         )
     )
-    items = result.scalars().all()
+    items = result.all()
 
     response = []
-    for item in items:
-        stock = await calculate_stock(db, item.id)
-        if stock <= item.min_stock_level:
-            main_image = None
-            if item.images:
-                for img in item.images:
-                    if isinstance(img, dict):
-                        if img.get("is_main"):
-                            main_image = img.get("url")
-                            break
-                    elif isinstance(img, str):
-                        if not main_image:
-                            main_image = img
-                if not main_image and item.images:
-                    first_img = item.images[0]
-                    main_image = first_img.get("url") if isinstance(first_img, dict) else first_img
-
-            response.append(InventoryItemListResponse(
-                id=item.id,
-                name=item.name,
-                sku=item.sku,
-                barcode=item.barcode,
-                usage_type=item.usage_type,
-                purchase_price=item.purchase_price,
-                sale_price=item.sale_price,
-                unit=item.unit,
-                current_stock=stock,
-                is_low_stock=True,
-                main_image_url=main_image,
-                category_name=item.category.name if item.category else None,
-                category_id=item.category_id,
-                is_active=item.is_active,
-            ))
+    for item, stock in items:
+        main_image = None
+        if item.images:
+            for img in item.images:
+                if isinstance(img, dict):
+                    if img.get("is_main"):
+                        main_image = img.get("url")
+                        break
+                elif isinstance(img, str):
+                    if not main_image:
+                        main_image = img
+            if not main_image and item.images:
+                first_img = item.images[0]
+                main_image = first_img.get("url") if isinstance(first_img, dict) else first_img
+
+        response.append(InventoryItemListResponse(
+            id=item.id,
+            name=item.name,
+            sku=item.sku,
+            barcode=item.barcode,
+            usage_type=item.usage_type,
+            purchase_price=item.purchase_price,
+            sale_price=item.sale_price,
+            unit=item.unit,
+            current_stock=stock,
+            is_low_stock=True,
+            main_image_url=main_image,
+            category_name=item.category.name if item.category else None,
+            category_id=item.category_id,
+            is_active=item.is_active,
+        ))
 
     return response
@@ -1,12 +1,17 @@
 """API endpoints for protocol templates."""
-from fastapi import APIRouter, HTTPException, status
+import time
+
+import anthropic
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select, or_
 from sqlalchemy.orm import selectinload
 
-from app.api.deps import DbSession, CurrentUser
+from app.api.deps import DbSession, CurrentUser, require_ai_budget
 from app.core.config import settings
 from app.models.protocol_template import ProtocolTemplate
 from app.models.service import Service, ServiceCategory
+from app.services.ai_client import create_message
+from app.services.ai_usage import record_ai_usage
 from app.schemas.protocol_template import (
     ProtocolTemplateCreate,
     ProtocolTemplateUpdate,
@@ -311,6 +316,8 @@ async def copy_template(
 
 
 # AI Generation prompt
+PROTOCOL_TEMPLATE_MODEL = "claude-sonnet-4-20250514"
+
 PROTOCOL_TEMPLATE_GENERATION_PROMPT = """Ти експерт з косметологічних та медичних процедур. Твоя задача - створити шаблон протоколу процедури для документування візиту клієнта.
 
 Створи структурований шаблон протоколу з секціями та полями для заповнення.
@@ -381,7 +388,11 @@ PROTOCOL_TEMPLATE_GENERATION_PROMPT = """Ти експерт з косметол
 - Рекомендації"""
 
 
-@router.post("/generate", response_model=GenerateTemplateResponse)
+@router.post(
+    "/generate",
+    response_model=GenerateTemplateResponse,
+    dependencies=[Depends(require_ai_budget)],
+)
 async def generate_template(
     request: GenerateTemplateRequest,
     current_user: CurrentUser,
@@ -402,14 +413,12 @@ async def generate_template(
 
 Відповідь ТІЛЬКИ у форматі JSON."""
 
+    started = time.monotonic()
     try:
-        import anthropic
         import json
 
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
+        message = await create_message(
+            model=PROTOCOL_TEMPLATE_MODEL,
             max_tokens=4096,
             system=PROTOCOL_TEMPLATE_GENERATION_PROMPT,
             messages=[
@@ -420,6 +429,11 @@ async def generate_template(
             ],
         )
 
+        await record_ai_usage(
+            "generate-protocol-template", PROTOCOL_TEMPLATE_MODEL,
+            current_user.company_id, current_user.id, started, usage=message.usage,
+        )
+
         response_text = message.content[0].text
 
         # Parse JSON response
@@ -449,6 +463,10 @@ async def generate_template(
         )
 
     except anthropic.APIError as e:
+        await record_ai_usage(
+            "generate-protocol-template", PROTOCOL_TEMPLATE_MODEL,
+            current_user.company_id, current_user.id, started, success=False,
+        )
         raise HTTPException(
             status_code=500,
             detail=f"AI API error: {str(e)}",
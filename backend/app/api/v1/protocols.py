@@ -3,7 +3,7 @@ import os
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import DbSession, CurrentUser
@@ -19,6 +19,8 @@ from app.schemas.procedure_protocol import (
     ProtocolProductCreate,
     ProtocolProductResponse,
 )
+from app.services.image_variants import remove_variants
+from app.services.upload_locks import lock_upload_file
 from app.schemas.protocol_file import (
     ProtocolFileResponse,
     ProtocolFileAttach,
@@ -28,6 +30,24 @@ from app.schemas.protocol_file import (
 router = APIRouter(prefix="/protocols")
 
 
+async def remove_file_if_unused(db: DbSession, url_path: str) -> None:
+    """Delete the physical file unless another record uses it (uploads are deduplicated).
+
+    Call after the deleted record is committed. The file lock keeps uploads
+    of the same content from reusing the file while it is being removed.
+    """
+    file_path = Path(settings.BASE_DIR) / url_path.lstrip("/")
+    await lock_upload_file(db, file_path.name)
+    result = await db.execute(
+        select(func.count(ProtocolFile.id)).where(ProtocolFile.file_path == url_path)
+    )
+    if not result.scalar():
+        if file_path.exists():
+            os.remove(file_path)
+        remove_variants(url_path)
+    await db.commit()  # Releases the lock
+
+
 @router.get("/appointment/{appointment_id}", response_model=ProcedureProtocolResponse)
 async def get_protocol_by_appointment(
     appointment_id: int,
@@ -443,15 +463,12 @@ async def delete_protocol_file(
             detail="File not found",
         )
 
-    # Delete physical file
-    file_path = Path(settings.BASE_DIR) / file.file_path.lstrip("/")
-    if file_path.exists():
-        os.remove(file_path)
-
     # Delete database record
     await db.delete(file)
     await db.commit()
 
+    await remove_file_if_unused(db, file.file_path)
+
 
 @router.patch("/files/{file_id}", response_model=ProtocolFileResponse)
 async def update_protocol_file(
@@ -526,11 +543,8 @@ async def delete_unattached_file(
             detail="File not found or already attached to a protocol",
         )
 
-    # Delete physical file
-    file_path = Path(settings.BASE_DIR) / file.file_path.lstrip("/")
-    if file_path.exists():
-        os.remove(file_path)
-
     # Delete database record
     await db.delete(file)
     await db.commit()
+
+    await remove_file_if_unused(db, file.file_path)
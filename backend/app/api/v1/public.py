@@ -1,7 +1,9 @@
 """Public API endpoints for the showcase site (no authentication required)"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 
 from app.api.deps import DbSession
 from app.models.company import Company
@@ -10,61 +12,86 @@ from app.models.website_section import WebsiteSection
 from app.schemas.company import CompanyPublicResponse
 from app.schemas.service import ServiceResponse, ServiceCategoryTreeResponse
 from app.schemas.website_section import WebsiteSectionResponse
+from app.services.content_version import get_content_version_by_slug
+from app.services.landing_assets import choose_encoding, ensure_landing_files, landing_file
+from app.services.public_cache import get_bootstrap, set_bootstrap
+from app.utils.http_cache import PUBLIC_CACHE_CONTROL, make_etag, check_etag, etag_matches
 
 router = APIRouter(prefix="/public")
 
+# Hashed landing URLs never change content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
-@router.get("/companies/{slug}", response_model=CompanyPublicResponse)
-async def get_company_by_slug(slug: str, db: DbSession):
-    """Get company by slug for public display"""
-    result = await db.execute(
-        select(Company).where(Company.slug == slug)
-    )
-    company = result.scalar_one_or_none()
-    if not company:
+
+class CompanyBootstrapResponse(BaseModel):
+    """Everything the showcase page needs, in one response"""
+    company: CompanyPublicResponse
+    services: list[ServiceResponse]
+    categories: list[ServiceCategoryTreeResponse]
+    website_sections: list[WebsiteSectionResponse]
+
+
+async def check_company_version_etag(
+    request: Request, response: Response, db: DbSession, slug: str, kind: str
+) -> tuple[int, int]:
+    """Answer 304 if the client's copy is current (no data is loaded).
+
+    Returns (company_id, content version) the ETag was built from.
+    """
+    version = await get_content_version_by_slug(db, slug)
+    if version is None:
         raise HTTPException(status_code=404, detail="Company not found")
-    return company
+    company_id, content_version = version
+    check_etag(request, response, make_etag(kind, company_id, content_version), PUBLIC_CACHE_CONTROL)
+    return company_id, content_version
 
 
-@router.get("/companies/{slug}/services", response_model=list[ServiceResponse])
-async def get_company_services(slug: str, db: DbSession):
-    """Get all active services for a company"""
-    # First get the company
-    result = await db.execute(
-        select(Company).where(Company.slug == slug)
-    )
+async def check_company_etag(
+    request: Request, response: Response, db: DbSession, slug: str, kind: str
+) -> int:
+    """Answer 304 if the client's copy is current (no data is loaded), return company_id."""
+    company_id, _ = await check_company_version_etag(request, response, db, slug, kind)
+    return company_id
+
+
+def public_company(company: Company, include_landing_html: bool = False) -> CompanyPublicResponse:
+    """Public company data, the landing HTML only if asked for (it is not loaded otherwise)"""
+    if include_landing_html:
+        return CompanyPublicResponse.model_validate(company)
+    fields = CompanyPublicResponse.model_fields.keys() - {"landing_html"}
+    return CompanyPublicResponse(**{name: getattr(company, name) for name in fields})
+
+
+async def get_company_or_404(db: DbSession, slug: str, include_landing_html: bool = False) -> Company:
+    query = select(Company).where(Company.slug == slug)
+    if include_landing_html:
+        query = query.options(undefer(Company.landing_html))
+    result = await db.execute(query)
     company = result.scalar_one_or_none()
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
+    return company
+
 
-    # Get active services
+async def load_services(db: DbSession, company_id: int) -> list[Service]:
+    """Active services of a company"""
     result = await db.execute(
         select(Service)
-        .where(Service.company_id == company.id, Service.is_active == True)
+        .where(Service.company_id == company_id, Service.is_active == True)
         .options(
             selectinload(Service.category),
             selectinload(Service.specialty)
         )
         .order_by(Service.category_id, Service.name)
     )
-    return result.scalars().all()
-
+    return list(result.scalars().all())
 
-@router.get("/companies/{slug}/categories", response_model=list[ServiceCategoryTreeResponse])
-async def get_company_categories(slug: str, db: DbSession):
-    """Get service categories for a company in tree structure"""
-    # First get the company
-    result = await db.execute(
-        select(Company).where(Company.slug == slug)
-    )
-    company = result.scalar_one_or_none()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
 
-    # Get all categories
+async def load_category_tree(db: DbSession, company_id: int) -> list[dict]:
+    """Service categories of a company in tree structure"""
     result = await db.execute(
         select(ServiceCategory)
-        .where(ServiceCategory.company_id == company.id)
+        .where(ServiceCategory.company_id == company_id)
         .order_by(ServiceCategory.order)
     )
     all_categories = result.scalars().all()
@@ -90,28 +117,137 @@ async def get_company_categories(slug: str, db: DbSession):
     return build_tree(None)
 
 
-@router.get("/companies/{slug}/website-sections", response_model=list[WebsiteSectionResponse])
-async def get_company_website_sections(slug: str, db: DbSession):
-    """Get visible website sections for a company"""
-    # First get the company
+async def load_website_sections(db: DbSession, company_id: int) -> list[WebsiteSection]:
+    """Visible website sections of a company, ordered"""
     result = await db.execute(
-        select(Company).where(Company.slug == slug)
+        select(WebsiteSection)
+        .where(
+            WebsiteSection.company_id == company_id,
+            WebsiteSection.is_visible == True
+        )
+        .order_by(WebsiteSection.order)
     )
-    company = result.scalar_one_or_none()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
+    return list(result.scalars().all())
+
+
+@router.get("/companies/{slug}", response_model=CompanyPublicResponse)
+async def get_company_by_slug(
+    slug: str,
+    request: Request,
+    response: Response,
+    db: DbSession,
+    include_landing_html: bool = False,
+):
+    """Get company by slug for public display"""
+    kind = "company-landing" if include_landing_html else "company"
+    await check_company_etag(request, response, db, slug, kind)
+    company = await get_company_or_404(db, slug, include_landing_html)
+    return public_company(company, include_landing_html)
+
+
+@router.get("/companies/{slug}/services", response_model=list[ServiceResponse])
+async def get_company_services(slug: str, request: Request, response: Response, db: DbSession):
+    """Get all active services for a company"""
+    company_id = await check_company_etag(request, response, db, slug, "services")
+    return await load_services(db, company_id)
+
+
+@router.get("/companies/{slug}/categories", response_model=list[ServiceCategoryTreeResponse])
+async def get_company_categories(slug: str, request: Request, response: Response, db: DbSession):
+    """Get service categories for a company in tree structure"""
+    company_id = await check_company_etag(request, response, db, slug, "categories")
+    return await load_category_tree(db, company_id)
+
+
+@router.get("/companies/{slug}/website-sections", response_model=list[WebsiteSectionResponse])
+async def get_company_website_sections(slug: str, request: Request, response: Response, db: DbSession):
+    """Get visible website sections for a company"""
+    await check_company_etag(request, response, db, slug, "website-sections")
+    company = await get_company_or_404(db, slug)
 
     # Check if website is enabled
     if not company.website_enabled:
         raise HTTPException(status_code=404, detail="Website not enabled")
 
-    # Get visible sections ordered
+    return await load_website_sections(db, company.id)
+
+
+@router.get("/companies/{slug}/bootstrap", response_model=CompanyBootstrapResponse)
+async def get_company_bootstrap(slug: str, request: Request, response: Response, db: DbSession):
+    """Company, services, categories and website sections in one cached response"""
+    _, content_version = await check_company_version_etag(request, response, db, slug, "bootstrap")
+
+    # Cached per content version, so the body always matches the ETag
+    payload = await get_bootstrap(slug, content_version)
+    if payload is None:
+        company = await get_company_or_404(db, slug)
+        bootstrap = CompanyBootstrapResponse(
+            company=public_company(company),
+            services=await load_services(db, company.id),
+            categories=await load_category_tree(db, company.id),
+            website_sections=(
+                await load_website_sections(db, company.id) if company.website_enabled else []
+            ),
+        )
+        payload = bootstrap.model_dump_json()
+        await set_bootstrap(slug, company.id, content_version, payload)
+
+    return Response(content=payload, media_type="application/json", headers=dict(response.headers))
+
+
+async def landing_response(
+    request: Request, company_id: int, digest: str, cache_control: str
+) -> FileResponse:
+    """Precompressed landing file matching Accept-Encoding"""
+    etag = make_etag("landing", digest)
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag_matches(request, etag):
+        raise HTTPException(status_code=304, headers=headers)
+
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    path = landing_file(company_id, digest, encoding)
+    if encoding and not path.exists():
+        encoding, path = None, landing_file(company_id, digest)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(path, media_type="text/html; charset=utf-8", headers=headers)
+
+
+async def ensure_landing(db: DbSession, company_id: int, digest: str) -> None:
+    """Write the landing files from the database if they are missing"""
+    if landing_file(company_id, digest).exists():
+        return
     result = await db.execute(
-        select(WebsiteSection)
-        .where(
-            WebsiteSection.company_id == company.id,
-            WebsiteSection.is_visible == True
+        select(Company.landing_html).where(
+            Company.id == company_id, Company.landing_digest == digest
         )
-        .order_by(WebsiteSection.order)
     )
-    return result.scalars().all()
+    html = result.scalar_one_or_none()
+    if html is None:
+        raise HTTPException(status_code=404, detail="Landing not found")
+    await ensure_landing_files(company_id, digest, html)
+
+
+@router.get("/companies/{slug}/landing", response_class=FileResponse)
+async def get_company_landing(slug: str, request: Request, db: DbSession):
+    """Active AI-generated landing page as HTML"""
+    result = await db.execute(
+        select(Company.id, Company.landing_digest).where(Company.slug == slug)
+    )
+    row = result.one_or_none()
+    if not row or not row.landing_digest:
+        raise HTTPException(status_code=404, detail="Landing not found")
+
+    await ensure_landing(db, row.id, row.landing_digest)
+    return await landing_response(request, row.id, row.landing_digest, PUBLIC_CACHE_CONTROL)
+
+
+@router.get("/landings/{company_id}/{digest}", response_class=FileResponse)
+async def get_landing_by_digest(company_id: int, digest: str, request: Request, db: DbSession):
+    """Landing page by content digest (immutable, cached for a year)"""
+    if not digest.isalnum():
+        raise HTTPException(status_code=404, detail="Landing not found")
+
+    await ensure_landing(db, company_id, digest)
+    return await landing_response(request, company_id, digest, IMMUTABLE_CACHE_CONTROL)
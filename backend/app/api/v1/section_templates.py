@@ -1,21 +1,36 @@
 """Section templates API endpoints."""
 
-import base64
+import asyncio
 import re
 import json
-from typing import Optional
+import time
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
+import anthropic
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 
-from app.api.deps import DbSession, CurrentUser
+from app.api.deps import DbSession, CurrentUser, require_ai_budget
 from app.core.config import settings
+from app.models.generation_job import GenerationJob
 from app.models.section_template import SectionTemplate
-from app.prompts import (
-    FULL_SITE_GENERATION_PROMPT,
-    MASTER_PROMPT,
+from app.prompts import FULL_SITE_GENERATION_PROMPT, MASTER_PROMPT
+from app.services.ai_cache import cache_key, get_cached, set_cached
+from app.services.ai_client import create_message, open_message_stream, stream_usage
+from app.services.ai_usage import record_ai_usage
+from app.services.generation_jobs import submit_site_job, job_events
+from app.services.landing_assets import landing_digest, publish_landing, remove_landing
+from app.services.reference_images import store_reference_images, load_reference_images
+from app.services.site_generation import (
+    HtmlStreamExtractor,
+    extract_html_content,
+    SITE_MODEL as IMAGE_SITE_MODEL,
+    generate_site_from_images,
 )
+from app.utils.http_cache import PRIVATE_CACHE_CONTROL, make_etag, check_etag
+from app.utils.sse import format_sse, SSE_HEADERS
 from app.schemas.section_template import (
     SectionTemplateCreate,
     SectionTemplateUpdate,
@@ -87,6 +102,20 @@ class LandingVersionListItem(BaseModel):
         from_attributes = True
 
 
+async def landing_version_response(version: LandingVersion) -> LandingVersionResponse:
+    """Version with its content (html and reference_images must be loaded)."""
+    return LandingVersionResponse(
+        id=version.id,
+        html=version.html,
+        prompt=version.prompt,
+        had_reference_image=version.had_reference_image,
+        reference_images=await load_reference_images(version.reference_images),
+        notes=version.notes,
+        is_active=version.is_active,
+        created_at=version.created_at,
+    )
+
+
 class UpdateVersionNotesRequest(BaseModel):
     """Request to update version notes."""
     notes: str
@@ -149,17 +178,17 @@ async def save_landing(
     for version in existing_active.scalars():
         version.is_active = False
 
-    # Convert reference images to JSON-serializable format
+    # Store reference images as files, the version keeps only their keys
     reference_images_data = None
     if request.reference_images:
-        reference_images_data = [
+        reference_images_data = await store_reference_images([
             {
                 "data": img.data,
                 "media_type": img.media_type,
                 "name": img.name,
             }
             for img in request.reference_images
-        ]
+        ])
 
     # Create new version
     new_version = LandingVersion(
@@ -168,14 +197,17 @@ async def save_landing(
         prompt=request.prompt,
         had_reference_image=request.had_reference_image,
         reference_images=reference_images_data,
+        reference_image_count=len(reference_images_data or []),
         is_active=True,
     )
     db.add(new_version)
 
     # Also update the company's landing_html
     company.landing_html = request.html
+    company.landing_digest = landing_digest(request.html)
     await db.commit()
     await db.refresh(new_version)
+    await publish_landing(company.id, request.html)
 
     return SaveLandingResponse(
         success=True,
@@ -186,11 +218,18 @@ async def save_landing(
 
 @router.get("/landing-versions", response_model=list[LandingVersionListItem])
 async def list_landing_versions(
+    request: Request,
+    response: Response,
     db: DbSession,
     current_user: CurrentUser,
 ) -> list[LandingVersionListItem]:
     """List all landing page versions for user's company."""
     member, company = await get_user_company(db, current_user)
+    check_etag(
+        request, response,
+        make_etag("landing-versions", company.id, company.content_version),
+        PRIVATE_CACHE_CONTROL,
+    )
 
     result = await db.execute(
         select(LandingVersion)
@@ -200,6 +239,8 @@ async def list_landing_versions(
     versions = result.scalars().all()
 
     # If no versions but company has landing_html, create initial version
+    if not versions:
+        await db.refresh(company, ["landing_html"])  # Deferred column
     if not versions and company.landing_html:
         initial_version = LandingVersion(
             company_id=company.id,
@@ -219,24 +260,33 @@ async def list_landing_versions(
 @router.get("/landing-versions/{version_id}", response_model=LandingVersionResponse)
 async def get_landing_version(
     version_id: int,
+    request: Request,
+    response: Response,
     db: DbSession,
     current_user: CurrentUser,
 ):
     """Get a specific landing page version."""
     member, company = await get_user_company(db, current_user)
+    check_etag(
+        request, response,
+        make_etag("landing-version", version_id, company.content_version),
+        PRIVATE_CACHE_CONTROL,
+    )
 
     result = await db.execute(
-        select(LandingVersion).where(
+        select(LandingVersion)
+        .where(
             LandingVersion.id == version_id,
             LandingVersion.company_id == company.id,
         )
+        .options(undefer(LandingVersion.html), undefer(LandingVersion.reference_images))
     )
     version = result.scalar_one_or_none()
 
     if not version:
         raise HTTPException(status_code=404, detail="Version not found")
 
-    return version
+    return await landing_version_response(version)
 
 
 @router.patch("/landing-versions/{version_id}/notes", response_model=LandingVersionResponse)
@@ -250,10 +300,12 @@ async def update_version_notes(
     member, company = await get_user_company(db, current_user)
 
     result = await db.execute(
-        select(LandingVersion).where(
+        select(LandingVersion)
+        .where(
             LandingVersion.id == version_id,
             LandingVersion.company_id == company.id,
         )
+        .options(undefer(LandingVersion.html), undefer(LandingVersion.reference_images))
     )
     version = result.scalar_one_or_none()
 
@@ -262,9 +314,8 @@ async def update_version_notes(
 
     version.notes = request.notes
     await db.commit()
-    await db.refresh(version)
 
-    return version
+    return await landing_version_response(version)
 
 
 @router.post("/landing-versions/{version_id}/activate", response_model=LandingVersionResponse)
@@ -278,10 +329,12 @@ async def activate_version(
 
     # Get the version to activate
     result = await db.execute(
-        select(LandingVersion).where(
+        select(LandingVersion)
+        .where(
             LandingVersion.id == version_id,
             LandingVersion.company_id == company.id,
         )
+        .options(undefer(LandingVersion.html), undefer(LandingVersion.reference_images))
     )
     version = result.scalar_one_or_none()
 
@@ -303,11 +356,12 @@ async def activate_version(
 
     # Update company's landing_html
     company.landing_html = version.html
+    company.landing_digest = landing_digest(version.html)
 
     await db.commit()
-    await db.refresh(version)
+    await publish_landing(company.id, version.html)
 
-    return version
+    return await landing_version_response(version)
 
 
 @router.delete("/landing-versions/{version_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -331,12 +385,17 @@ async def delete_version(
         raise HTTPException(status_code=404, detail="Version not found")
 
     # If deleting active version, clear company's landing_html
-    if version.is_active:
+    was_active = version.is_active
+    if was_active:
         company.landing_html = None
+        company.landing_digest = None
 
     await db.delete(version)
     await db.commit()
 
+    if was_active:
+        await remove_landing(company.id)
+
 
 # ============= TEMPLATE UTILITIES =============
 
@@ -513,29 +572,6 @@ async def render_raw_html(
     return RenderTemplateResponse(html=html)
 
 
-# ============= HTML EXTRACTION HELPER =============
-
-def extract_html_content(text: str) -> str:
-    """Extract only the HTML content from AI response, removing any explanations."""
-    # Remove markdown code blocks
-    if "```html" in text:
-        text = text.split("```html", 1)[1]
-    if "```" in text:
-        text = text.split("```")[0]
-
-    # Find DOCTYPE and </html>
-    text_lower = text.lower()
-    doctype_idx = text_lower.find("<!doctype")
-    html_end_idx = text_lower.rfind("</html>")
-
-    if doctype_idx >= 0 and html_end_idx > doctype_idx:
-        return text[doctype_idx:html_end_idx + 7].strip()
-    elif doctype_idx >= 0:
-        return text[doctype_idx:].strip()
-
-    return text.strip()
-
-
 # ============= FULL SITE GENERATION =============
 
 
@@ -549,6 +585,7 @@ class GenerateFullSiteRequest(BaseModel):
     primary_color: str = "#e91e63"
     industry: str = "beauty"
     additional_instructions: Optional[str] = None
+    force: bool = False  # Skip the result cache
 
 
 class GenerateFullSiteResponse(BaseModel):
@@ -557,19 +594,19 @@ class GenerateFullSiteResponse(BaseModel):
     estimated_tokens: int
 
 
-@router.post("/generate-site", response_model=GenerateFullSiteResponse)
-async def generate_full_site(
-    request: GenerateFullSiteRequest,
-    current_user: CurrentUser,
-):
-    """Generate a complete landing page from business description."""
+SITE_MODEL = "claude-opus-4-20250514"
+
+
+def require_ai_configured() -> None:
     if not settings.ANTHROPIC_API_KEY:
         raise HTTPException(
             status_code=503,
             detail="AI generation not configured. Please set ANTHROPIC_API_KEY."
         )
 
-    # Build the user prompt with business data
+
+def build_generate_site_messages(request: GenerateFullSiteRequest) -> list[dict]:
+    """Messages for generating a landing page from business data."""
     user_prompt = f"""Create a stunning landing page for this business:
 
 BUSINESS INFO:
@@ -585,25 +622,130 @@ BUSINESS INFO:
 
 Remember: Create a COMPLETE, beautiful, modern landing page. Make it look premium and professional. Use the brand color {request.primary_color} as the accent throughout."""
 
+    return [
+        {
+            "role": "user",
+            "content": FULL_SITE_GENERATION_PROMPT + "\n\n" + user_prompt,
+        }
+    ]
+
+
+async def record_site_usage(endpoint: str, current_user, started: float, **counters) -> None:
+    await record_ai_usage(
+        endpoint, SITE_MODEL, current_user.company_id, current_user.id, started, **counters
+    )
+
+
+async def stream_site_html(
+    messages: list[dict],
+    endpoint: str,
+    current_user,
+    force: bool = False,
+) -> AsyncIterator[str]:
+    """Server-Sent Events with the HTML as the model writes it.
+
+    Events:
+        delta - {"html": "..."} next piece of the page, append to previous ones
+        done  - {"estimated_tokens": N} generation finished
+        error - {"detail": "..."} AI API error, the stream ends
+
+    A cached result is sent as a single delta.
+
+    Usage is recorded before the final event (clients close the stream on
+    done) and, if the client disconnects, when the generator is closed -
+    with the tokens reported until then.
+    """
+    started = time.monotonic()
+    usage = {"success": False}
+    recorded = False
+
+    async def record_usage() -> None:
+        nonlocal recorded
+        if not recorded:
+            recorded = True
+            # Shielded: the generator is usually closed by a cancelled task
+            await asyncio.shield(record_site_usage(endpoint, current_user, started, **usage))
+
+    key = cache_key(endpoint, SITE_MODEL, messages)
+    cached = None if force else await get_cached(key)
     try:
-        import anthropic
+        if cached is not None:
+            usage = {"cached": True}
+            yield format_sse({"html": cached["html"]}, event="delta")
+            await record_usage()
+            yield format_sse({"estimated_tokens": 0}, event="done")
+            return
+
+        extractor = HtmlStreamExtractor()
+        streamed = []
+        try:
+            async with open_message_stream(
+                model=SITE_MODEL,
+                max_tokens=16384,
+                messages=messages,
+            ) as stream:
+                try:
+                    async for text in stream.text_stream:
+                        html = extractor.feed(text)
+                        if html:
+                            streamed.append(html)
+                            yield format_sse({"html": html}, event="delta")
+
+                    message = await stream.get_final_message()
+                finally:
+                    usage["usage"] = stream_usage(stream)
+
+            html = extractor.finish()
+            if html:
+                streamed.append(html)
+                yield format_sse({"html": html}, event="delta")
+
+            await set_cached(key, {"html": "".join(streamed)})
+
+            usage = {"usage": message.usage}
+            await record_usage()
+            estimated_tokens = message.usage.input_tokens + message.usage.output_tokens
+            yield format_sse({"estimated_tokens": estimated_tokens}, event="done")
+
+        except anthropic.APIError as e:
+            await record_usage()
+            yield format_sse({"detail": f"AI API error: {str(e)}"}, event="error")
+    finally:
+        await record_usage()
+
+
+@router.post(
+    "/generate-site",
+    response_model=GenerateFullSiteResponse,
+    dependencies=[Depends(require_ai_budget)],
+)
+async def generate_full_site(
+    request: GenerateFullSiteRequest,
+    current_user: CurrentUser,
+):
+    """Generate a complete landing page from business description."""
+    require_ai_configured()
 
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+    started = time.monotonic()
+    messages = build_generate_site_messages(request)
+    key = cache_key("generate-site", SITE_MODEL, messages)
+    cached = None if request.force else await get_cached(key)
+    if cached is not None:
+        await record_site_usage("generate-site", current_user, started, cached=True)
+        return GenerateFullSiteResponse(html=cached["html"], estimated_tokens=0)
 
-        message = client.messages.create(
-            model="claude-opus-4-20250514",
+    try:
+        message = await create_message(
+            model=SITE_MODEL,
             max_tokens=16384,
-            messages=[
-                {
-                    "role": "user",
-                    "content": FULL_SITE_GENERATION_PROMPT + "\n\n" + user_prompt,
-                }
-            ],
+            messages=messages,
         )
 
         # Extract clean HTML
         html_content = extract_html_content(message.content[0].text)
         estimated_tokens = message.usage.input_tokens + message.usage.output_tokens
+        await set_cached(key, {"html": html_content})
+        await record_site_usage("generate-site", current_user, started, usage=message.usage)
 
         return GenerateFullSiteResponse(
             html=html_content,
@@ -611,18 +753,36 @@ Remember: Create a COMPLETE, beautiful, modern landing page. Make it look premiu
         )
 
     except anthropic.APIError as e:
+        await record_site_usage("generate-site", current_user, started, success=False)
         raise HTTPException(
             status_code=500,
             detail=f"AI API error: {str(e)}"
         )
 
 
-# ============= FULL SITE FROM IMAGE (with Tool Use like Claude Chat) =============
+@router.post("/generate-site/stream", dependencies=[Depends(require_ai_budget)])
+async def generate_full_site_stream(
+    request: GenerateFullSiteRequest,
+    current_user: CurrentUser,
+):
+    """Same as /generate-site, but streams the HTML as Server-Sent Events."""
+    require_ai_configured()
+
+    return StreamingResponse(
+        stream_site_html(build_generate_site_messages(request), "generate-site", current_user, request.force),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
 
-from app.utils.image_tools import IMAGE_TOOLS, crop_image, crop_region, get_image_info
+
+# ============= FULL SITE FROM IMAGE (with Tool Use like Claude Chat) =============
 
 
-@router.post("/generate-site-from-image", response_model=GenerateFullSiteResponse)
+@router.post(
+    "/generate-site-from-image",
+    response_model=GenerateFullSiteResponse,
+    dependencies=[Depends(require_ai_budget)],
+)
 async def generate_full_site_from_image(
     current_user: CurrentUser,
     images: list[UploadFile] = File(...),
@@ -630,6 +790,7 @@ async def generate_full_site_from_image(
     prompt: Optional[str] = Form(None),
     mode: str = Form("copy"),  # "copy" uses MASTER_PROMPT
     auto_crop: bool = Form(False),  # Ignored - Claude crops via tools
+    force: bool = Form(False),  # Skip the result cache
 ):
     """Generate a complete landing page from reference image(s).
 
@@ -638,6 +799,8 @@ async def generate_full_site_from_image(
     2. Claude can call crop_image/crop_region to examine details
     3. We execute crops and return results
     4. Claude continues until ready to generate HTML
+
+    Long generations should use /generation-jobs instead.
     """
     if not settings.ANTHROPIC_API_KEY:
         raise HTTPException(
@@ -652,244 +815,44 @@ async def generate_full_site_from_image(
         )
 
     # Read all images into memory (we'll need them for cropping)
-    images_data = []
-    image_blocks = []
-    print(f"[GENERATE] Processing {len(images)} image(s) with tool_use pattern")
-
-    for idx, image in enumerate(images):
-        image_content = await image.read()
-        image_size_kb = len(image_content) / 1024
-        images_data.append(image_content)
-
-        image_base64 = base64.standard_b64encode(image_content).decode("utf-8")
-
-        media_type = image.content_type or "image/png"
-        if media_type not in ["image/jpeg", "image/png", "image/gif", "image/webp"]:
-            media_type = "image/png"
-
-        # Get image dimensions
-        info = get_image_info(image_content)
-        print(f"[GENERATE] Image {idx+1}: {image_size_kb:.1f}KB, {info['width']}x{info['height']}px, type: {media_type}")
-
-        image_blocks.append({
-            "type": "image",
-            "source": {
-                "type": "base64",
-                "media_type": media_type,
-                "data": image_base64,
-            },
-        })
-
-    # Build user prompt
-    images_info = ""
-    for idx, img_data in enumerate(images_data):
-        info = get_image_info(img_data)
-        images_info += f"\n- Image {idx+1}: {info['width']}x{info['height']} pixels"
-
-    images_note = ""
-    if len(images) > 1:
-        images_note = f"\n\nNote: {len(images)} reference images provided. They show different parts of the same design - combine them into one cohesive page."
-
-    user_prompt = f"""Create a landing page for: {company_name}
-
-REPLICATE this design EXACTLY. Analyze the reference carefully.
-
-Reference image dimensions:{images_info}
-
-You have tools to crop and zoom into specific areas of the reference image:
-- Use get_image_dimensions to know the image size
-- Use crop_region to quickly examine sections (header, hero, content, footer)
-- Use crop_image with specific coordinates to zoom into details (buttons, icons, typography)
-
-WORKFLOW:
-1. First, look at the full image to understand overall layout
-2. Use crop_region to examine each section closely
-3. Use crop_image to zoom into specific UI elements you need to replicate exactly
-4. Once you've analyzed all details, generate the complete HTML
-
-Match colors, fonts, spacing, and layout pixel-perfect.{images_note}"""
-
-    if prompt:
-        user_prompt += f"\n\nAdditional requirements: {prompt}"
+    images_data = [(await image.read(), image.content_type) for image in images]
+
+    started = time.monotonic()
+    key = cache_key("generate-site-from-image", IMAGE_SITE_MODEL, MASTER_PROMPT, company_name, prompt, images_data)
+    cached = None if force else await get_cached(key)
+    if cached is not None:
+        await record_ai_usage(
+            "generate-site-from-image", IMAGE_SITE_MODEL,
+            current_user.company_id, current_user.id, started, cached=True,
+        )
+        return GenerateFullSiteResponse(html=cached["html"], estimated_tokens=0)
 
     try:
-        import anthropic
-        import time
-
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-
-        # Initial message content: images + prompt
-        initial_content = image_blocks + [
-            {
-                "type": "text",
-                "text": MASTER_PROMPT + "\n\n" + user_prompt,
-            }
-        ]
-
-        messages = [{"role": "user", "content": initial_content}]
-
-        prompt_length = len(MASTER_PROMPT) + len(user_prompt)
-        print(f"[CLAUDE API] Starting agentic loop with {len(image_blocks)} images, prompt: {prompt_length} chars")
-        print(f"[CLAUDE API] Model: claude-opus-4-20250514, tools: {len(IMAGE_TOOLS)}")
-
-        start_time = time.time()
-        total_input_tokens = 0
-        total_output_tokens = 0
-        tool_calls = 0
-        max_iterations = 20  # Safety limit
-
-        text_content = ""
-
-        for iteration in range(max_iterations):
-            print(f"[CLAUDE API] Iteration {iteration + 1}")
-
-            # Call Claude with tools (using streaming for long operations)
-            with client.messages.stream(
-                model="claude-opus-4-20250514",
-                max_tokens=16384,
-                tools=IMAGE_TOOLS,
-                messages=messages,
-            ) as stream:
-                response = stream.get_final_message()
-
-            total_input_tokens += response.usage.input_tokens
-            total_output_tokens += response.usage.output_tokens
-
-            print(f"[CLAUDE API] Stop reason: {response.stop_reason}, blocks: {len(response.content)}")
-
-            # Check if Claude wants to use tools
-            if response.stop_reason == "tool_use":
-                # Process tool calls
-                tool_results = []
-
-                for block in response.content:
-                    if block.type == "tool_use":
-                        tool_calls += 1
-                        tool_name = block.name
-                        tool_input = block.input
-                        tool_id = block.id
-
-                        print(f"[TOOL] {tool_name}: {tool_input}")
-
-                        try:
-                            # Execute the tool
-                            if tool_name == "get_image_dimensions":
-                                # Return dimensions of first image (or all if multiple)
-                                result_parts = []
-                                for idx, img_data in enumerate(images_data):
-                                    info = get_image_info(img_data)
-                                    result_parts.append(f"Image {idx+1}: {info['width']}x{info['height']} pixels")
-                                result_text = "\n".join(result_parts)
-
-                                tool_results.append({
-                                    "type": "tool_result",
-                                    "tool_use_id": tool_id,
-                                    "content": result_text,
-                                })
-
-                            elif tool_name == "crop_region":
-                                region = tool_input.get("region", "full")
-                                # Use first image for cropping (most common case)
-                                img_data = images_data[0]
-                                crop_base64, crop_media_type = crop_region(img_data, region)
-
-                                print(f"[TOOL] Cropped region '{region}': {len(crop_base64) // 1024}KB")
-
-                                tool_results.append({
-                                    "type": "tool_result",
-                                    "tool_use_id": tool_id,
-                                    "content": [
-                                        {
-                                            "type": "image",
-                                            "source": {
-                                                "type": "base64",
-                                                "media_type": crop_media_type,
-                                                "data": crop_base64,
-                                            }
-                                        },
-                                        {
-                                            "type": "text",
-                                            "text": f"Cropped region: {region}"
-                                        }
-                                    ],
-                                })
-
-                            elif tool_name == "crop_image":
-                                x = tool_input.get("x", 0)
-                                y = tool_input.get("y", 0)
-                                width = tool_input.get("width", 100)
-                                height = tool_input.get("height", 100)
-
-                                # Use first image for cropping
-                                img_data = images_data[0]
-                                crop_base64, crop_media_type = crop_image(img_data, x, y, width, height)
-
-                                print(f"[TOOL] Cropped ({x},{y}) {width}x{height}: {len(crop_base64) // 1024}KB")
-
-                                tool_results.append({
-                                    "type": "tool_result",
-                                    "tool_use_id": tool_id,
-                                    "content": [
-                                        {
-                                            "type": "image",
-                                            "source": {
-                                                "type": "base64",
-                                                "media_type": crop_media_type,
-                                                "data": crop_base64,
-                                            }
-                                        },
-                                        {
-                                            "type": "text",
-                                            "text": f"Cropped area: x={x}, y={y}, width={width}, height={height}"
-                                        }
-                                    ],
-                                })
-
-                            else:
-                                tool_results.append({
-                                    "type": "tool_result",
-                                    "tool_use_id": tool_id,
-                                    "content": f"Unknown tool: {tool_name}",
-                                    "is_error": True,
-                                })
-
-                        except Exception as e:
-                            print(f"[TOOL ERROR] {tool_name}: {e}")
-                            tool_results.append({
-                                "type": "tool_result",
-                                "tool_use_id": tool_id,
-                                "content": f"Error executing {tool_name}: {str(e)}",
-                                "is_error": True,
-                            })
-
-                # Add assistant message with tool use, then tool results
-                messages.append({"role": "assistant", "content": response.content})
-                messages.append({"role": "user", "content": tool_results})
-
-            else:
-                # Claude is done - extract final text
-                for block in response.content:
-                    if block.type == "text":
-                        text_content = block.text
-                        break
-                break
-
-        elapsed = time.time() - start_time
-        print(f"[CLAUDE API] Completed in {elapsed:.1f}s, {tool_calls} tool calls")
-        print(f"[CLAUDE API] Tokens - input: {total_input_tokens}, output: {total_output_tokens}")
-        print(f"[CLAUDE API] HTML length: {len(text_content)} chars")
-
-        html_content = extract_html_content(text_content)
-        estimated_tokens = total_input_tokens + total_output_tokens
+        result = await generate_site_from_images(images_data, company_name, prompt)
+        await set_cached(key, {"html": result.html})
+        await record_ai_usage(
+            "generate-site-from-image", IMAGE_SITE_MODEL,
+            current_user.company_id, current_user.id, started,
+            input_tokens=result.input_tokens,
+            output_tokens=result.output_tokens,
+            cache_creation_input_tokens=result.cache_creation_input_tokens,
+            cache_read_input_tokens=result.cache_read_input_tokens,
+            iterations=result.iterations,
+            tool_calls=result.tool_calls,
+        )
 
         return GenerateFullSiteResponse(
-            html=html_content,
-            estimated_tokens=estimated_tokens,
+            html=result.html,
+            estimated_tokens=result.input_tokens + result.output_tokens,
         )
 
     except anthropic.APIError as e:
         import traceback
         traceback.print_exc()
+        await record_ai_usage(
+            "generate-site-from-image", IMAGE_SITE_MODEL,
+            current_user.company_id, current_user.id, started, success=False,
+        )
         raise HTTPException(
             status_code=500,
             detail=f"AI API error: {str(e)}"
@@ -897,12 +860,119 @@ Match colors, fonts, spacing, and layout pixel-perfect.{images_note}"""
     except Exception as e:
         import traceback
         traceback.print_exc()
+        await record_ai_usage(
+            "generate-site-from-image", IMAGE_SITE_MODEL,
+            current_user.company_id, current_user.id, started, success=False,
+        )
         raise HTTPException(
             status_code=500,
             detail=f"Unexpected error: {str(e)}"
         )
 
 
+# ============= BACKGROUND GENERATION JOBS =============
+
+
+class GenerationJobResponse(BaseModel):
+    """Background generation job status."""
+    id: int
+    kind: str
+    status: str
+    iteration: int
+    tool_calls: int
+    input_tokens: int
+    output_tokens: int
+    progress_message: Optional[str] = None
+    html: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+async def get_user_job(db, current_user, job_id: int) -> GenerationJob:
+    result = await db.execute(
+        select(GenerationJob).where(
+            GenerationJob.id == job_id,
+            GenerationJob.user_id == current_user.id,
+        )
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return job
+
+
+@router.post(
+    "/generation-jobs",
+    response_model=GenerationJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(require_ai_budget)],
+)
+async def submit_generation_job(
+    db: DbSession,
+    current_user: CurrentUser,
+    images: list[UploadFile] = File(...),
+    company_name: str = Form(...),
+    prompt: Optional[str] = Form(None),
+):
+    """Queue landing page generation from reference image(s).
+
+    Returns immediately with a job id. The generation worker runs the agent loop;
+    poll GET /generation-jobs/{id} or subscribe to /generation-jobs/{id}/events.
+    """
+    if not settings.ANTHROPIC_API_KEY:
+        raise HTTPException(
+            status_code=503,
+            detail="AI generation not configured. Please set ANTHROPIC_API_KEY."
+        )
+
+    if not images:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one image is required."
+        )
+
+    images_data = [(await image.read(), image.content_type) for image in images]
+    return await submit_site_job(
+        db,
+        user_id=current_user.id,
+        company_id=current_user.company_id,
+        company_name=company_name,
+        prompt=prompt,
+        images=images_data,
+    )
+
+
+@router.get("/generation-jobs/{job_id}", response_model=GenerationJobResponse)
+async def get_generation_job(
+    job_id: int,
+    db: DbSession,
+    current_user: CurrentUser,
+):
+    """Get generation job status (and HTML once completed)."""
+    return await get_user_job(db, current_user, job_id)
+
+
+@router.get("/generation-jobs/{job_id}/events")
+async def stream_generation_job_events(
+    job_id: int,
+    db: DbSession,
+    current_user: CurrentUser,
+):
+    """Server-Sent Events with job progress until the job finishes."""
+    await get_user_job(db, current_user, job_id)
+
+    return StreamingResponse(
+        job_events(job_id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 # ============= IMPROVE EXISTING SITE =============
 
 
@@ -911,6 +981,7 @@ class ImproveSiteRequest(BaseModel):
     company_name: str
     current_html: str
     corrections: str
+    force: bool = False  # Skip the result cache
 
 
 IMPROVE_PROMPT = """You are an expert web developer. Apply the user's corrections to the HTML.
@@ -927,18 +998,8 @@ No explanations, no markdown code blocks.
 Start with <!DOCTYPE html> and end with </html>."""
 
 
-@router.post("/improve-site", response_model=GenerateFullSiteResponse)
-async def improve_site(
-    request: ImproveSiteRequest,
-    current_user: CurrentUser,
-):
-    """Improve an existing landing page based on user corrections."""
-    if not settings.ANTHROPIC_API_KEY:
-        raise HTTPException(
-            status_code=503,
-            detail="AI generation not configured. Please set ANTHROPIC_API_KEY."
-        )
-
+def build_improve_site_messages(request: ImproveSiteRequest) -> list[dict]:
+    """Messages for applying corrections to an existing page."""
     user_prompt = f"""Company: {request.company_name}
 
 CURRENT HTML:
@@ -951,25 +1012,46 @@ CORRECTIONS TO APPLY:
 
 Please apply these corrections to the HTML and return the updated version."""
 
-    try:
-        import anthropic
+    return [
+        {
+            "role": "user",
+            "content": IMPROVE_PROMPT + "\n\n" + user_prompt,
+        }
+    ]
+
+
+@router.post(
+    "/improve-site",
+    response_model=GenerateFullSiteResponse,
+    dependencies=[Depends(require_ai_budget)],
+)
+async def improve_site(
+    request: ImproveSiteRequest,
+    current_user: CurrentUser,
+):
+    """Improve an existing landing page based on user corrections."""
+    require_ai_configured()
 
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+    started = time.monotonic()
+    messages = build_improve_site_messages(request)
+    key = cache_key("improve-site", SITE_MODEL, messages)
+    cached = None if request.force else await get_cached(key)
+    if cached is not None:
+        await record_site_usage("improve-site", current_user, started, cached=True)
+        return GenerateFullSiteResponse(html=cached["html"], estimated_tokens=0)
 
-        message = client.messages.create(
-            model="claude-opus-4-20250514",
+    try:
+        message = await create_message(
+            model=SITE_MODEL,
             max_tokens=16384,
-            messages=[
-                {
-                    "role": "user",
-                    "content": IMPROVE_PROMPT + "\n\n" + user_prompt,
-                }
-            ],
+            messages=messages,
         )
 
         # Extract clean HTML
         html_content = extract_html_content(message.content[0].text)
         estimated_tokens = message.usage.input_tokens + message.usage.output_tokens
+        await set_cached(key, {"html": html_content})
+        await record_site_usage("improve-site", current_user, started, usage=message.usage)
 
         return GenerateFullSiteResponse(
             html=html_content,
@@ -977,7 +1059,23 @@ Please apply these corrections to the HTML and return the updated version."""
         )
 
     except anthropic.APIError as e:
+        await record_site_usage("improve-site", current_user, started, success=False)
         raise HTTPException(
             status_code=500,
             detail=f"AI API error: {str(e)}"
         )
+
+
+@router.post("/improve-site/stream", dependencies=[Depends(require_ai_budget)])
+async def improve_site_stream(
+    request: ImproveSiteRequest,
+    current_user: CurrentUser,
+):
+    """Same as /improve-site, but streams the HTML as Server-Sent Events."""
+    require_ai_configured()
+
+    return StreamingResponse(
+        stream_site_html(build_improve_site_messages(request), "improve-site", current_user, request.force),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
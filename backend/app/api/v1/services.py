@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
@@ -10,6 +10,8 @@ from app.schemas.service import (
     ServiceProductCreate, ServiceProductUpdate, ServiceProductResponse,
     ServiceCategoryCreate, ServiceCategoryUpdate, ServiceCategoryResponse, ServiceCategoryTreeResponse,
 )
+from app.services.content_version import get_content_version
+from app.utils.http_cache import PRIVATE_CACHE_CONTROL, make_etag, check_etag
 
 router = APIRouter(prefix="/services")
 
@@ -17,7 +19,10 @@ router = APIRouter(prefix="/services")
 # ===== Service CRUD =====
 
 @router.get("", response_model=list[ServiceResponse])
-async def get_services(current_user: CurrentUser, db: DbSession):
+async def get_services(request: Request, response: Response, current_user: CurrentUser, db: DbSession):
+    version = await get_content_version(db, current_user.company_id, cached=False)
+    check_etag(request, response, make_etag("services", current_user.company_id, version), PRIVATE_CACHE_CONTROL)
+
     result = await db.execute(
         select(Service)
         .options(selectinload(Service.category), selectinload(Service.specialty))
@@ -501,9 +506,17 @@ async def delete_category(category_id: int, current_user: CurrentUser, db: DbSes
 
 # ===== AI Service Generation =====
 
+import time
+
+import anthropic
+from fastapi import Depends
 from pydantic import BaseModel
 from typing import Optional
+from app.api.deps import require_ai_budget
 from app.core.config import settings
+from app.services.ai_cache import cache_key, get_cached, set_cached
+from app.services.ai_client import create_message
+from app.services.ai_usage import record_ai_usage
 
 
 class GeneratedService(BaseModel):
@@ -522,6 +535,7 @@ class GenerateServicesRequest(BaseModel):
     content: str  # Text content, URL, or base64 PDF
     city: str = "Київ"
     additional_instructions: Optional[str] = None
+    force: bool = False  # Skip the result cache
 
 
 class GenerateServicesResponse(BaseModel):
@@ -531,6 +545,8 @@ class GenerateServicesResponse(BaseModel):
     estimated_tokens: int
 
 
+SERVICES_MODEL = "claude-sonnet-4-20250514"
+
 SERVICES_GENERATION_PROMPT = """Ти експерт з бьюті-індустрії та косметології в Україні. Твоє завдання - створити список послуг для спеціаліста.
 
 ПРАВИЛА:
@@ -558,7 +574,11 @@ SERVICES_GENERATION_PROMPT = """Ти експерт з бьюті-індустр
 Створи 10-20 найбільш популярних послуг."""
 
 
-@router.post("/generate-from-ai", response_model=GenerateServicesResponse)
+@router.post(
+    "/generate-from-ai",
+    response_model=GenerateServicesResponse,
+    dependencies=[Depends(require_ai_budget)],
+)
 async def generate_services_from_ai(
     request: GenerateServicesRequest,
     current_user: CurrentUser,
@@ -588,16 +608,26 @@ async def generate_services_from_ai(
 
 Створи список послуг у форматі JSON."""
 
+    started = time.monotonic()
+    system_prompt = SERVICES_GENERATION_PROMPT.format(city=request.city)
+    key = cache_key("generate-services", SERVICES_MODEL, system_prompt, user_prompt)
+    cached = None if request.force else await get_cached(key)
+    if cached is not None:
+        await record_ai_usage(
+            "generate-services", SERVICES_MODEL,
+            current_user.company_id, current_user.id, started, cached=True,
+        )
+        return GenerateServicesResponse(
+            services=[GeneratedService(**s) for s in cached["services"]],
+            categories=cached["categories"],
+            estimated_tokens=0,
+        )
+
     try:
-        import anthropic
         import json
 
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-
-        system_prompt = SERVICES_GENERATION_PROMPT.format(city=request.city)
-
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
+        message = await create_message(
+            model=SERVICES_MODEL,
             max_tokens=4096,
             system=system_prompt,
             messages=[
@@ -608,6 +638,11 @@ async def generate_services_from_ai(
             ],
         )
 
+        await record_ai_usage(
+            "generate-services", SERVICES_MODEL,
+            current_user.company_id, current_user.id, started, usage=message.usage,
+        )
+
         # Parse the JSON response
         response_text = message.content[0].text
 
@@ -635,6 +670,10 @@ async def generate_services_from_ai(
         services = [GeneratedService(**s) for s in data.get("services", [])]
         categories = data.get("categories", [])
         estimated_tokens = message.usage.input_tokens + message.usage.output_tokens
+        await set_cached(key, {
+            "services": [s.model_dump() for s in services],
+            "categories": categories,
+        })
 
         return GenerateServicesResponse(
             services=services,
@@ -643,6 +682,10 @@ async def generate_services_from_ai(
         )
 
     except anthropic.APIError as e:
+        await record_ai_usage(
+            "generate-services", SERVICES_MODEL,
+            current_user.company_id, current_user.id, started, success=False,
+        )
         raise HTTPException(
             status_code=500,
             detail=f"AI API error: {str(e)}"
@@ -3,11 +3,11 @@ Superadmin API - endpoints for platform management.
 Only accessible by users with is_superadmin=True.
 """
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Literal, Optional
 
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy import select, func, and_, case
+from sqlalchemy import select, func, and_, case, literal_column
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import DbSession, SuperadminUser
@@ -16,11 +16,15 @@ from app.models.user import User
 from app.models.company_member import CompanyMember
 from app.models.client import Client, ClientCompany
 from app.models.appointment import Appointment, AppointmentStatus
+from app.models.notification_outbox import NotificationOutbox, NotificationStatus
+from app.models.ai_usage import AIUsage
 from app.models.subscription import (
     Subscription, Payment,
     SubscriptionPlan, SubscriptionStatus,
     PaymentStatus, PaymentMethod
 )
+from app.services.ai_usage import get_monthly_budget, get_monthly_usage, month_start
+from bots.outbox import queue_depth
 
 router = APIRouter(prefix="/superadmin")
 
@@ -39,6 +43,34 @@ class PlatformStats(BaseModel):
     total_revenue: int  # in kopecks
 
 
+class NotificationQueueStats(BaseModel):
+    pending: int  # waiting to be sent
+    due: int  # pending and ready to be sent now
+    failed: int  # gave up after retries
+
+
+class AIUsageRollup(BaseModel):
+    period: datetime  # start of the day/month
+    company_id: Optional[int] = None
+    company_name: Optional[str] = None
+    calls: int
+    cached_calls: int  # served from the result cache
+    failed_calls: int
+    input_tokens: int  # including cache writes and reads
+    output_tokens: int
+    cache_read_input_tokens: int
+    tool_calls: int
+    avg_duration_ms: int  # calls that reached the model
+    max_duration_ms: int
+
+
+class AIBudgetStatus(BaseModel):
+    company_id: int
+    period_start: datetime
+    budget: int  # tokens per month
+    used: int
+
+
 class CompanyListItem(BaseModel):
     id: int
     name: str
@@ -259,6 +291,98 @@ async def get_platform_stats(
     )
 
 
+@router.get("/notifications/queue", response_model=NotificationQueueStats)
+async def get_notification_queue(
+    db: DbSession,
+    _: SuperadminUser,
+):
+    """Telegram notification outbox depth."""
+    depth = await queue_depth(db)
+    failed = await db.scalar(
+        select(func.count(NotificationOutbox.id))
+        .where(NotificationOutbox.status == NotificationStatus.FAILED.value)
+    )
+    return NotificationQueueStats(**depth, failed=failed or 0)
+
+
+@router.get("/ai-usage", response_model=list[AIUsageRollup])
+async def get_ai_usage(
+    db: DbSession,
+    _: SuperadminUser,
+    granularity: Literal["day", "month"] = "day",
+    days: int = 30,
+    company_id: Optional[int] = None,
+):
+    """AI usage per company and day/month, most recent periods first."""
+    # Inlined, a bound parameter would differ between SELECT and GROUP BY
+    period = func.date_trunc(literal_column(f"'{granularity}'"), AIUsage.created_at).label("period")
+    model_calls = AIUsage.cached.is_(False)
+
+    query = (
+        select(
+            period,
+            AIUsage.company_id,
+            Company.name,
+            func.count(AIUsage.id),
+            func.count(AIUsage.id).filter(AIUsage.cached.is_(True)),
+            func.count(AIUsage.id).filter(AIUsage.success.is_(False)),
+            func.coalesce(func.sum(AIUsage.input_tokens), 0),
+            func.coalesce(func.sum(AIUsage.output_tokens), 0),
+            func.coalesce(func.sum(AIUsage.cache_read_input_tokens), 0),
+            func.coalesce(func.sum(AIUsage.tool_calls), 0),
+            func.coalesce(func.avg(AIUsage.duration_ms).filter(model_calls), 0),
+            func.coalesce(func.max(AIUsage.duration_ms), 0),
+        )
+        .outerjoin(Company, Company.id == AIUsage.company_id)
+        .where(AIUsage.created_at >= datetime.utcnow() - timedelta(days=days))
+        .group_by(period, AIUsage.company_id, Company.name)
+        .order_by(period.desc(), func.sum(AIUsage.input_tokens + AIUsage.output_tokens).desc())
+    )
+    if company_id:
+        query = query.where(AIUsage.company_id == company_id)
+
+    result = await db.execute(query)
+    return [
+        AIUsageRollup(
+            period=row[0],
+            company_id=row[1],
+            company_name=row[2],
+            calls=row[3],
+            cached_calls=row[4],
+            failed_calls=row[5],
+            input_tokens=row[6],
+            output_tokens=row[7],
+            cache_read_input_tokens=row[8],
+            tool_calls=row[9],
+            avg_duration_ms=int(row[10]),
+            max_duration_ms=row[11],
+        )
+        for row in result.all()
+    ]
+
+
+@router.get("/companies/{company_id}/ai-budget", response_model=AIBudgetStatus)
+async def get_company_ai_budget(
+    company_id: int,
+    db: DbSession,
+    _: SuperadminUser,
+):
+    """Monthly AI token budget of a company and how much of it is used."""
+    company = await db.get(Company, company_id)
+    if not company:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Company not found",
+        )
+
+    return AIBudgetStatus(
+        company_id=company_id,
+        period_start=month_start(),
+        budget=await get_monthly_budget(db, company_id),
+        used=await get_monthly_usage(db, company_id),
+    )
+
+
 @router.get("/companies", response_model=list[CompanyListItem])
 async def list_companies(
     db: DbSession,
@@ -1,110 +1,168 @@
+import asyncio
+import hashlib
 import os
 import uuid
 from pathlib import Path
-from typing import Literal
+from typing import BinaryIO, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, status, Form
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, UploadFile, File, status, Form
+from fastapi.responses import RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import CurrentUser, DbSession
 from app.core.config import settings
 from app.models.protocol_file import ProtocolFile
 from app.schemas.protocol_file import ProtocolFileUploadResponse
+from app.services.image_variants import generate_variants, has_variants, resolve_variant_url, upload_path
+from app.services.upload_locks import lock_upload_file
 
 router = APIRouter(prefix="/uploads")
 
-# Allowed image extensions
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+# Allowed image types: (magic bytes at offset, mime type, extension)
+IMAGE_SIGNATURES = [
+    (0, b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (0, b"GIF87a", "image/gif", ".gif"),
+    (0, b"GIF89a", "image/gif", ".gif"),
+    (8, b"WEBP", "image/webp", ".webp"),  # After "RIFF" and the chunk size
+]
+SNIFF_BYTES = 16
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+CHUNK_SIZE = 256 * 1024
 
 # Upload directory
 UPLOAD_DIR = Path(settings.BASE_DIR) / "static" / "uploads"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def validate_image(file: UploadFile) -> None:
-    """Validate uploaded file is an allowed image type and size"""
-    # Check extension
-    ext = Path(file.filename).suffix.lower() if file.filename else ""
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}",
-        )
+def sniff_image_type(head: bytes) -> Optional[tuple[str, str]]:
+    """(mime type, extension) of an allowed image from its first bytes"""
+    for offset, magic, mime_type, ext in IMAGE_SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            if ext == ".webp" and not head.startswith(b"RIFF"):
+                continue
+            return mime_type, ext
+    return None
 
 
-def generate_unique_filename(original_filename: str, prefix: str) -> str:
-    """Generate unique filename preserving extension"""
-    ext = Path(original_filename).suffix.lower() if original_filename else ".jpg"
-    unique_id = uuid.uuid4().hex[:12]
-    return f"{prefix}_{unique_id}{ext}"
+def _write_chunk(out: BinaryIO, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
 
 
-async def save_upload(file: UploadFile, subdirectory: str, prefix: str) -> str:
-    """Save uploaded file and return URL path"""
-    validate_image(file)
+def _discard(out: BinaryIO, path: Path) -> None:
+    out.close()
+    path.unlink(missing_ok=True)
 
-    # Create subdirectory if needed
-    save_dir = UPLOAD_DIR / subdirectory
-    save_dir.mkdir(parents=True, exist_ok=True)
 
-    # Generate unique filename
-    filename = generate_unique_filename(file.filename or "image.jpg", prefix)
+async def write_upload(
+    file: UploadFile, save_dir: Path, db: Optional[AsyncSession] = None
+) -> tuple[str, int, str]:
+    """Stream an uploaded image to save_dir under its content hash.
+
+    Chunks are hashed and written in a thread, the upload is rejected as soon
+    as it is not an image or exceeds MAX_FILE_SIZE. Identical files are stored
+    once. Uploads that get a record which may be deleted later pass db: the
+    file lock is then held until the caller commits the record, so the file
+    can't be removed as unused in between. Returns (filename, size, mime_type).
+    """
+    save_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = save_dir / f".upload-{uuid.uuid4().hex}.tmp"
+    out = await asyncio.to_thread(open, tmp_path, "wb")
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+
+    try:
+        while chunk := await file.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"File too large. Maximum size is {MAX_FILE_SIZE // 1024 // 1024}MB",
+                )
+            if len(head) < SNIFF_BYTES:
+                head += chunk[:SNIFF_BYTES - len(head)]
+                if len(head) >= SNIFF_BYTES and not sniff_image_type(head):
+                    break  # Not an image - no need to read the rest
+            await asyncio.to_thread(_write_chunk, out, digest, chunk)
+
+        image_type = sniff_image_type(head)
+        if not image_type:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File type not allowed. Allowed types: JPEG, PNG, GIF, WebP",
+            )
+    except BaseException:
+        await asyncio.to_thread(_discard, out, tmp_path)
+        raise
+
+    await asyncio.to_thread(out.close)
+    mime_type, ext = image_type
+    filename = f"{digest.hexdigest()[:32]}{ext}"
     file_path = save_dir / filename
 
-    # Read and validate size
-    contents = await file.read()
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // 1024 // 1024}MB",
-        )
+    if db is not None:
+        await lock_upload_file(db, filename)
+    if file_path.exists():
+        # Same content was uploaded before
+        await asyncio.to_thread(tmp_path.unlink)
+    else:
+        await asyncio.to_thread(os.replace, tmp_path, file_path)
+
+    return filename, size, mime_type
+
 
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(contents)
+async def save_upload(file: UploadFile, subdirectory: str) -> str:
+    """Save uploaded image and return URL path"""
+    filename, _, _ = await write_upload(file, UPLOAD_DIR / subdirectory)
 
     # Return URL path (relative to static)
     return f"/static/uploads/{subdirectory}/{filename}"
 
 
 async def save_upload_with_info(
-    file: UploadFile, subdirectory: str, prefix: str
+    file: UploadFile, subdirectory: str, db: Optional[AsyncSession] = None
 ) -> tuple[str, str, int, str]:
-    """Save uploaded file and return (url, filename, size, mime_type)"""
-    validate_image(file)
-
-    # Create subdirectory if needed
-    save_dir = UPLOAD_DIR / subdirectory
-    save_dir.mkdir(parents=True, exist_ok=True)
-
-    # Generate unique filename
-    filename = generate_unique_filename(file.filename or "image.jpg", prefix)
-    file_path = save_dir / filename
-
-    # Read and validate size
-    contents = await file.read()
-    file_size = len(contents)
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // 1024 // 1024}MB",
-        )
-
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(contents)
-
-    # Get mime type
-    mime_type = file.content_type or "image/jpeg"
+    """Save uploaded image and return (url, filename, size, mime_type)"""
+    filename, file_size, mime_type = await write_upload(file, UPLOAD_DIR / subdirectory, db)
 
     # Return URL path and metadata
     url = f"/static/uploads/{subdirectory}/{filename}"
     return url, filename, file_size, mime_type
 
 
+@router.get("/variant")
+async def get_image_variant(
+    background_tasks: BackgroundTasks,
+    url: str,
+    w: int = Query(640, gt=0, le=4096),
+    image_format: str = Query("webp", alias="format", pattern="^(webp|jpeg)$"),
+):
+    """Redirect to the smallest variant of an uploaded image that fits the width.
+
+    Images without variants yet are redirected to the original and the
+    variants are generated in the background.
+    """
+    if upload_path(url) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not an uploaded image")
+
+    if not has_variants(url):
+        background_tasks.add_task(generate_variants, url)
+        return RedirectResponse(url, status_code=status.HTTP_302_FOUND)
+
+    # Variant names only change when new variants appear, clients may reuse the redirect for a while
+    return RedirectResponse(
+        resolve_variant_url(url, w, image_format),
+        status_code=status.HTTP_302_FOUND,
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
+
+
 @router.post("/logo")
 async def upload_logo(
     current_user: CurrentUser,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
 ):
     """Upload company logo image"""
@@ -114,13 +172,15 @@ async def upload_logo(
             detail="You don't have a company yet",
         )
 
-    url = await save_upload(file, "logos", f"logo_{current_user.company_id}")
+    url = await save_upload(file, "logos")
+    background_tasks.add_task(generate_variants, url)
     return {"url": url}
 
 
 @router.post("/cover")
 async def upload_cover(
     current_user: CurrentUser,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
 ):
     """Upload company cover image"""
@@ -130,7 +190,8 @@ async def upload_cover(
             detail="You don't have a company yet",
         )
 
-    url = await save_upload(file, "covers", f"cover_{current_user.company_id}")
+    url = await save_upload(file, "covers")
+    background_tasks.add_task(generate_variants, url)
     return {"url": url}
 
 
@@ -138,6 +199,7 @@ async def upload_cover(
 async def upload_protocol_photo(
     current_user: CurrentUser,
     db: DbSession,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     file_type: Literal["before", "after"] = Form(...),
 ):
@@ -152,12 +214,9 @@ async def upload_protocol_photo(
             detail="You don't have a company yet",
         )
 
-    # Save file to disk
-    url, filename, file_size, mime_type = await save_upload_with_info(
-        file,
-        "protocol-photos",
-        f"protocol_{current_user.company_id}_{file_type}"
-    )
+    # Save file to disk (the file lock is held until the record is committed)
+    url, filename, file_size, mime_type = await save_upload_with_info(file, "protocol-photos", db)
+    background_tasks.add_task(generate_variants, url)
 
     # Create database record
     protocol_file = ProtocolFile(
@@ -17,6 +17,8 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # Hashes with another cost are rehashed on login
+    PASSWORD_HASH_WORKERS: int = 2  # Threads per worker for bcrypt
 
     # Telegram Bots
     CLIENT_BOT_TOKEN: Optional[str] = None
@@ -31,6 +33,17 @@ class Settings(BaseSettings):
 
     # AI (Anthropic)
     ANTHROPIC_API_KEY: Optional[str] = None
+    AI_MAX_CONCURRENT_REQUESTS: int = 4  # Per worker
+    AI_REQUEST_TIMEOUT: float = 600.0  # Seconds
+    AI_MAX_RETRIES: int = 2
+    AI_CACHE_MAX_MB: int = 200  # Result cache size budget (per host), 0 disables it
+
+    # Background generation jobs
+    GENERATION_WORKER_CONCURRENCY: int = 2
+    GENERATION_WORKER_IN_PROCESS: bool = False  # Run the job worker inside API workers
+
+    # Image variants (thumbnails/WebP of uploads)
+    IMAGE_VARIANT_WORKERS: int = 2  # Processes per API worker
 
     # API
     API_URL: str = "http://localhost:8000"
@@ -0,0 +1,36 @@
+"""
+Shared Redis client.
+
+One client (with its connection pool) per process, created on first use.
+Returns None when REDIS_URL is not set, callers then fall back to Postgres
+or process memory.
+"""
+from typing import TYPE_CHECKING, Optional
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+_redis: Optional["Redis"] = None
+
+
+def get_redis() -> Optional["Redis"]:
+    """Get the process' Redis client, or None if Redis is not configured."""
+    global _redis
+    if not settings.REDIS_URL:
+        return None
+    if _redis is None:
+        # Imported here so the redis package is only needed when it is used
+        from redis.asyncio import Redis
+
+        _redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the client (on application shutdown)."""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
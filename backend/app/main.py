@@ -1,14 +1,39 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
+from app.core.redis import close_redis
+from app.services.ai_client import close_ai_client
+from app.services.image_variants import shutdown_image_pool
+from app.services.generation_jobs import run_worker
 from app.api.v1 import auth, services, schedule, appointments, clients, companies, public, uploads, client_portal, superadmin, specialties, website_sections, specialists, positions, section_templates, protocols, protocol_templates, inventory
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+    if settings.GENERATION_WORKER_IN_PROCESS:
+        tasks.append(asyncio.create_task(run_worker()))
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_ai_client()
+    await close_redis()
+    shutdown_image_pool()
+
+
 app = FastAPI(
     title="Procedure Booking API",
     description="API for booking cosmetic procedures",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
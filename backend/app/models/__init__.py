@@ -11,6 +11,10 @@ from app.models.website_section import WebsiteSection, SectionType
 from app.models.position import Position
 from app.models.section_template import SectionTemplate
 from app.models.landing_version import LandingVersion
+from app.models.generation_job import GenerationJob, GenerationJobStatus
+from app.models.ai_usage import AIUsage
+from app.models.notification_outbox import NotificationOutbox, NotificationStatus
+from app.models.slot_hold import SlotHold
 from app.models.procedure_protocol import ProcedureProtocol, ProtocolProduct
 from app.models.protocol_template import ProtocolTemplate
 from app.models.protocol_file import ProtocolFile
@@ -24,6 +28,7 @@ from app.models.inventory import (
     InventoryItem,
     InventoryItemAttribute,
     StockMovement,
+    StockBalance,
     ServiceInventoryItem,
     UsageType,
     MovementType,
@@ -50,6 +55,12 @@ __all__ = [
     "Position",
     "SectionTemplate",
     "LandingVersion",
+    "GenerationJob",
+    "GenerationJobStatus",
+    "AIUsage",
+    "NotificationOutbox",
+    "NotificationStatus",
+    "SlotHold",
     "ProcedureProtocol",
     "ProtocolProduct",
     "ProtocolTemplate",
@@ -64,6 +75,7 @@ __all__ = [
     "InventoryItem",
     "InventoryItemAttribute",
     "StockMovement",
+    "StockBalance",
     "ServiceInventoryItem",
     "UsageType",
     "MovementType",
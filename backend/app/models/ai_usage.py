@@ -0,0 +1,47 @@
+"""
+AI Usage model - ledger of AI calls per company.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, DateTime, ForeignKey, Integer, Boolean, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class AIUsage(Base):
+    """One AI generation call (or a result served from the AI cache).
+
+    input_tokens includes cache writes and reads, the cache_* columns break
+    them down. Written by app.services.ai_usage.record_ai_usage().
+    """
+    __tablename__ = "ai_usage"
+    __table_args__ = (
+        Index("ix_ai_usage_company_created", "company_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    company_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("companies.id", ondelete="SET NULL"), nullable=True
+    )
+    user_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+    endpoint: Mapped[str] = mapped_column(String(100))  # e.g. "generate-site", "generation-job"
+    model: Mapped[str] = mapped_column(String(100))
+
+    input_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    cache_creation_input_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    cache_read_input_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    iterations: Mapped[int] = mapped_column(Integer, default=1)
+    tool_calls: Mapped[int] = mapped_column(Integer, default=0)
+    duration_ms: Mapped[int] = mapped_column(Integer, default=0)  # Wall time
+    cached: Mapped[bool] = mapped_column(Boolean, default=False)  # Served from the result cache
+    success: Mapped[bool] = mapped_column(Boolean, default=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
@@ -1,8 +1,9 @@
 from datetime import datetime, date, time
 from enum import Enum
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
-from sqlalchemy import String, Text, DateTime, Date, Time, ForeignKey, func
+from sqlalchemy import String, Text, DateTime, Date, Time, ForeignKey, Computed, Index, text, func
+from sqlalchemy.dialects.postgresql import TSRANGE, ExcludeConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -29,8 +30,31 @@ class CancelledBy(str, Enum):
     DOCTOR = "doctor"
 
 
+# Active appointments of a doctor must not overlap (enforced by Postgres)
+APPOINTMENT_OVERLAP_CONSTRAINT = "appointments_doctor_no_overlap"
+
+
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        ExcludeConstraint(
+            ("doctor_id", "="),
+            ("time_range", "&&"),
+            name=APPOINTMENT_OVERLAP_CONSTRAINT,
+            using="gist",
+            where=text("status IN ('pending', 'confirmed')"),
+        ),
+        # Slot generation: a doctor's active appointments in a date range
+        Index(
+            "ix_appointments_doctor_date_active",
+            "doctor_id", "date",
+            postgresql_where=text("status IN ('pending', 'confirmed')"),
+        ),
+        # Calendar / list: a company's appointments by date
+        Index("ix_appointments_company_date", "company_id", "date", "start_time"),
+        # Client stats per company
+        Index("ix_appointments_client_company", "client_id", "company_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     company_id: Mapped[int] = mapped_column(ForeignKey("companies.id"))
@@ -46,6 +70,15 @@ class Appointment(Base):
     date: Mapped[date] = mapped_column(Date)
     start_time: Mapped[time] = mapped_column(Time)
     end_time: Mapped[time] = mapped_column(Time)
+    # [start, end) as timestamps; an end at or before the start means past midnight
+    time_range: Mapped[Any] = mapped_column(
+        TSRANGE,
+        Computed(
+            "tsrange(date + start_time, date + end_time"
+            " + CASE WHEN end_time <= start_time THEN interval '1 day' ELSE interval '0' END)",
+            persisted=True,
+        ),
+    )
     status: Mapped[AppointmentStatus] = mapped_column(
         String(20), default=AppointmentStatus.PENDING
     )
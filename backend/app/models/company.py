@@ -103,8 +103,14 @@ class Company(Base):
     payment_card_number: Mapped[str | None] = mapped_column(String(19), nullable=True)  # 16-19 digits with spaces
     payment_monobank_jar: Mapped[str | None] = mapped_column(String(200), nullable=True)  # Monobank jar link
 
-    # AI-generated landing page HTML (full page)
-    landing_html: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # AI-generated landing page HTML (full page). Deferred - pages are served
+    # from the precompressed files, use undefer() where the HTML is needed
+    landing_html: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True)
+    # Hash of landing_html, names the precompressed files (app/services/landing_assets.py)
+    landing_digest: Mapped[str | None] = mapped_column(String(16), nullable=True)
+
+    # Bumped on every write of the company's public/catalog content (ETags)
+    content_version: Mapped[int] = mapped_column(default=1, server_default="1")
 
     # Relationships
     services: Mapped[list["Service"]] = relationship(back_populates="company")
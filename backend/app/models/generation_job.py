@@ -0,0 +1,70 @@
+"""
+Generation Job model - background AI generation runs with progress.
+"""
+from datetime import datetime
+from enum import Enum
+from typing import Any, Optional
+
+from sqlalchemy import String, Text, DateTime, ForeignKey, Integer, JSON, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class GenerationJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class GenerationJobKind(str, Enum):
+    SITE_FROM_IMAGE = "site_from_image"
+
+
+class GenerationJob(Base):
+    """A queued AI generation.
+
+    Created by the API, picked up by the generation worker
+    (python -m app.services.generation_jobs), which writes progress,
+    token counts and the final HTML back to the row.
+    """
+    __tablename__ = "generation_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    company_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("companies.id", ondelete="CASCADE"), nullable=True
+    )
+    kind: Mapped[str] = mapped_column(String(50))
+    status: Mapped[str] = mapped_column(
+        String(20), default=GenerationJobStatus.PENDING.value, index=True
+    )
+
+    # Job input: {"company_name": ..., "prompt": ..., "images": [{"data": base64, "media_type": ...}]}
+    # Images are dropped once the job finishes
+    input_data: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+
+    # Progress
+    iteration: Mapped[int] = mapped_column(Integer, default=0)
+    tool_calls: Mapped[int] = mapped_column(Integer, default=0)
+    input_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    progress_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Times the job was claimed by a worker (shutdowns don't count)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    # Result
+    html: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -378,6 +378,27 @@ class StockMovement(Base):
     appointment: Mapped[Optional["Appointment"]] = relationship(back_populates="stock_movements")
 
 
+class StockBalance(Base):
+    """Поточний залишок товару.
+
+    Матеріалізована сума StockMovement.quantity по товару.
+    Оновлюється в тій самій транзакції, що й кожен рух (app.services.stock.add_movement),
+    та перебудовується з журналу рухів командою reconcile.
+    """
+    __tablename__ = "inventory_stock_balances"
+
+    item_id: Mapped[int] = mapped_column(
+        ForeignKey("inventory_items.id", ondelete="CASCADE"), primary_key=True
+    )
+    company_id: Mapped[int] = mapped_column(
+        ForeignKey("companies.id", ondelete="CASCADE"), index=True
+    )
+    quantity: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
 class ServiceInventoryItem(Base):
     """Зв'язок послуги з товарами для автосписання.
 
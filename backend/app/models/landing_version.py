@@ -1,11 +1,13 @@
 """
 Landing Version model - stores history of AI-generated landing pages.
 """
+import gzip
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional, List, Any
 
-from sqlalchemy import String, Text, DateTime, ForeignKey, Boolean, func, JSON
+from sqlalchemy import String, Text, DateTime, ForeignKey, Boolean, Integer, LargeBinary, func, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.types import TypeDecorator
 
 from app.core.database import Base
 
@@ -13,6 +15,22 @@ if TYPE_CHECKING:
     from app.models.company import Company
 
 
+class CompressedText(TypeDecorator):
+    """Text stored gzip-compressed in a bytea column."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return gzip.compress(value.encode("utf-8"), mtime=0)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return gzip.decompress(value).decode("utf-8")
+
+
 class LandingVersion(Base):
     """Stores versions of AI-generated landing pages for a company.
 
@@ -20,6 +38,9 @@ class LandingVersion(Base):
     - View history of all generations
     - Add notes/corrections to any version
     - Switch active version (which one is displayed on public site)
+
+    html and reference_images are deferred - listing versions only loads metadata.
+    Use undefer() when the content is needed.
     """
     __tablename__ = "landing_versions"
 
@@ -28,16 +49,18 @@ class LandingVersion(Base):
         ForeignKey("companies.id", ondelete="CASCADE"), index=True
     )
 
-    # Generated content
-    html: Mapped[str] = mapped_column(Text, nullable=False)
+    # Generated content (compressed, ~5-10x smaller)
+    html: Mapped[str] = mapped_column(CompressedText, nullable=False, deferred=True)
 
     # Generation context
     prompt: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     had_reference_image: Mapped[bool] = mapped_column(Boolean, default=False)
 
-    # Reference images used for generation (stored as base64 JSON array)
-    # Format: [{"data": "base64...", "media_type": "image/jpeg", "name": "ref1.jpg"}, ...]
-    reference_images: Mapped[Optional[List[Any]]] = mapped_column(JSON, nullable=True)
+    # Reference images used for generation, the files are in app/services/reference_images.py
+    # Format: [{"key": "<sha256>", "media_type": "image/jpeg", "name": "ref1.jpg"}, ...]
+    # (older versions: [{"data": "base64...", "media_type": ..., "name": ...}, ...])
+    reference_images: Mapped[Optional[List[Any]]] = mapped_column(JSON, nullable=True, deferred=True)
+    reference_image_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     # User notes/corrections for future improvements
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -56,4 +79,4 @@ class LandingVersion(Base):
     @property
     def has_reference_images(self) -> bool:
         """Check if this version has stored reference images."""
-        return bool(self.reference_images and len(self.reference_images) > 0)
+        return self.reference_image_count > 0
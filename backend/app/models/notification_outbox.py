@@ -0,0 +1,53 @@
+"""
+Notification Outbox model - Telegram messages waiting to be sent.
+"""
+from datetime import datetime
+from enum import Enum
+from typing import Any, Optional
+
+from sqlalchemy import String, Text, DateTime, Integer, BigInteger, JSON, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class NotificationStatus(str, Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class NotificationBot(str, Enum):
+    DOCTOR = "doctor"
+    CLIENT = "client"
+
+
+class NotificationOutbox(Base):
+    """A rendered Telegram message.
+
+    Written in the same transaction as the change it reports, sent later by
+    the dispatcher (python -m bots.outbox). A pending row is picked up once
+    next_attempt_at has passed.
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    bot: Mapped[str] = mapped_column(String(20))  # NotificationBot
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    text: Mapped[str] = mapped_column(Text)
+    reply_markup: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+
+    status: Mapped[str] = mapped_column(String(20), default=NotificationStatus.PENDING.value)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
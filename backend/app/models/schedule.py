@@ -2,7 +2,7 @@ from datetime import time, date, datetime
 from enum import Enum
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import ForeignKey, Integer, Time, Boolean, Date, String, DateTime, Text, func
+from sqlalchemy import ForeignKey, Integer, Time, Boolean, Date, String, DateTime, Text, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -34,6 +34,9 @@ class ScheduleExceptionType(str, Enum):
 
 class ScheduleException(Base):
     __tablename__ = "schedule_exceptions"
+    __table_args__ = (
+        Index("ix_schedule_exceptions_doctor_date", "doctor_id", "date"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     doctor_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
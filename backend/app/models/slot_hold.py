@@ -0,0 +1,29 @@
+"""
+Slot Hold model - a time slot reserved while the client finishes booking.
+"""
+from datetime import datetime, date, time
+
+from sqlalchemy import String, DateTime, Date, Time, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class SlotHold(Base):
+    """Temporary reservation of a doctor's time.
+
+    Used when Redis is not configured (see app/services/slot_holds.py).
+    Rows past expires_at are ignored and swept on the next hold.
+    """
+    __tablename__ = "slot_holds"
+    __table_args__ = (
+        Index("ix_slot_holds_doctor_date", "doctor_id", "date"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    doctor_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    date: Mapped[date] = mapped_column(Date)
+    start_time: Mapped[time] = mapped_column(Time)
+    end_time: Mapped[time] = mapped_column(Time)
+    holder: Mapped[str] = mapped_column(String(100), index=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
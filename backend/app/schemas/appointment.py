@@ -84,3 +84,13 @@ class AvailableSlot(BaseModel):
     date: date
     start_time: time
     end_time: time
+
+
+class SpecialistSlots(BaseModel):
+    """Available slots of one specialist for a service."""
+    member_id: int
+    user_id: int
+    first_name: str
+    last_name: Optional[str] = None
+    duration_minutes: int
+    slots: list[AvailableSlot]
@@ -118,8 +118,10 @@ class CompanyPublicResponse(BaseModel):
     specialization: str | None = None
     working_hours: str | None = None
     social_links: str | None = None
-    # AI-generated landing
+    # AI-generated landing: the HTML only when requested, otherwise served by
+    # /public/landings/{id}/{landing_digest}
     landing_html: str | None = None
+    landing_digest: str | None = None
 
     class Config:
         from_attributes = True
@@ -1,7 +1,9 @@
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
+
+from app.services.image_variants import THUMBNAIL_WIDTH, resolve_variant_url
 
 
 # === Attribute Schemas ===
@@ -414,6 +416,12 @@ class InventoryItemListResponse(BaseModel):
     max_variant_price: Optional[Decimal] = None
     variants: list[VariantListItem] = []  # Список варіантів для відображення
 
+    @computed_field
+    @property
+    def main_image_thumbnail_url(self) -> Optional[str]:
+        """Variant of the main image for the list, the original until variants exist."""
+        return resolve_variant_url(self.main_image_url, THUMBNAIL_WIDTH)
+
     class Config:
         from_attributes = True
 
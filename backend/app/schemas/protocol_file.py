@@ -3,7 +3,9 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
+
+from app.services.image_variants import THUMBNAIL_WIDTH, resolve_variant_url
 
 
 class FileType(str, Enum):
@@ -43,6 +45,12 @@ class ProtocolFileResponse(BaseModel):
     uploaded_by: Optional[int] = None
     created_at: datetime
 
+    @computed_field
+    @property
+    def thumbnail_url(self) -> str:
+        """Smallest variant that fits a list thumbnail, the original until variants exist."""
+        return resolve_variant_url(self.file_path, THUMBNAIL_WIDTH)
+
     class Config:
         from_attributes = True
 
@@ -56,6 +64,12 @@ class ProtocolFileUploadResponse(BaseModel):
     file_size: int
     show_in_portfolio: bool = False
 
+    @computed_field
+    @property
+    def thumbnail_url(self) -> str:
+        """Smallest variant that fits a list thumbnail, the original until variants exist."""
+        return resolve_variant_url(self.file_path, THUMBNAIL_WIDTH)
+
     class Config:
         from_attributes = True
 
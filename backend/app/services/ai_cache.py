@@ -0,0 +1,114 @@
+"""
+Result cache for AI generations.
+
+Results are stored as JSON files in media/ai_cache under a SHA-256 of
+everything that determines the output: endpoint, model and the full
+request (prompt text, image bytes, company fields). Changing a system
+prompt therefore changes the key as well.
+
+The directory is kept under settings.AI_CACHE_MAX_MB: reads touch the
+file's mtime and the least recently used files are removed after each
+write. Endpoints skip the lookup when the request has force=true (the new
+result replaces the cached one).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(settings.BASE_DIR) / "media" / "ai_cache"
+
+
+def _canonical(value: Any) -> Any:
+    """JSON-serializable form of a key part; bytes are replaced by their hash."""
+    if isinstance(value, (bytes, bytearray)):
+        return {"sha256": hashlib.sha256(value).hexdigest()}
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def cache_key(endpoint: str, model: str, *parts: Any) -> str:
+    """Key of a generation, e.g. cache_key("improve-site", model, messages)."""
+    payload = json.dumps(
+        [endpoint, model, _canonical(parts)],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_file(key: str) -> Path:
+    return CACHE_DIR / key[:2] / f"{key}.json"
+
+
+def _read(key: str) -> Optional[dict]:
+    path = _cache_file(key)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        os.utime(path)  # LRU: mark as recently used
+        return data
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning("Unreadable AI cache entry %s", key)
+        return None
+
+
+def _write(key: str, value: dict) -> None:
+    path = _cache_file(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(json.dumps(value, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+    _prune()
+
+
+def _prune() -> None:
+    """Remove the least recently used entries until the cache fits its budget."""
+    budget = settings.AI_CACHE_MAX_MB * 1024 * 1024
+    entries = []
+    total = 0
+    for path in CACHE_DIR.glob("*/*.json"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    if total <= budget:
+        return
+    for _, size, path in sorted(entries):
+        path.unlink(missing_ok=True)
+        total -= size
+        if total <= budget:
+            break
+
+
+async def get_cached(key: str) -> Optional[dict]:
+    """Cached result of a generation, or None."""
+    if settings.AI_CACHE_MAX_MB <= 0:
+        return None
+    return await asyncio.to_thread(_read, key)
+
+
+async def set_cached(key: str, value: dict) -> None:
+    """Store a generation result (failures are logged, never raised)."""
+    if settings.AI_CACHE_MAX_MB <= 0:
+        return
+    try:
+        await asyncio.to_thread(_write, key, value)
+    except OSError:
+        logger.exception("Failed to write AI cache entry %s", key)
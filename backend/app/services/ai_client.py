@@ -0,0 +1,94 @@
+"""
+Shared Anthropic client.
+
+One AsyncAnthropic client per worker process with a pooled HTTP transport,
+timeouts and retries. A per-worker semaphore caps concurrent AI calls so
+long generations never hold the event loop and cannot starve the worker's
+connection pool for other traffic.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import anthropic
+import httpx
+from anthropic.types import Message, Usage
+
+from app.core.config import settings
+
+_client: Optional[anthropic.AsyncAnthropic] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_ai_client() -> anthropic.AsyncAnthropic:
+    """Get the worker's shared AsyncAnthropic client (created on first use)."""
+    global _client
+    if _client is None:
+        _client = anthropic.AsyncAnthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            max_retries=settings.AI_MAX_RETRIES,
+            timeout=httpx.Timeout(settings.AI_REQUEST_TIMEOUT, connect=10.0),
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.AI_MAX_CONCURRENT_REQUESTS * 2,
+                    max_keepalive_connections=settings.AI_MAX_CONCURRENT_REQUESTS,
+                ),
+            ),
+        )
+    return _client
+
+
+@asynccontextmanager
+async def ai_slot():
+    """Wait for a free AI slot in this worker."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENT_REQUESTS)
+    async with _semaphore:
+        yield
+
+
+async def create_message(**kwargs) -> Message:
+    """messages.create through the shared client and concurrency limit."""
+    async with ai_slot():
+        return await get_ai_client().messages.create(**kwargs)
+
+
+@asynccontextmanager
+async def open_message_stream(**kwargs):
+    """messages.stream through the shared client and concurrency limit.
+
+    Yields the SDK stream: iterate stream.text_stream for text deltas,
+    then await stream.get_final_message() for usage.
+    """
+    async with ai_slot():
+        async with get_ai_client().messages.stream(**kwargs) as stream:
+            yield stream
+
+
+def stream_usage(stream) -> Optional[Usage]:
+    """Usage a stream has reported so far (None before the message started).
+
+    Input tokens arrive at the start, output tokens only with the last event.
+    """
+    try:
+        return stream.current_message_snapshot.usage
+    except (AssertionError, AttributeError):
+        return None
+
+
+async def stream_message(**kwargs) -> Message:
+    """messages.stream through the shared client, returning the final message.
+
+    Streaming keeps the connection alive for long generations.
+    """
+    async with open_message_stream(**kwargs) as stream:
+        return await stream.get_final_message()
+
+
+async def close_ai_client() -> None:
+    """Close the shared client (on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
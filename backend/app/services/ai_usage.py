@@ -0,0 +1,129 @@
+"""
+AI usage ledger and token budgets.
+
+Every AI call (and every result served from the AI cache) is written to
+ai_usage with its model, endpoint, tokens, iterations, tool calls and wall
+time. Rollups for the superadmin are aggregated from the ledger.
+
+Before a call starts, check_ai_budget() compares the company's tokens in
+the current calendar month (UTC) with the monthly budget of its
+subscription plan. Input tokens count together with cache writes and
+reads, the same way they are stored.
+"""
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_session_maker
+from app.models.ai_usage import AIUsage
+from app.models.subscription import Subscription, SubscriptionPlan
+
+logger = logging.getLogger(__name__)
+
+# Tokens (input + output) per calendar month
+MONTHLY_TOKEN_BUDGETS = {
+    SubscriptionPlan.INDIVIDUAL.value: 3_000_000,
+    SubscriptionPlan.COMPANY_SMALL.value: 8_000_000,
+    SubscriptionPlan.COMPANY_LARGE.value: 25_000_000,
+}
+# Companies without a subscription
+DEFAULT_TOKEN_BUDGET = MONTHLY_TOKEN_BUDGETS[SubscriptionPlan.INDIVIDUAL.value]
+
+
+class AIBudgetExceededError(Exception):
+    """The company used up its monthly AI token budget."""
+
+    def __init__(self, used: int, budget: int):
+        self.used = used
+        self.budget = budget
+        super().__init__(
+            f"Monthly AI token budget exceeded ({used:,} of {budget:,} tokens used)"
+        )
+
+
+def month_start(now: Optional[datetime] = None) -> datetime:
+    """Start of the current calendar month (UTC)."""
+    now = now or datetime.now(timezone.utc)
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+async def get_monthly_budget(db: AsyncSession, company_id: int) -> int:
+    """Token budget of the company's subscription plan."""
+    plan = await db.scalar(
+        select(Subscription.plan).where(Subscription.company_id == company_id)
+    )
+    if plan is None:
+        return DEFAULT_TOKEN_BUDGET
+    return MONTHLY_TOKEN_BUDGETS.get(str(getattr(plan, "value", plan)), DEFAULT_TOKEN_BUDGET)
+
+
+async def get_monthly_usage(db: AsyncSession, company_id: int) -> int:
+    """Tokens the company used this month."""
+    used = await db.scalar(
+        select(func.coalesce(func.sum(AIUsage.input_tokens + AIUsage.output_tokens), 0))
+        .where(
+            AIUsage.company_id == company_id,
+            AIUsage.created_at >= month_start(),
+        )
+    )
+    return used or 0
+
+
+async def check_ai_budget(db: AsyncSession, company_id: Optional[int]) -> None:
+    """Raise AIBudgetExceededError if the company has no tokens left this month."""
+    if company_id is None:
+        return
+    budget = await get_monthly_budget(db, company_id)
+    used = await get_monthly_usage(db, company_id)
+    if used >= budget:
+        raise AIBudgetExceededError(used, budget)
+
+
+def usage_counters(usage: Any) -> dict:
+    """Ledger columns from the usage of an API response."""
+    cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    return {
+        "input_tokens": usage.input_tokens + cache_creation + cache_read,
+        "output_tokens": usage.output_tokens,
+        "cache_creation_input_tokens": cache_creation,
+        "cache_read_input_tokens": cache_read,
+    }
+
+
+async def record_ai_usage(
+    endpoint: str,
+    model: str,
+    company_id: Optional[int],
+    user_id: Optional[int],
+    started: float,
+    usage: Any = None,
+    **counters,
+) -> None:
+    """Write a ledger row (in its own session, failures are logged, never raised).
+
+    Args:
+        started: time.monotonic() when the call started
+        usage: Usage of the API response, if there is one
+        counters: Other AIUsage columns (iterations, tool_calls, cached, success, tokens)
+    """
+    values = usage_counters(usage) if usage is not None else {}
+    values.update(counters)
+    values["duration_ms"] = int((time.monotonic() - started) * 1000)
+
+    try:
+        async with async_session_maker() as db:
+            db.add(AIUsage(
+                endpoint=endpoint,
+                model=model,
+                company_id=company_id,
+                user_id=user_id,
+                **values,
+            ))
+            await db.commit()
+    except Exception:
+        logger.exception("Failed to record AI usage of %s", endpoint)
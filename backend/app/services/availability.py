@@ -0,0 +1,269 @@
+"""
+Availability engine.
+
+Turns a doctor's weekly schedule, schedule exceptions (day off, modified
+hours, extra working days, breaks), existing bookings and slot holds into
+free intervals and bookable slots.
+
+Each doctor-day is represented as a NumPy minute mask (1440 booleans).
+Busy intervals are painted onto the mask with a difference array, the free
+intervals are read back as sorted (start, end) arrays, and slots are emitted
+per free interval with ``np.arange`` instead of checking every candidate
+against every appointment.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.schedule import Schedule, ScheduleException, ScheduleExceptionType
+from app.services.slot_holds import get_holds
+
+MINUTES_PER_DAY = 24 * 60
+SLOT_STEP_MINUTES = 30  # Slots start every 30 minutes from the start of the working day
+
+# Appointments in these statuses occupy the doctor's time
+ACTIVE_APPOINTMENT_STATUSES = [AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]
+
+
+@dataclass
+class DoctorAvailability:
+    """Everything needed to compute a doctor's slots for a date range."""
+    schedules: dict[int, Schedule]  # day_of_week -> Schedule
+    day_exceptions: dict[date, ScheduleException]  # day_off / modified / working
+    busy_by_date: dict[date, list[tuple[time, time]]]  # breaks, bookings and holds
+
+
+def to_minutes(value: time) -> int:
+    """Minutes since midnight."""
+    return value.hour * 60 + value.minute
+
+
+def from_minutes(minutes: int) -> time:
+    """Time of day for minutes since midnight (1440 wraps to 00:00)."""
+    minutes = int(minutes) % MINUTES_PER_DAY
+    return time(minutes // 60, minutes % 60)
+
+
+def build_availability(
+    schedules: Iterable[Schedule],
+    exceptions: Iterable[ScheduleException],
+    appointments: Iterable[Appointment],
+    holds: Iterable[tuple[date, time, time]] = (),
+) -> DoctorAvailability:
+    """Index one doctor's rows by weekday/date."""
+    day_exceptions = {}
+    busy_by_date = defaultdict(list)
+
+    for e in exceptions:
+        if e.type == ScheduleExceptionType.BREAK:
+            if e.start_time and e.end_time:
+                busy_by_date[e.date].append((e.start_time, e.end_time))
+        else:
+            day_exceptions[e.date] = e
+
+    for appt in appointments:
+        busy_by_date[appt.date].append((appt.start_time, appt.end_time))
+
+    for hold_date, start_time, end_time in holds:
+        busy_by_date[hold_date].append((start_time, end_time))
+
+    return DoctorAvailability(
+        schedules={s.day_of_week: s for s in schedules},
+        day_exceptions=day_exceptions,
+        busy_by_date=dict(busy_by_date),
+    )
+
+
+def working_hours(availability: DoctorAvailability, day: date) -> Optional[tuple[int, int]]:
+    """Working hours for a day in minutes, or None if the doctor is not working."""
+    day_exception = availability.day_exceptions.get(day)
+
+    if day_exception:
+        if day_exception.type == ScheduleExceptionType.DAY_OFF:
+            return None
+        # MODIFIED hours or WORKING on a normally non-working day
+        if day_exception.start_time and day_exception.end_time:
+            return to_minutes(day_exception.start_time), to_minutes(day_exception.end_time)
+        return None
+
+    schedule = availability.schedules.get(day.weekday())
+    if schedule and schedule.is_working_day:
+        return to_minutes(schedule.start_time), to_minutes(schedule.end_time)
+    return None
+
+
+def day_mask(
+    day_start: int,
+    day_end: int,
+    busy: list[tuple[time, time]],
+) -> np.ndarray:
+    """Minute mask of the day: True where the doctor is free."""
+    mask = np.zeros(MINUTES_PER_DAY, dtype=bool)
+    mask[day_start:day_end] = True
+
+    if busy:
+        starts = np.fromiter((to_minutes(s) for s, _ in busy), dtype=np.int32, count=len(busy))
+        ends = np.fromiter((to_minutes(e) for _, e in busy), dtype=np.int32, count=len(busy))
+        # An end before the start (00:00) means "until midnight"
+        ends = np.where(ends < starts, MINUTES_PER_DAY, ends)
+        # Zero-length intervals occupy no time
+        keep = ends > starts
+        starts, ends = starts[keep], ends[keep]
+
+        delta = np.zeros(MINUTES_PER_DAY + 1, dtype=np.int32)
+        np.add.at(delta, starts, 1)
+        np.add.at(delta, ends, -1)
+        mask &= np.cumsum(delta[:-1]) == 0
+
+    return mask
+
+
+def free_intervals(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sorted free intervals of a minute mask as (starts, ends) arrays, ends exclusive."""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def slot_starts(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    day_start: int,
+    duration: int,
+    step: int = SLOT_STEP_MINUTES,
+    not_before: int = 0,
+) -> np.ndarray:
+    """Start minutes of slots aligned to ``day_start + k * step`` that fit in a free interval."""
+    starts = np.maximum(starts, not_before)
+    # First aligned start inside each interval
+    first = day_start + -(-(starts - day_start) // step) * step
+    last = ends - duration
+
+    result = [np.arange(f, l + 1, step) for f, l in zip(first, last) if f <= l]
+    if not result:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(result)
+
+
+def compute_slots(
+    availability: DoctorAvailability,
+    duration_minutes: int,
+    date_from: date,
+    date_to: date,
+    now: Optional[datetime] = None,
+    step: int = SLOT_STEP_MINUTES,
+) -> list[tuple[date, time, time]]:
+    """Available (date, start_time, end_time) slots for a date range."""
+    now = now or datetime.now()
+    today = now.date()
+    slots = []
+
+    current_date = date_from
+    while current_date <= date_to:
+        hours = working_hours(availability, current_date)
+        if hours:
+            day_start, day_end = hours
+            mask = day_mask(day_start, day_end, availability.busy_by_date.get(current_date, []))
+            starts, ends = free_intervals(mask)
+
+            # Don't show past slots
+            not_before = to_minutes(now.time()) + 1 if current_date == today else 0
+
+            for start in slot_starts(starts, ends, day_start, duration_minutes, step, not_before):
+                slots.append((
+                    current_date,
+                    from_minutes(start),
+                    from_minutes(start + duration_minutes),
+                ))
+
+        current_date += timedelta(days=1)
+
+    return slots
+
+
+async def load_availability_many(
+    db: AsyncSession,
+    doctor_ids: list[int],
+    date_from: date,
+    date_to: date,
+    exclude_holder: Optional[str] = None,
+) -> dict[int, DoctorAvailability]:
+    """Load availability of several doctors with set-based queries.
+
+    Slot holds count as busy, except those of `exclude_holder`.
+    """
+    if not doctor_ids:
+        return {}
+
+    schedules_by_doctor = defaultdict(list)
+    exceptions_by_doctor = defaultdict(list)
+    appointments_by_doctor = defaultdict(list)
+
+    result = await db.execute(
+        select(Schedule).where(Schedule.doctor_id.in_(doctor_ids))
+    )
+    for s in result.scalars().all():
+        schedules_by_doctor[s.doctor_id].append(s)
+
+    result = await db.execute(
+        select(ScheduleException).where(
+            ScheduleException.doctor_id.in_(doctor_ids),
+            ScheduleException.date >= date_from,
+            ScheduleException.date <= date_to,
+        )
+    )
+    for e in result.scalars().all():
+        exceptions_by_doctor[e.doctor_id].append(e)
+
+    result = await db.execute(
+        select(Appointment).where(
+            Appointment.doctor_id.in_(doctor_ids),
+            Appointment.date >= date_from,
+            Appointment.date <= date_to,
+            Appointment.status.in_(ACTIVE_APPOINTMENT_STATUSES),
+        )
+    )
+    for appt in result.scalars().all():
+        appointments_by_doctor[appt.doctor_id].append(appt)
+
+    holds_by_doctor = await get_holds(db, doctor_ids, date_from, date_to, exclude_holder)
+
+    return {
+        doctor_id: build_availability(
+            schedules_by_doctor[doctor_id],
+            exceptions_by_doctor[doctor_id],
+            appointments_by_doctor[doctor_id],
+            holds_by_doctor[doctor_id],
+        )
+        for doctor_id in doctor_ids
+    }
+
+
+async def load_availability(
+    db: AsyncSession,
+    doctor_id: int,
+    date_from: date,
+    date_to: date,
+    exclude_holder: Optional[str] = None,
+) -> DoctorAvailability:
+    """Load schedule, exceptions, active bookings and holds of a doctor for a date range."""
+    availability = await load_availability_many(db, [doctor_id], date_from, date_to, exclude_holder)
+    return availability[doctor_id]
+
+
+async def get_doctor_slots(
+    db: AsyncSession,
+    doctor_id: int,
+    duration_minutes: int,
+    date_from: date,
+    date_to: date,
+    exclude_holder: Optional[str] = None,
+) -> list[tuple[date, time, time]]:
+    """Available slots of one doctor for a service duration and date range."""
+    availability = await load_availability(db, doctor_id, date_from, date_to, exclude_holder)
+    return compute_slots(availability, duration_minutes, date_from, date_to)
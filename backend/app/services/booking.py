@@ -0,0 +1,45 @@
+"""
+Booking writes.
+
+Overlapping active appointments of a doctor are rejected by the
+appointments_doctor_no_overlap exclusion constraint, so concurrent bookings
+of the same time cannot both succeed, whichever worker or bot they come
+from. Callers flush/commit through these helpers and turn SlotTakenError
+into a 409 or a message to the user.
+"""
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.appointment import APPOINTMENT_OVERLAP_CONSTRAINT
+
+EXCLUSION_VIOLATION = "23P01"
+
+
+class SlotTakenError(Exception):
+    """The appointment overlaps another active appointment of the doctor."""
+
+
+def is_slot_conflict(error: IntegrityError) -> bool:
+    orig = error.orig
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return sqlstate == EXCLUSION_VIOLATION or APPOINTMENT_OVERLAP_CONSTRAINT in str(orig)
+
+
+async def flush_booking(db: AsyncSession) -> None:
+    """Flush pending appointment changes, raising SlotTakenError on overlap.
+
+    The session is rolled back on overlap.
+    """
+    try:
+        await db.flush()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_slot_conflict(e):
+            raise SlotTakenError() from e
+        raise
+
+
+async def commit_booking(db: AsyncSession) -> None:
+    """Commit pending appointment changes, raising SlotTakenError on overlap."""
+    await flush_booking(db)
+    await db.commit()
@@ -0,0 +1,151 @@
+"""
+Per-company content versions.
+
+companies.content_version is bumped in the same transaction as any write of
+the company's public or catalog content (services, categories, website
+sections, landing versions, inventory categories...). Endpoints derive weak
+ETags from it, so unchanged responses are answered with 304.
+
+Versions are cached in process memory for VERSION_TTL seconds, so
+conditional requests normally don't query Postgres. After commit the
+writing process drops its cached versions right away, other API workers
+pick up the new version when the TTL runs out. Authenticated endpoints
+read the version uncached (cached=False): a user who just saved content
+through one worker must not get a 304 with the old copy from another.
+"""
+import time
+from typing import Optional
+
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.inventory import (
+    AttributeGroup,
+    Attribute,
+    CategoryAttributeGroup,
+    InventoryCategory,
+    InventoryItem,
+)
+from app.models.landing_version import LandingVersion
+from app.models.service import Service, ServiceCategory
+from app.models.specialty import Specialty
+from app.models.website_section import WebsiteSection
+from app.services import public_cache
+
+VERSION_TTL = 5  # Seconds
+
+# Models with a company_id column
+CONTENT_MODELS = (
+    Service,
+    ServiceCategory,
+    Specialty,
+    WebsiteSection,
+    LandingVersion,
+    InventoryCategory,
+    InventoryItem,
+    AttributeGroup,
+)
+
+# Models without company_id: model -> (parent model, foreign key attribute)
+CONTENT_CHILD_MODELS = {
+    Attribute: (AttributeGroup, "group_id"),
+    CategoryAttributeGroup: (InventoryCategory, "category_id"),
+}
+
+# company_id -> (expires_at, version)
+_versions: dict[int, tuple[float, int]] = {}
+# slug -> (expires_at, company_id, version)
+_versions_by_slug: dict[str, tuple[float, int, int]] = {}
+
+
+async def get_content_version(db: AsyncSession, company_id: int, cached: bool = True) -> int:
+    """Current content version of a company, up to VERSION_TTL old unless cached=False."""
+    entry = _versions.get(company_id)
+    if cached and entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+
+    result = await db.execute(
+        select(Company.content_version).where(Company.id == company_id)
+    )
+    version = result.scalar_one_or_none() or 0
+    _versions[company_id] = (time.monotonic() + VERSION_TTL, version)
+    return version
+
+
+async def get_content_version_by_slug(db: AsyncSession, slug: str) -> Optional[tuple[int, int]]:
+    """(company_id, content version) of a company, or None if there is no such company."""
+    entry = _versions_by_slug.get(slug)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1], entry[2]
+
+    result = await db.execute(
+        select(Company.id, Company.content_version).where(Company.slug == slug)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+
+    company_id, version = row
+    _versions_by_slug[slug] = (time.monotonic() + VERSION_TTL, company_id, version)
+    return company_id, version
+
+
+def _drop_cached(company_ids: set[int]) -> None:
+    for company_id in company_ids:
+        _versions.pop(company_id, None)
+    for slug, (_, company_id, _) in list(_versions_by_slug.items()):
+        if company_id in company_ids:
+            del _versions_by_slug[slug]
+
+
+def _changed_company_ids(session: Session) -> set[int]:
+    company_ids = set()
+    lookups: dict[type, set[int]] = {}
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Company):
+            company_ids.add(obj.id)
+        elif isinstance(obj, CONTENT_MODELS):
+            company_ids.add(obj.company_id)
+        elif type(obj) in CONTENT_CHILD_MODELS:
+            parent, key = CONTENT_CHILD_MODELS[type(obj)]
+            lookups.setdefault(parent, set()).add(getattr(obj, key))
+
+    connection = session.connection()
+    for parent, ids in lookups.items():
+        result = connection.execute(
+            select(parent.company_id).where(parent.id.in_(ids))
+        )
+        company_ids.update(result.scalars().all())
+
+    company_ids.discard(None)
+    return company_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_versions(session: Session, flush_context) -> None:
+    company_ids = _changed_company_ids(session)
+    if not company_ids:
+        return
+
+    session.connection().execute(
+        update(Company)
+        .where(Company.id.in_(company_ids))
+        .values(content_version=Company.content_version + 1)
+    )
+    session.info.setdefault("changed_company_ids", set()).update(company_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    company_ids = session.info.pop("changed_company_ids", None)
+    if company_ids:
+        _drop_cached(company_ids)
+        public_cache.invalidate_after_commit(company_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop("changed_company_ids", None)
@@ -0,0 +1,281 @@
+"""
+Background AI generation jobs.
+
+The API stores a job row (generation_jobs) and returns its id. A worker
+claims pending jobs with SELECT ... FOR UPDATE SKIP LOCKED, runs the agent
+loop and writes progress, token counts and the final HTML back to the row.
+Postgres is the only queue, no external broker is needed.
+
+Workers requeue running jobs without progress for STALE_JOB_AFTER (their
+worker died) every REQUEUE_INTERVAL. A job whose worker died MAX_ATTEMPTS
+times is failed instead of being requeued again.
+
+Run a worker process:
+    python -m app.services.generation_jobs
+
+Or set GENERATION_WORKER_IN_PROCESS=true to run it inside each API worker.
+"""
+import asyncio
+import base64
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.models.generation_job import GenerationJob, GenerationJobKind, GenerationJobStatus
+from app.services.ai_usage import record_ai_usage
+from app.services.site_generation import SITE_MODEL, GenerationProgress, generate_site_from_images
+from app.utils.sse import format_sse, SSE_KEEPALIVE
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 2.0  # Seconds between queue polls when idle
+EVENT_POLL_INTERVAL = 1.0  # Seconds between job status checks for SSE
+EVENT_KEEPALIVE_EVERY = 15  # Polls without changes before sending a keep-alive comment
+STALE_JOB_AFTER = timedelta(minutes=30)  # Running jobs without progress are requeued
+REQUEUE_INTERVAL = 60.0  # Seconds between stale job checks
+MAX_ATTEMPTS = 3  # Claims before a stale job is failed instead of requeued
+
+FINISHED_STATUSES = (GenerationJobStatus.COMPLETED.value, GenerationJobStatus.FAILED.value)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def submit_site_job(
+    db: AsyncSession,
+    user_id: int,
+    company_id: Optional[int],
+    company_name: str,
+    prompt: Optional[str],
+    images: list[tuple[bytes, Optional[str]]],
+) -> GenerationJob:
+    """Queue site generation from reference images."""
+    job = GenerationJob(
+        user_id=user_id,
+        company_id=company_id,
+        kind=GenerationJobKind.SITE_FROM_IMAGE.value,
+        status=GenerationJobStatus.PENDING.value,
+        input_data={
+            "company_name": company_name,
+            "prompt": prompt,
+            "images": [
+                {
+                    "data": base64.standard_b64encode(data).decode("utf-8"),
+                    "media_type": media_type,
+                }
+                for data, media_type in images
+            ],
+        },
+        progress_message="Queued",
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def claim_next_job() -> Optional[int]:
+    """Mark the oldest pending job as running and return its id."""
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(GenerationJob)
+            .where(GenerationJob.status == GenerationJobStatus.PENDING.value)
+            .order_by(GenerationJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalar_one_or_none()
+        if not job:
+            return None
+
+        job.status = GenerationJobStatus.RUNNING.value
+        job.attempts += 1
+        job.started_at = utcnow()
+        job.progress_message = "Started"
+        await db.commit()
+        return job.id
+
+
+async def requeue_stale_jobs() -> None:
+    """Return running jobs without recent progress (crashed worker) to the queue.
+
+    Jobs that already used MAX_ATTEMPTS are failed.
+    """
+    stale = (
+        GenerationJob.status == GenerationJobStatus.RUNNING.value,
+        GenerationJob.updated_at < utcnow() - STALE_JOB_AFTER,
+    )
+    async with async_session_maker() as db:
+        failed = await db.execute(
+            update(GenerationJob)
+            .where(*stale, GenerationJob.attempts >= MAX_ATTEMPTS)
+            .values(
+                status=GenerationJobStatus.FAILED.value,
+                error=f"The worker stopped responding {MAX_ATTEMPTS} times",
+                progress_message="Failed",
+                input_data=None,
+                finished_at=utcnow(),
+            )
+            .returning(GenerationJob.id)
+        )
+        failed_ids = failed.scalars().all()
+        requeued = await db.execute(
+            update(GenerationJob)
+            .where(*stale)
+            .values(status=GenerationJobStatus.PENDING.value, progress_message="Requeued")
+            .returning(GenerationJob.id)
+        )
+        requeued_ids = requeued.scalars().all()
+        await db.commit()
+
+    if failed_ids:
+        logger.warning("Failed stale generation jobs %s", failed_ids)
+    if requeued_ids:
+        logger.warning("Requeued stale generation jobs %s", requeued_ids)
+
+
+async def run_job(job_id: int) -> None:
+    """Run one claimed job to completion."""
+    async with async_session_maker() as db:
+        job = await db.get(GenerationJob, job_id)
+        data = job.input_data or {}
+        images = [
+            (base64.b64decode(img["data"]), img.get("media_type"))
+            for img in data.get("images", [])
+        ]
+
+        async def on_progress(progress: GenerationProgress) -> None:
+            job.iteration = progress.iteration
+            job.tool_calls = progress.tool_calls
+            job.input_tokens = progress.input_tokens
+            job.output_tokens = progress.output_tokens
+            job.progress_message = progress.message
+            await db.commit()
+
+        started = time.monotonic()
+        cache_tokens = {}
+        try:
+            result = await generate_site_from_images(
+                images, data.get("company_name", ""), data.get("prompt"), on_progress
+            )
+            job.status = GenerationJobStatus.COMPLETED.value
+            job.html = result.html
+            job.iteration = result.iterations
+            job.tool_calls = result.tool_calls
+            job.input_tokens = result.input_tokens
+            job.output_tokens = result.output_tokens
+            job.progress_message = "Completed"
+            cache_tokens = {
+                "cache_creation_input_tokens": result.cache_creation_input_tokens,
+                "cache_read_input_tokens": result.cache_read_input_tokens,
+            }
+        except asyncio.CancelledError:
+            # Worker is shutting down - let another worker pick it up
+            job.status = GenerationJobStatus.PENDING.value
+            job.attempts -= 1
+            job.progress_message = "Requeued"
+            await db.commit()
+            raise
+        except Exception as e:
+            logger.exception("Generation job %s failed", job_id)
+            job.status = GenerationJobStatus.FAILED.value
+            job.error = str(e)
+            job.progress_message = "Failed"
+
+        # Failed jobs are recorded with the tokens of their last iteration
+        await record_ai_usage(
+            f"generation-job:{job.kind}", SITE_MODEL, job.company_id, job.user_id, started,
+            input_tokens=job.input_tokens,
+            output_tokens=job.output_tokens,
+            iterations=job.iteration,
+            tool_calls=job.tool_calls,
+            success=job.status == GenerationJobStatus.COMPLETED.value,
+            **cache_tokens,
+        )
+
+        # Reference images are no longer needed
+        job.input_data = {"company_name": data.get("company_name"), "prompt": data.get("prompt")}
+        job.finished_at = utcnow()
+        await db.commit()
+
+
+async def run_worker(concurrency: Optional[int] = None) -> None:
+    """Poll the queue forever, running up to `concurrency` jobs at once."""
+    concurrency = concurrency or settings.GENERATION_WORKER_CONCURRENCY
+    running: set[asyncio.Task] = set()
+
+    logger.info("Generation worker started (concurrency=%s)", concurrency)
+    next_requeue = 0.0
+
+    try:
+        while True:
+            if time.monotonic() >= next_requeue:
+                await requeue_stale_jobs()
+                next_requeue = time.monotonic() + REQUEUE_INTERVAL
+
+            while len(running) < concurrency:
+                job_id = await claim_next_job()
+                if job_id is None:
+                    break
+                logger.info("Running generation job %s", job_id)
+                task = asyncio.create_task(run_job(job_id))
+                running.add(task)
+                task.add_done_callback(running.discard)
+
+            await asyncio.sleep(POLL_INTERVAL)
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def job_events(job_id: int) -> AsyncIterator[str]:
+    """Server-Sent Events with job progress, until the job finishes."""
+    last_state = None
+    idle_polls = 0
+
+    while True:
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(
+                    GenerationJob.status,
+                    GenerationJob.iteration,
+                    GenerationJob.tool_calls,
+                    GenerationJob.input_tokens,
+                    GenerationJob.output_tokens,
+                    GenerationJob.progress_message,
+                    GenerationJob.error,
+                ).where(GenerationJob.id == job_id)
+            )
+            row = result.one_or_none()
+
+        if row is None:
+            return
+
+        state = dict(row._mapping)
+        if state != last_state:
+            yield format_sse({"id": job_id, **state})
+            last_state = state
+            idle_polls = 0
+        else:
+            idle_polls += 1
+            if idle_polls >= EVENT_KEEPALIVE_EVERY:
+                yield SSE_KEEPALIVE
+                idle_polls = 0
+
+        if state["status"] in FINISHED_STATUSES:
+            return
+
+        await asyncio.sleep(EVENT_POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())
@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.models.user import User
+from app.services.principal_cache import load_attributes
 
 # Google OAuth URLs
 GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
@@ -92,6 +93,7 @@ async def ensure_valid_token(user: User, db: AsyncSession) -> Optional[str]:
     Refreshes if expired.
     Returns access token or None if not connected.
     """
+    await load_attributes(db, user)  # Tokens are not part of cached principals
     if not user.google_refresh_token:
         return None
 
@@ -0,0 +1,186 @@
+"""
+Derived image variants.
+
+For an uploaded image (static/uploads/<dir>/<hash>.<ext>) downscaled WebP
+and JPEG copies are written to static/uploads/<dir>/variants/ as
+<hash>_<width>.<ext> for every width bucket below the original width, plus
+<hash>_full.<ext> at the original size. Variants carry no EXIF (the
+orientation is applied to the pixels), and the EXIF of the original is
+stripped too - protocol photos often have GPS data.
+
+Animations are served as is: instead of variants an empty
+<hash>_passthrough marker is written, so they are not processed again.
+
+Variants are generated in a process pool after the upload response is sent
+(and on first request of an image that has none). resolve_variant_url()
+maps an image URL to the smallest variant that fits a width, falling back
+to the original. API responses add it for list thumbnails (THUMBNAIL_WIDTH).
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (160, 320, 640, 1280)
+VARIANTS_DIRNAME = "variants"
+PASSTHROUGH_MARKER = "passthrough"  # Images served as is have no variants
+THUMBNAIL_WIDTH = 640  # Card and grid images, sharp on 2x screens
+
+UPLOADS_URL = "/static/uploads/"
+UPLOADS_DIR = (Path(settings.BASE_DIR) / "static" / "uploads").resolve()
+
+# format -> (extension, Pillow save options)
+VARIANT_FORMATS = {
+    "webp": (".webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": (".jpg", {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}),
+}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending: set[Path] = set()
+
+
+def upload_path(url: Optional[str]) -> Optional[Path]:
+    """File of an uploaded image URL, None for other URLs."""
+    if not url or not url.startswith(UPLOADS_URL):
+        return None
+    path = (UPLOADS_DIR / url[len(UPLOADS_URL):]).resolve()
+    if not path.is_relative_to(UPLOADS_DIR) or path.parent.name == VARIANTS_DIRNAME:
+        return None
+    return path
+
+
+def _variant_file(path: Path, label: str, image_format: str) -> Path:
+    ext, _ = VARIANT_FORMATS[image_format]
+    return path.parent / VARIANTS_DIRNAME / f"{path.stem}_{label}{ext}"
+
+
+def _passthrough_file(path: Path) -> Path:
+    return path.parent / VARIANTS_DIRNAME / f"{path.stem}_{PASSTHROUGH_MARKER}"
+
+
+def _save_atomic(img: Image.Image, target: Path, **options) -> None:
+    tmp_path = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+    img.save(tmp_path, **options)
+    os.replace(tmp_path, target)
+
+
+def _save_variant(img: Image.Image, path: Path, label: str) -> None:
+    for image_format, (_, options) in VARIANT_FORMATS.items():
+        variant = img
+        if image_format == "jpeg" and img.mode != "RGB":
+            # No alpha in JPEG - flatten onto white
+            variant = Image.new("RGB", img.size, (255, 255, 255))
+            variant.paste(img, mask=img.getchannel("A") if img.mode == "RGBA" else None)
+        _save_atomic(variant, _variant_file(path, label, image_format), **options)
+
+
+def derive_variants(path_str: str) -> int:
+    """Write the variants of an image and strip its EXIF. Runs in a worker process.
+
+    Returns the number of sizes written (0 for animations, which are served as is).
+    """
+    path = Path(path_str)
+    (path.parent / VARIANTS_DIRNAME).mkdir(exist_ok=True)
+
+    with Image.open(path) as original:
+        if getattr(original, "is_animated", False):
+            _passthrough_file(path).touch()
+            return 0
+        original_format = original.format
+        has_exif = "exif" in original.info
+        img = ImageOps.exif_transpose(original)
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+
+    sizes = 0
+    for width in VARIANT_WIDTHS:
+        if width >= img.width:
+            break
+        height = max(1, round(img.height * width / img.width))
+        _save_variant(img.resize((width, height), Image.LANCZOS), path, str(width))
+        sizes += 1
+    _save_variant(img, path, "full")
+
+    if has_exif:
+        options = {"format": original_format}
+        if original_format == "JPEG":
+            options["quality"] = 95
+            img = img.convert("RGB")
+        _save_atomic(img, path, **options)
+
+    return sizes + 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: workers must not inherit the event loop and connections of the API worker
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def generate_variants(url: str) -> None:
+    """Generate the variants of an uploaded image in the process pool."""
+    path = upload_path(url)
+    if path is None or path in _pending or not path.exists():
+        return
+
+    _pending.add(path)
+    try:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_get_pool(), derive_variants, str(path))
+    except Exception:
+        logger.exception("Failed to generate variants of %s", url)
+    finally:
+        _pending.discard(path)
+
+
+def resolve_variant_url(url: Optional[str], width: int, image_format: str = "webp") -> Optional[str]:
+    """URL of the smallest variant at least `width` wide, or the URL itself if there is none."""
+    path = upload_path(url)
+    if path is None:
+        return url
+
+    labels = [str(w) for w in VARIANT_WIDTHS if w >= width] + ["full"]
+    for label in labels:
+        variant = _variant_file(path, label, image_format)
+        if variant.exists():
+            return url.rsplit("/", 1)[0] + f"/{VARIANTS_DIRNAME}/{variant.name}"
+    return url
+
+
+def has_variants(url: Optional[str]) -> bool:
+    """Whether the image was processed (variants written, or marked to be served as is)."""
+    path = upload_path(url)
+    return path is not None and (
+        _variant_file(path, "full", "webp").exists() or _passthrough_file(path).exists()
+    )
+
+
+def remove_variants(url: Optional[str]) -> None:
+    """Delete the variants of an uploaded image."""
+    path = upload_path(url)
+    if path is None:
+        return
+    for variant in (path.parent / VARIANTS_DIRNAME).glob(f"{path.stem}_*"):
+        variant.unlink(missing_ok=True)
+
+
+def shutdown_image_pool() -> None:
+    """Stop the worker processes (on application shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
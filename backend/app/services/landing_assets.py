@@ -0,0 +1,123 @@
+"""
+Precompressed landing pages.
+
+The active landing HTML of a company is published to
+static/landings/{company_id}/{digest}.html together with .gz and .br
+variants, so the public landing endpoints only pick a file by
+Accept-Encoding instead of compressing 50-200 KB on every request.
+The digest (companies.landing_digest) is a hash of the HTML, which makes
+the hashed URL immutable.
+
+Brotli needs the optional `brotli` package, without it only gzip and
+identity are served.
+"""
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+LANDING_DIR = Path(settings.BASE_DIR) / "static" / "landings"
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def landing_digest(html: str) -> str:
+    """Digest of the landing HTML (same as the backfill in migration 045)."""
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()[:16]
+
+
+def landing_file(company_id: int, digest: str, encoding: Optional[str] = None) -> Path:
+    suffix = ENCODING_SUFFIXES.get(encoding, "") if encoding else ""
+    return LANDING_DIR / str(company_id) / f"{digest}.html{suffix}"
+
+
+def available_encodings() -> list[str]:
+    return [encoding for encoding in ENCODING_SUFFIXES if encoding != "br" or brotli is not None]
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best available encoding accepted by the client, None for identity."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def write_landing_files(company_id: int, html: str) -> str:
+    """Write the HTML and its compressed variants, remove older pages. Returns the digest."""
+    digest = landing_digest(html)
+    directory = LANDING_DIR / str(company_id)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    data = html.encode("utf-8")
+    variants = {None: data, "gzip": gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=BROTLI_QUALITY)
+
+    for encoding, body in variants.items():
+        _write_atomic(landing_file(company_id, digest, encoding), body)
+
+    # Pages of previous versions are not linked anymore
+    for path in directory.iterdir():
+        if not path.name.startswith(f"{digest}.html") and not path.name.endswith(".tmp"):
+            path.unlink(missing_ok=True)
+
+    return digest
+
+
+async def publish_landing(company_id: int, html: Optional[str]) -> None:
+    """Publish the company's active landing (compression runs in a thread)."""
+    if html is None:
+        return
+    try:
+        await asyncio.to_thread(write_landing_files, company_id, html)
+    except OSError:
+        # Served pages are written again on the first request
+        logger.exception("Failed to publish landing of company %s", company_id)
+
+
+async def remove_landing(company_id: int) -> None:
+    """Remove the published pages (the company has no active landing anymore)."""
+    await asyncio.to_thread(shutil.rmtree, LANDING_DIR / str(company_id), True)
+
+
+async def ensure_landing_files(company_id: int, digest: str, html: str) -> None:
+    """Write the files if they are missing (new volume, failed publish)."""
+    if not landing_file(company_id, digest).exists():
+        await asyncio.to_thread(write_landing_files, company_id, html)
@@ -0,0 +1,268 @@
+"""
+Cache of authenticated principals.
+
+get_current_user needs the user row and its company memberships on every
+authenticated request. Their column values are cached per user id in
+process memory (LOCAL_TTL) and in Redis (REDIS_TTL) when REDIS_URL is
+set, and turned back into session-bound User/CompanyMember instances with
+Session.merge(load=False), which issues no SQL - handlers can still modify
+and commit current_user as before.
+
+Entries are dropped after commit of any session that wrote a User or
+CompanyMember row (is_active, memberships, profile...). Other API workers
+drop their in-memory copy when LOCAL_TTL runs out. The invalidation also
+increments the user's version in Redis; snapshots are stored with the
+version read before the user was loaded and only served while it is
+current, so a load racing a change in another worker can't bring back the
+old row.
+
+Secrets (EXCLUDED_COLUMNS) are never cached - Redis is shared. Restored
+principals carry all other columns and company_memberships only; a
+handler that reads a secret or another relationship of current_user loads
+it first with load_attributes(), anything else would be a lazy load, which
+the async session can't do. Queries that return the same user fill in the
+missing columns as well.
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+from sqlalchemy import Date, DateTime, Numeric, event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, selectinload
+
+from app.core.redis import get_redis
+from app.models.company_member import CompanyMember
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TTL = 15  # Seconds
+LOCAL_MAX_ENTRIES = 5000
+REDIS_TTL = 300  # Seconds
+
+EXCLUDED_COLUMNS = {
+    User: {"hashed_password", "google_access_token", "google_refresh_token"},
+}
+
+# user_id -> (expires_at, snapshot)
+_local: dict[int, tuple[float, dict]] = {}
+# Number of invalidations in this process, a load only caches if none happened meanwhile
+_generation = 0
+_invalidation_tasks: set[asyncio.Task] = set()
+
+
+def _key(user_id: int) -> str:
+    return f"principal:{user_id}"
+
+
+def _version_key(user_id: int) -> str:
+    return f"principal_ver:{user_id}"
+
+
+def _columns(model: type) -> dict[str, Any]:
+    """Attribute name -> column type of the cached columns."""
+    excluded = EXCLUDED_COLUMNS.get(model, set())
+    return {
+        attr.key: attr.columns[0].type
+        for attr in inspect(model).column_attrs
+        if attr.key not in excluded
+    }
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode(column_type: Any, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column_type, Date):
+        return date.fromisoformat(value)
+    if isinstance(column_type, Numeric) and column_type.asdecimal:
+        return Decimal(value)
+    return value
+
+
+def _row(obj: Any) -> dict:
+    return {key: _encode(getattr(obj, key)) for key in _columns(type(obj))}
+
+
+def _snapshot(user: User) -> dict:
+    return {
+        "user": _row(user),
+        "memberships": [_row(m) for m in user.company_memberships],
+    }
+
+
+def _build(model: type, row: dict) -> Any:
+    columns = _columns(model)
+    return model(**{key: _decode(columns[key], value) for key, value in row.items() if key in columns})
+
+
+async def _restore(db: AsyncSession, snapshot: dict) -> User:
+    """Session-bound User with memberships, without querying."""
+    user = _build(User, snapshot["user"])
+    memberships = [_build(CompanyMember, row) for row in snapshot["memberships"]]
+    user.company_memberships = memberships
+    for member in memberships:
+        make_transient_to_detached(member)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+def _store_local(user_id: int, snapshot: dict) -> None:
+    if len(_local) >= LOCAL_MAX_ENTRIES:
+        now = time.monotonic()
+        for key, (expires_at, _) in list(_local.items()):
+            if expires_at <= now:
+                del _local[key]
+        if len(_local) >= LOCAL_MAX_ENTRIES:
+            _local.clear()
+    _local[user_id] = (time.monotonic() + LOCAL_TTL, snapshot)
+
+
+async def _get_snapshot(user_id: int) -> tuple[Optional[dict], Optional[int]]:
+    """(cached snapshot or None, current Redis version or None without Redis)."""
+    entry = _local.get(user_id)
+    if entry is not None:
+        if entry[0] > time.monotonic():
+            return entry[1], None
+        del _local[user_id]
+
+    redis = get_redis()
+    if redis is None:
+        return None, None
+    try:
+        value, current = await redis.mget(_key(user_id), _version_key(user_id))
+    except Exception:
+        logger.warning("Principal cache read failed", exc_info=True)
+        return None, None
+    version = int(current or 0)
+    if value is None:
+        return None, version
+
+    stored_version, data = value.split("|", 1)
+    if int(stored_version) != version:
+        # Written by a load that raced an invalidation
+        return None, version
+
+    snapshot = json.loads(data)
+    _store_local(user_id, snapshot)
+    return snapshot, version
+
+
+async def _set_snapshot(user_id: int, snapshot: dict, version: Optional[int]) -> None:
+    _store_local(user_id, snapshot)
+
+    redis = get_redis()
+    if redis is None or version is None:
+        return
+    try:
+        await redis.set(_key(user_id), f"{version}|{json.dumps(snapshot)}", ex=REDIS_TTL)
+    except Exception:
+        logger.warning("Principal cache write failed", exc_info=True)
+
+
+async def load_principal(db: AsyncSession, user_id: int) -> Optional[User]:
+    """User with company_memberships loaded, from the cache when possible."""
+    snapshot, version = await _get_snapshot(user_id)
+    if snapshot is not None:
+        return await _restore(db, snapshot)
+
+    generation = _generation
+    result = await db.execute(
+        select(User)
+        .where(User.id == user_id)
+        .options(selectinload(User.company_memberships))
+    )
+    user = result.scalar_one_or_none()
+
+    # Skip caching if the user was changed while we were loading it
+    if user is not None and _generation == generation:
+        await _set_snapshot(user_id, _snapshot(user), version)
+    return user
+
+
+async def load_attributes(db: AsyncSession, user: User, *names: str) -> User:
+    """Load attributes a cached principal doesn't carry, before reading them.
+
+    Without names, the excluded columns (secrets). Attributes that are
+    already loaded are not queried again.
+    """
+    names = set(names or EXCLUDED_COLUMNS[User])
+    unloaded = names & inspect(user).unloaded
+    if unloaded:
+        await db.refresh(user, attribute_names=sorted(unloaded))
+    return user
+
+
+async def invalidate_principals(user_ids: set[int]) -> None:
+    """Drop cached principals of the users."""
+    _drop_local(user_ids)
+
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        pipe = redis.pipeline(transaction=True)
+        for user_id in user_ids:
+            pipe.incr(_version_key(user_id))
+        pipe.delete(*(_key(user_id) for user_id in user_ids))
+        await pipe.execute()
+    except Exception:
+        logger.warning("Principal cache invalidation failed", exc_info=True)
+
+
+def _drop_local(user_ids: set[int]) -> None:
+    global _generation
+    _generation += 1
+    for user_id in user_ids:
+        _local.pop(user_id, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    user_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            user_ids.add(obj.id)
+        elif isinstance(obj, CompanyMember):
+            user_ids.add(obj.user_id)
+
+    user_ids.discard(None)
+    if user_ids:
+        session.info.setdefault("changed_user_ids", set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    user_ids = session.info.pop("changed_user_ids", None)
+    if not user_ids:
+        return
+
+    # Runs on the event loop: local entries go right away, Redis ones in a task
+    _drop_local(user_ids)
+    if get_redis() is None:
+        return
+    try:
+        task = asyncio.get_running_loop().create_task(invalidate_principals(user_ids))
+    except RuntimeError:
+        return
+    _invalidation_tasks.add(task)
+    task.add_done_callback(_invalidation_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop("changed_user_ids", None)
@@ -0,0 +1,132 @@
+"""
+Cache of the public showcase data.
+
+The bootstrap payload of a company (company, services, categories and
+website sections, serialized to JSON) is cached per slug in process memory
+(LRU with a short TTL) and in Redis when REDIS_URL is set, so the public
+pages almost never query Postgres.
+
+Entries are stored with the content version they were built at and only
+served for that version, so a payload always matches the ETag it is sent
+with, and a stale payload written back after an invalidation (by a slower
+request or another worker) is never served for the newer version. Entries
+are also dropped after commit of any session that wrote content of the
+company (see app.services.content_version).
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TTL = 30  # Seconds an entry is served from process memory
+LOCAL_MAX_ENTRIES = 1000
+REDIS_TTL = 600  # Seconds
+
+# slug -> (expires_at, company_id, version, payload)
+_local: OrderedDict[str, tuple[float, int, int, str]] = OrderedDict()
+_invalidation_tasks: set[asyncio.Task] = set()
+
+
+def _payload_key(slug: str) -> str:
+    return f"public_bootstrap:{slug}"
+
+
+def _slug_key(company_id: int) -> str:
+    return f"public_bootstrap:company:{company_id}"
+
+
+async def get_bootstrap(slug: str, version: int) -> Optional[str]:
+    """Cached bootstrap JSON of a company at the content version, or None."""
+    entry = _local.get(slug)
+    if entry is not None:
+        expires_at, _, cached_version, payload = entry
+        if expires_at > time.monotonic() and cached_version == version:
+            _local.move_to_end(slug)
+            return payload
+        del _local[slug]
+
+    redis = get_redis()
+    if redis is None:
+        return None
+
+    try:
+        value = await redis.get(_payload_key(slug))
+    except Exception:
+        logger.warning("Public cache read failed", exc_info=True)
+        return None
+    if value is None:
+        return None
+
+    company_id, cached_version, payload = value.split("|", 2)
+    if int(cached_version) != version:
+        return None
+    _store_local(slug, int(company_id), version, payload)
+    return payload
+
+
+async def set_bootstrap(slug: str, company_id: int, version: int, payload: str) -> None:
+    """Cache the bootstrap JSON of a company built at the content version."""
+    _store_local(slug, company_id, version, payload)
+
+    redis = get_redis()
+    if redis is None:
+        return
+
+    try:
+        pipe = redis.pipeline(transaction=False)
+        pipe.set(_payload_key(slug), f"{company_id}|{version}|{payload}", ex=REDIS_TTL)
+        pipe.set(_slug_key(company_id), slug, ex=REDIS_TTL)
+        await pipe.execute()
+    except Exception:
+        logger.warning("Public cache write failed", exc_info=True)
+
+
+def _store_local(slug: str, company_id: int, version: int, payload: str) -> None:
+    _local[slug] = (time.monotonic() + LOCAL_TTL, company_id, version, payload)
+    _local.move_to_end(slug)
+    while len(_local) > LOCAL_MAX_ENTRIES:
+        _local.popitem(last=False)
+
+
+def _drop_local(company_ids: set[int]) -> None:
+    for slug, (_, company_id, _, _) in list(_local.items()):
+        if company_id in company_ids:
+            del _local[slug]
+
+
+async def invalidate_companies(company_ids: set[int]) -> None:
+    """Drop cached entries of the companies."""
+    _drop_local(company_ids)
+
+    redis = get_redis()
+    if redis is None:
+        return
+
+    try:
+        slug_keys = [_slug_key(company_id) for company_id in company_ids]
+        slugs = await redis.mget(slug_keys)
+        await redis.delete(*slug_keys, *(_payload_key(slug) for slug in slugs if slug))
+    except Exception:
+        logger.warning("Public cache invalidation failed", exc_info=True)
+
+
+def invalidate_after_commit(company_ids: set[int]) -> None:
+    """Drop entries of companies whose content was just committed.
+
+    Called from the commit hook in app.services.content_version, which runs
+    on the event loop: local entries go right away, Redis ones in a task.
+    """
+    _drop_local(company_ids)
+    if get_redis() is None:
+        return
+    try:
+        task = asyncio.get_running_loop().create_task(invalidate_companies(company_ids))
+    except RuntimeError:
+        return
+    _invalidation_tasks.add(task)
+    task.add_done_callback(_invalidation_tasks.discard)
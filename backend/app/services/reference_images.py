@@ -0,0 +1,84 @@
+"""
+Reference images of landing versions.
+
+Images are stored once in media/reference_images under the SHA-256 of
+their bytes; landing_versions.reference_images only keeps
+{"key", "media_type", "name"} per image, so versions generated from the
+same references share the files and the JSON stays small.
+
+Older versions still have the base64 data inline ({"data": ...}), those
+entries are returned as they are.
+"""
+import asyncio
+import base64
+import hashlib
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+REFERENCE_DIR = Path(settings.BASE_DIR) / "media" / "reference_images"
+
+
+def _image_file(key: str) -> Path:
+    return REFERENCE_DIR / key[:2] / key
+
+
+def _decode(data: str) -> tuple[bytes, Optional[str]]:
+    """Image bytes and media type from a data URL or raw base64."""
+    media_type = None
+    if data.startswith("data:"):
+        header, _, data = data.partition(",")
+        media_type = header[5:].split(";")[0] or None
+    return base64.b64decode(data), media_type
+
+
+def _store(content: bytes) -> str:
+    key = hashlib.sha256(content).hexdigest()
+    path = _image_file(key)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(content)
+        tmp_path.replace(path)
+    return key
+
+
+async def store_reference_images(images: list[dict]) -> list[dict]:
+    """Write images ({"data", "media_type", "name"}) to the store, return their references."""
+    stored = []
+    for image in images:
+        content, data_media_type = _decode(image["data"])
+        key = await asyncio.to_thread(_store, content)
+        stored.append({
+            "key": key,
+            "media_type": image.get("media_type") or data_media_type,
+            "name": image.get("name"),
+        })
+    return stored
+
+
+async def load_reference_images(references: Optional[list[dict]]) -> Optional[list[dict]]:
+    """Images with their data as data URLs (missing files are skipped)."""
+    if not references:
+        return references
+
+    images = []
+    for reference in references:
+        if "key" not in reference:
+            images.append(reference)  # Stored inline
+            continue
+
+        path = _image_file(reference["key"])
+        try:
+            content = await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            continue
+        media_type = reference.get("media_type") or "image/jpeg"
+        images.append({
+            "data": f"data:{media_type};base64,{base64.b64encode(content).decode('ascii')}",
+            "media_type": reference.get("media_type"),
+            "name": reference.get("name"),
+        })
+    return images
@@ -0,0 +1,495 @@
+"""
+Landing page generation from reference images.
+
+Runs the tool_use agent loop used by the site builder:
+1. Claude receives the reference image(s) + image tools
+2. Claude calls crop_image/crop_region to examine details
+3. We execute the crops and return the results (all tool calls of a turn
+   run concurrently in threads, on images decoded once per request)
+4. Claude continues until it returns the final HTML
+
+Used both inline by the /generate-site-from-image endpoint and by the
+background generation job worker.
+
+Input tokens: the model gets previews of the references downscaled to the
+resolution it works at (crops come from the full-size originals), the
+master prompt and the references are behind prompt cache breakpoints, and
+crop images of older turns are dropped from the history - their text
+descriptions stay.
+"""
+import asyncio
+import base64
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from app.prompts import MASTER_PROMPT
+from app.services.ai_client import stream_message
+from app.utils.image_tools import IMAGE_TOOLS, DecodedImage
+
+SITE_MODEL = "claude-opus-4-20250514"
+MAX_ITERATIONS = 20  # Safety limit
+
+# Once more than CROP_TURNS_LIMIT tool result turns carry crop images, the images of
+# all but the last CROP_TURNS_KEPT are dropped. Batching keeps the cached history
+# prefix valid for the iterations in between.
+CROP_TURNS_LIMIT = 5
+CROP_TURNS_KEPT = 2
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+SUPPORTED_MEDIA_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp"]
+
+
+@dataclass
+class GenerationProgress:
+    """Progress of the agent loop, reported after every iteration."""
+    iteration: int
+    tool_calls: int
+    input_tokens: int
+    output_tokens: int
+    message: str
+
+
+@dataclass
+class SiteGenerationResult:
+    html: str
+    iterations: int
+    tool_calls: int
+    input_tokens: int  # Including cache writes and reads
+    output_tokens: int
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+
+ProgressCallback = Callable[[GenerationProgress], Awaitable[None]]
+
+
+def extract_html_content(text: str) -> str:
+    """Extract only the HTML content from AI response, removing any explanations."""
+    # Remove markdown code blocks
+    if "```html" in text:
+        text = text.split("```html", 1)[1]
+    if "```" in text:
+        text = text.split("```")[0]
+
+    # Find DOCTYPE and </html>
+    text_lower = text.lower()
+    doctype_idx = text_lower.find("<!doctype")
+    html_end_idx = text_lower.rfind("</html>")
+
+    if doctype_idx >= 0 and html_end_idx > doctype_idx:
+        return text[doctype_idx:html_end_idx + 7].strip()
+    elif doctype_idx >= 0:
+        return text[doctype_idx:].strip()
+
+    return text.strip()
+
+
+class HtmlStreamExtractor:
+    """Incremental extract_html_content for streamed responses.
+
+    feed() returns the part of the HTML that is safe to send now,
+    finish() returns the rest once the stream ends. Joined together they
+    equal extract_html_content() of the full text (up to trailing whitespace).
+    """
+    # Longest marker minus one char, kept back in case a chunk ends mid-marker
+    HOLD_BACK = len("</html>") - 1
+
+    def __init__(self):
+        self._buffer = ""  # Received but not yet emitted
+        self._started = False  # <!DOCTYPE found
+        self._seen_end = False  # A </html> was emitted
+        self._closed = False  # Closing code fence reached, ignore the rest
+        self._buffer_all = False  # Unusual layout, extract everything at finish()
+
+    def feed(self, chunk: str) -> str:
+        if self._closed:
+            return ""
+        self._buffer += chunk
+        if self._buffer_all:
+            return ""
+        if not self._started:
+            doctype_idx = self._buffer.lower().find("<!doctype")
+            if doctype_idx < 0:
+                return ""
+
+            # A code fence closed before the page started
+            prefix = self._buffer[:doctype_idx]
+            if "```html" in prefix:
+                prefix = prefix.split("```html", 1)[1]
+            if "```" in prefix:
+                self._buffer_all = True
+                return ""
+
+            self._started = True
+            self._buffer = self._buffer[doctype_idx:]
+
+        # Closing markdown fence - nothing after it belongs to the page
+        fence_idx = self._buffer.find("```")
+        if fence_idx >= 0:
+            self._buffer = self._buffer[:fence_idx]
+            self._closed = True
+            return self._drain(final=True)
+
+        return self._drain(final=False)
+
+    def finish(self) -> str:
+        if not self._started:
+            text, self._buffer = self._buffer, ""
+            return extract_html_content(text)
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> str:
+        html_end_idx = self._buffer.lower().rfind("</html>")
+        if html_end_idx >= 0:
+            html_end_idx += len("</html>")
+            out = self._buffer[:html_end_idx]
+            # Text after </html> is held until another </html> arrives
+            self._buffer = "" if final else self._buffer[html_end_idx:]
+            self._seen_end = True
+            return out
+
+        if self._seen_end:
+            if final:
+                self._buffer = ""
+            return ""
+
+        if final:
+            out, self._buffer = self._buffer.rstrip(), ""
+            return out
+
+        cut = max(0, len(self._buffer) - self.HOLD_BACK)
+        out, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        return out
+
+
+def normalize_media_type(media_type: Optional[str]) -> str:
+    """Media type accepted by the API (falls back to PNG)."""
+    if media_type not in SUPPORTED_MEDIA_TYPES:
+        return "image/png"
+    return media_type
+
+
+def build_image_prompt(company_name: str, decoded: list[DecodedImage], prompt: Optional[str] = None) -> str:
+    """User prompt for replicating the reference design."""
+    images_info = ""
+    for idx, image in enumerate(decoded):
+        images_info += f"\n- Image {idx+1}: {image.width}x{image.height} pixels"
+        preview_width, preview_height = image.preview_size()
+        if (preview_width, preview_height) != (image.width, image.height):
+            images_info += f" (attached downscaled to {preview_width}x{preview_height} - crop for full detail)"
+
+    images_note = ""
+    if len(decoded) > 1:
+        images_note = f"\n\nNote: {len(decoded)} reference images provided. They show different parts of the same design - combine them into one cohesive page. Pass image_index (1-{len(decoded)}) to the crop tools to examine a specific image."
+
+    user_prompt = f"""Create a landing page for: {company_name}
+
+REPLICATE this design EXACTLY. Analyze the reference carefully.
+
+Reference image dimensions:{images_info}
+
+You have tools to crop and zoom into specific areas of the reference image
+(crop coordinates are in the original pixels listed above):
+- Use get_image_dimensions to know the image size
+- Use crop_region to quickly examine sections (header, hero, content, footer)
+- Use crop_image with specific coordinates to zoom into details (buttons, icons, typography)
+
+WORKFLOW:
+1. First, look at the full image to understand overall layout
+2. Use crop_region to examine each section closely
+3. Use crop_image to zoom into specific UI elements you need to replicate exactly
+4. Once you've analyzed all details, generate the complete HTML
+
+Match colors, fonts, spacing, and layout pixel-perfect.{images_note}"""
+
+    if prompt:
+        user_prompt += f"\n\nAdditional requirements: {prompt}"
+
+    return user_prompt
+
+
+def run_image_tool(tool_name: str, tool_input: dict, tool_id: str, decoded: list[DecodedImage]) -> dict:
+    """Execute one image tool call and build its tool_result block.
+
+    Thread-safe: the decoded images are only read.
+    """
+    print(f"[TOOL] {tool_name}: {tool_input}")
+
+    try:
+        if tool_name == "get_image_dimensions":
+            # Return dimensions of all images
+            result_parts = [
+                f"Image {idx+1}: {image.width}x{image.height} pixels"
+                for idx, image in enumerate(decoded)
+            ]
+            return {
+                "type": "tool_result",
+                "tool_use_id": tool_id,
+                "content": "\n".join(result_parts),
+            }
+
+        if tool_name in ("crop_region", "crop_image"):
+            image_index = int(tool_input.get("image_index", 1))
+            if not 1 <= image_index <= len(decoded):
+                return {
+                    "type": "tool_result",
+                    "tool_use_id": tool_id,
+                    "content": f"Invalid image_index {image_index}: there are {len(decoded)} image(s), numbered from 1",
+                    "is_error": True,
+                }
+            image = decoded[image_index - 1]
+
+        if tool_name == "crop_region":
+            region = tool_input.get("region", "full")
+            crop_base64, crop_media_type = image.crop_region(region)
+            print(f"[TOOL] Cropped region '{region}' of image {image_index}: {len(crop_base64) // 1024}KB")
+            description = f"Cropped region of image {image_index}: {region}"
+
+        elif tool_name == "crop_image":
+            x = tool_input.get("x", 0)
+            y = tool_input.get("y", 0)
+            width = tool_input.get("width", 100)
+            height = tool_input.get("height", 100)
+            crop_base64, crop_media_type = image.crop(x, y, width, height)
+            print(f"[TOOL] Cropped ({x},{y}) {width}x{height} of image {image_index}: {len(crop_base64) // 1024}KB")
+            description = f"Cropped area of image {image_index}: x={x}, y={y}, width={width}, height={height}"
+
+        else:
+            return {
+                "type": "tool_result",
+                "tool_use_id": tool_id,
+                "content": f"Unknown tool: {tool_name}",
+                "is_error": True,
+            }
+
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_id,
+            "content": [
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": crop_media_type,
+                        "data": crop_base64,
+                    }
+                },
+                {
+                    "type": "text",
+                    "text": description,
+                }
+            ],
+        }
+
+    except Exception as e:
+        print(f"[TOOL ERROR] {tool_name}: {e}")
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_id,
+            "content": f"Error executing {tool_name}: {str(e)}",
+            "is_error": True,
+        }
+
+
+def evict_old_crops(messages: list[dict]) -> int:
+    """Drop crop images of older tool results once there are too many. Returns the number dropped."""
+    turns = [
+        message for message in messages
+        if message["role"] == "user" and any(
+            isinstance(block.get("content"), list)
+            and any(part["type"] == "image" for part in block["content"])
+            for block in message["content"]
+            if isinstance(block, dict) and block.get("type") == "tool_result"
+        )
+    ]
+    if len(turns) <= CROP_TURNS_LIMIT:
+        return 0
+
+    dropped = 0
+    for message in turns[:-CROP_TURNS_KEPT]:
+        for block in message["content"]:
+            content = block.get("content")
+            if not isinstance(content, list):
+                continue
+            kept = [part for part in content if part["type"] != "image"]
+            dropped += len(content) - len(kept)
+            kept.append({"type": "text", "text": "(Crop image removed from history - crop again if you need it.)"})
+            block["content"] = kept
+    return dropped
+
+
+def mark_history_breakpoint(messages: list[dict]) -> None:
+    """Move the moving cache breakpoint to the last tool result (max 4 breakpoints per request)."""
+    for message in messages[1:]:
+        if message["role"] != "user":
+            continue
+        for block in message["content"]:
+            if isinstance(block, dict):
+                block.pop("cache_control", None)
+    if messages[-1]["role"] == "user" and len(messages) > 1:
+        messages[-1]["content"][-1]["cache_control"] = CACHE_CONTROL
+
+
+async def generate_site_from_images(
+    images: list[tuple[bytes, str]],
+    company_name: str,
+    prompt: Optional[str] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> SiteGenerationResult:
+    """Generate a landing page from reference images.
+
+    Args:
+        images: List of (raw bytes, media type) pairs
+        company_name: Company name for the page
+        prompt: Additional user requirements
+        on_progress: Awaited after every iteration of the agent loop
+
+    Returns:
+        Generated HTML with token and tool usage
+    """
+    image_blocks = []
+    print(f"[GENERATE] Processing {len(images)} image(s) with tool_use pattern")
+
+    # Decode once per request - every tool call below reuses the pixels
+    decoded = await asyncio.gather(*(
+        asyncio.to_thread(DecodedImage, data) for data, _ in images
+    ))
+
+    for idx, (image_content, media_type) in enumerate(images):
+        media_type = normalize_media_type(media_type)
+        image = decoded[idx]
+        print(f"[GENERATE] Image {idx+1}: {len(image_content) / 1024:.1f}KB, {image.width}x{image.height}px, {len(image.levels)} level(s), type: {media_type}")
+
+        if image.preview_size() == (image.width, image.height):
+            data = base64.standard_b64encode(image_content).decode("utf-8")
+        else:
+            # The model would downscale it anyway - don't upload (and pay for) the extra pixels
+            data, media_type = await asyncio.to_thread(image.preview)
+            print(f"[GENERATE] Image {idx+1}: sent as {image.preview_size()[0]}x{image.preview_size()[1]}px preview, {len(data) * 3 / 4 / 1024:.1f}KB")
+
+        image_blocks.append({
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": media_type,
+                "data": data,
+            },
+        })
+
+    user_prompt = build_image_prompt(company_name, decoded, prompt)
+
+    # Cache breakpoints: tools + master prompt (shared by all generations),
+    # the references + prompt of this request, and the latest tool results
+    system = [
+        {
+            "type": "text",
+            "text": MASTER_PROMPT,
+            "cache_control": CACHE_CONTROL,
+        }
+    ]
+    initial_content = image_blocks + [
+        {
+            "type": "text",
+            "text": user_prompt,
+            "cache_control": CACHE_CONTROL,
+        }
+    ]
+    messages = [{"role": "user", "content": initial_content}]
+
+    prompt_length = len(MASTER_PROMPT) + len(user_prompt)
+    print(f"[CLAUDE API] Starting agentic loop with {len(image_blocks)} images, prompt: {prompt_length} chars")
+    print(f"[CLAUDE API] Model: {SITE_MODEL}, tools: {len(IMAGE_TOOLS)}")
+
+    start_time = time.time()
+    total_input_tokens = 0
+    total_output_tokens = 0
+    total_cache_creation_tokens = 0
+    total_cache_read_tokens = 0
+    tool_calls = 0
+    iterations = 0
+    text_content = ""
+
+    for iteration in range(MAX_ITERATIONS):
+        iterations = iteration + 1
+        print(f"[CLAUDE API] Iteration {iterations}")
+
+        # Call Claude with tools (using streaming for long operations)
+        response = await stream_message(
+            model=SITE_MODEL,
+            max_tokens=16384,
+            system=system,
+            tools=IMAGE_TOOLS,
+            messages=messages,
+        )
+
+        usage = response.usage
+        cache_creation_tokens = usage.cache_creation_input_tokens or 0
+        cache_read_tokens = usage.cache_read_input_tokens or 0
+        total_input_tokens += usage.input_tokens + cache_creation_tokens + cache_read_tokens
+        total_output_tokens += usage.output_tokens
+        total_cache_creation_tokens += cache_creation_tokens
+        total_cache_read_tokens += cache_read_tokens
+
+        print(
+            f"[CLAUDE API] Iteration {iterations} tokens - input: {usage.input_tokens}, "
+            f"cache write: {cache_creation_tokens}, cache read: {cache_read_tokens}, "
+            f"output: {usage.output_tokens}"
+        )
+
+        print(f"[CLAUDE API] Stop reason: {response.stop_reason}, blocks: {len(response.content)}")
+
+        if response.stop_reason == "tool_use":
+            # Process tool calls concurrently (Pillow releases the GIL while cropping/encoding),
+            # gather keeps the results in the order of the tool_use blocks
+            tool_blocks = [block for block in response.content if block.type == "tool_use"]
+            tool_calls += len(tool_blocks)
+            tool_results = list(await asyncio.gather(*(
+                asyncio.to_thread(run_image_tool, block.name, block.input, block.id, decoded)
+                for block in tool_blocks
+            )))
+
+            # Add assistant message with tool use, then tool results
+            messages.append({"role": "assistant", "content": response.content})
+            messages.append({"role": "user", "content": tool_results})
+
+            dropped = evict_old_crops(messages)
+            if dropped:
+                print(f"[CLAUDE API] Dropped {dropped} old crop image(s) from history")
+            mark_history_breakpoint(messages)
+
+            if on_progress:
+                await on_progress(GenerationProgress(
+                    iteration=iterations,
+                    tool_calls=tool_calls,
+                    input_tokens=total_input_tokens,
+                    output_tokens=total_output_tokens,
+                    message=f"Analyzing reference: {len(tool_results)} tool call(s)",
+                ))
+        else:
+            # Claude is done - extract final text
+            for block in response.content:
+                if block.type == "text":
+                    text_content = block.text
+                    break
+            break
+
+    elapsed = time.time() - start_time
+    print(f"[CLAUDE API] Completed in {elapsed:.1f}s, {tool_calls} tool calls")
+    print(
+        f"[CLAUDE API] Tokens - input: {total_input_tokens} "
+        f"(cache write: {total_cache_creation_tokens}, cache read: {total_cache_read_tokens}), "
+        f"output: {total_output_tokens}"
+    )
+    print(f"[CLAUDE API] HTML length: {len(text_content)} chars")
+
+    return SiteGenerationResult(
+        html=extract_html_content(text_content),
+        iterations=iterations,
+        tool_calls=tool_calls,
+        input_tokens=total_input_tokens,
+        output_tokens=total_output_tokens,
+        cache_creation_input_tokens=total_cache_creation_tokens,
+        cache_read_input_tokens=total_cache_read_tokens,
+    )
@@ -0,0 +1,201 @@
+"""
+Slot holds.
+
+When a client picks a time, the slot is held for HOLD_TTL so other clients
+don't see it while the booking is being confirmed. Holds are treated as
+busy by the availability engine, except for the holder's own hold.
+
+Holds live in Redis when REDIS_URL is set (a sorted set per doctor-day,
+scored by expiry) and in the slot_holds table otherwise. Expired holds are
+ignored on read and swept per doctor-day when a new hold is placed.
+
+A client holds at most one slot; holding another releases the previous one.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import get_redis
+from app.models.slot_hold import SlotHold
+
+HOLD_TTL = timedelta(minutes=10)
+MINUTES_PER_DAY = 24 * 60
+
+# pg_advisory_xact_lock namespace for placing holds of one doctor
+HOLD_LOCK_NAMESPACE = 7001
+
+# Atomically: sweep expired holds, reject overlap with other holders, add the hold.
+# KEYS[1] day key; ARGV: now, expires_at, start, end, holder (times in ms / minutes)
+_HOLD_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local start_min, end_min = tonumber(ARGV[3]), tonumber(ARGV[4])
+for _, member in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+    local s, e, holder = string.match(member, '^(%d+):(%d+):(.*)$')
+    if holder ~= ARGV[5] and tonumber(s) < end_min and start_min < tonumber(e) then
+        return 0
+    end
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3] .. ':' .. ARGV[4] .. ':' .. ARGV[5])
+redis.call('PEXPIREAT', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+def client_holder(telegram_id: int) -> str:
+    """Holder id of a client (shared by the bot and the portal)."""
+    return f"client:{telegram_id}"
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _minutes_range(start_time: time, end_time: time) -> tuple[int, int]:
+    start, end = _minutes(start_time), _minutes(end_time)
+    if end <= start:
+        end += MINUTES_PER_DAY  # Ends at/after midnight
+    return start, end
+
+
+def _day_key(doctor_id: int, slot_date: date) -> str:
+    return f"slot_holds:{doctor_id}:{slot_date.isoformat()}"
+
+
+def _holder_key(holder: str) -> str:
+    return f"slot_holds:holder:{holder}"
+
+
+async def hold_slot(
+    db: AsyncSession,
+    doctor_id: int,
+    slot_date: date,
+    start_time: time,
+    end_time: time,
+    holder: str,
+) -> Optional[datetime]:
+    """Hold a slot for `holder`.
+
+    Returns the expiry time, or None if another holder holds an overlapping
+    slot. The Postgres backend commits the session.
+    """
+    await release_holds(db, holder)
+    expires_at = datetime.now(timezone.utc) + HOLD_TTL
+
+    redis = get_redis()
+    if redis is not None:
+        start, end = _minutes_range(start_time, end_time)
+        key = _day_key(doctor_id, slot_date)
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        expires_ms = int(expires_at.timestamp() * 1000)
+        held = await redis.eval(_HOLD_SCRIPT, 1, key, now_ms, expires_ms, start, end, holder)
+        if not held:
+            return None
+        await redis.set(_holder_key(holder), f"{key}|{start}:{end}:{holder}", px=expires_ms - now_ms)
+        return expires_at
+
+    # Serialize holds of this doctor until commit
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(:namespace, :doctor_id)"),
+        {"namespace": HOLD_LOCK_NAMESPACE, "doctor_id": doctor_id},
+    )
+    await db.execute(
+        delete(SlotHold).where(
+            SlotHold.doctor_id == doctor_id,
+            SlotHold.date == slot_date,
+            SlotHold.expires_at <= func.now(),
+        )
+    )
+
+    start, end = _minutes_range(start_time, end_time)
+    result = await db.execute(
+        select(SlotHold.start_time, SlotHold.end_time).where(
+            SlotHold.doctor_id == doctor_id,
+            SlotHold.date == slot_date,
+            SlotHold.holder != holder,
+        )
+    )
+    for other_start, other_end in result.all():
+        s, e = _minutes_range(other_start, other_end)
+        if s < end and start < e:
+            await db.rollback()
+            return None
+
+    db.add(SlotHold(
+        doctor_id=doctor_id,
+        date=slot_date,
+        start_time=start_time,
+        end_time=end_time,
+        holder=holder,
+        expires_at=expires_at,
+    ))
+    await db.commit()
+    return expires_at
+
+
+async def release_holds(db: AsyncSession, holder: str) -> None:
+    """Release the holder's hold (after booking or when the flow is abandoned).
+
+    The Postgres backend leaves the delete for the caller to commit.
+    """
+    redis = get_redis()
+    if redis is not None:
+        value = await redis.getdel(_holder_key(holder))
+        if value:
+            key, member = value.split("|", 1)
+            await redis.zrem(key, member)
+        return
+
+    await db.execute(delete(SlotHold).where(SlotHold.holder == holder))
+
+
+async def get_holds(
+    db: AsyncSession,
+    doctor_ids: list[int],
+    date_from: date,
+    date_to: date,
+    exclude_holder: Optional[str] = None,
+) -> dict[int, list[tuple[date, time, time]]]:
+    """Active holds per doctor as (date, start_time, end_time)."""
+    holds = defaultdict(list)
+    if not doctor_ids:
+        return holds
+
+    redis = get_redis()
+    if redis is not None:
+        keys = []
+        current_date = date_from
+        while current_date <= date_to:
+            keys.extend((doctor_id, current_date) for doctor_id in doctor_ids)
+            current_date += timedelta(days=1)
+
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        pipe = redis.pipeline(transaction=False)
+        for doctor_id, slot_date in keys:
+            pipe.zrangebyscore(_day_key(doctor_id, slot_date), now_ms, "+inf")
+        for (doctor_id, slot_date), members in zip(keys, await pipe.execute()):
+            for member in members:
+                start, end, holder = member.split(":", 2)
+                if holder == exclude_holder:
+                    continue
+                holds[doctor_id].append((
+                    slot_date,
+                    time(int(start) // 60, int(start) % 60),
+                    time((int(end) // 60) % 24, int(end) % 60),
+                ))
+        return holds
+
+    query = select(SlotHold).where(
+        SlotHold.doctor_id.in_(doctor_ids),
+        SlotHold.date >= date_from,
+        SlotHold.date <= date_to,
+        SlotHold.expires_at > func.now(),
+    )
+    if exclude_holder:
+        query = query.where(SlotHold.holder != exclude_holder)
+    result = await db.execute(query)
+    for hold in result.scalars().all():
+        holds[hold.doctor_id].append((hold.date, hold.start_time, hold.end_time))
+    return holds
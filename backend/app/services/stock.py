@@ -0,0 +1,104 @@
+"""
+Inventory stock balances.
+
+inventory_stock_balances keeps the running total of StockMovement.quantity
+per item, so stock reads are primary-key lookups instead of SUM() over the
+whole movement ledger. Every movement must be recorded through add_movement
+so the balance changes in the same transaction as the ledger.
+
+Rebuild balances from the ledger:
+    python -m app.services.stock [--company-id ID]
+"""
+import argparse
+import asyncio
+from typing import Optional
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_session_maker
+from app.models.inventory import InventoryItem, StockMovement, StockBalance
+
+
+async def add_movement(db: AsyncSession, movement: StockMovement) -> StockMovement:
+    """Add a movement to the session and apply it to the item's balance.
+
+    The item must already be flushed (have an id). Nothing is committed here.
+    """
+    db.add(movement)
+
+    stmt = insert(StockBalance).values(
+        item_id=movement.item_id,
+        company_id=movement.company_id,
+        quantity=movement.quantity,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StockBalance.item_id],
+        set_={
+            "quantity": StockBalance.quantity + stmt.excluded.quantity,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+    return movement
+
+
+async def get_stock(db: AsyncSession, item_id: int) -> int:
+    """Current stock of one item."""
+    result = await db.execute(
+        select(StockBalance.quantity).where(StockBalance.item_id == item_id)
+    )
+    return result.scalar() or 0
+
+
+async def get_stock_many(db: AsyncSession, item_ids: list[int]) -> dict[int, int]:
+    """Current stock of several items with one query. Missing items have 0."""
+    if not item_ids:
+        return {}
+    result = await db.execute(
+        select(StockBalance.item_id, StockBalance.quantity)
+        .where(StockBalance.item_id.in_(item_ids))
+    )
+    stock = dict.fromkeys(item_ids, 0)
+    stock.update({item_id: quantity for item_id, quantity in result.all()})
+    return stock
+
+
+async def reconcile_balances(db: AsyncSession, company_id: Optional[int] = None) -> int:
+    """Rebuild balances from the movement ledger. Returns the number of items."""
+    delete_stmt = delete(StockBalance)
+    items_query = (
+        select(
+            InventoryItem.id,
+            InventoryItem.company_id,
+            func.coalesce(func.sum(StockMovement.quantity), 0),
+        )
+        .outerjoin(StockMovement, StockMovement.item_id == InventoryItem.id)
+        .group_by(InventoryItem.id, InventoryItem.company_id)
+    )
+    if company_id is not None:
+        delete_stmt = delete_stmt.where(StockBalance.company_id == company_id)
+        items_query = items_query.where(InventoryItem.company_id == company_id)
+
+    await db.execute(delete_stmt)
+    result = await db.execute(
+        insert(StockBalance).from_select(
+            ["item_id", "company_id", "quantity"], items_query
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def main(company_id: Optional[int] = None) -> None:
+    async with async_session_maker() as session:
+        count = await reconcile_balances(session, company_id)
+    print(f"Reconciled stock balances for {count} items")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild inventory stock balances from movements")
+    parser.add_argument("--company-id", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.company_id))
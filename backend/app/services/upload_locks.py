@@ -0,0 +1,22 @@
+"""
+Locks on deduplicated upload files.
+
+Uploads are stored under their content hash, so one file can back several
+records. Reusing an existing file on upload and removing a file whose last
+record was deleted both hold lock_upload_file() until their transaction
+commits: an upload either finds the file gone and writes it again, or its
+record is committed before the removal counts the records that use it.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# pg_advisory_xact_lock namespace for reusing or removing one upload file
+UPLOAD_LOCK_NAMESPACE = 7002
+
+
+async def lock_upload_file(db: AsyncSession, filename: str) -> None:
+    """Hold the lock of an upload file (by its content-hash name) until commit."""
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(:namespace, hashtext(:filename))"),
+        {"namespace": UPLOAD_LOCK_NAMESPACE, "filename": filename},
+    )
@@ -0,0 +1,41 @@
+"""
+HTTP caching helpers: weak ETags, If-None-Match and Cache-Control.
+
+Endpoints build the ETag from a content version before loading any data,
+then call check_etag() - it answers 304 Not Modified when the client's copy
+is current and sets the caching headers otherwise.
+"""
+from fastapi import HTTPException, Request, Response
+
+# Public pages: shared caches (nginx) may keep a response briefly, then revalidate
+PUBLIC_CACHE_CONTROL = "public, max-age=30, must-revalidate"
+# Per-user data: browsers revalidate every time, shared caches don't store it
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Weak ETag from the parts, e.g. make_etag("services", company_id, version)."""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def _opaque(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match matches the ETag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def check_etag(request: Request, response: Response, etag: str, cache_control: str) -> None:
+    """Raise 304 if the client has this version, otherwise set ETag and Cache-Control."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
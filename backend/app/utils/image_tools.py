@@ -2,10 +2,126 @@
 
 import base64
 import io
-from typing import Optional, Literal
+from typing import Literal
 from PIL import Image
 
 
+MAX_CROP_SIDE = 1568  # Claude downscales larger images anyway
+MAX_IMAGE_PIXELS = 1_150_000  # Same for the total pixel count
+MIN_PYRAMID_SIDE = 512
+
+MEDIA_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+}
+
+RegionName = Literal["header", "hero", "content_top", "content_middle", "content_bottom", "footer", "full"]
+
+# Named regions as fractions of image height
+REGIONS = {
+    "header": (0.0, 0.10),
+    "hero": (0.10, 0.35),
+    "content_top": (0.25, 0.50),
+    "content_middle": (0.40, 0.70),
+    "content_bottom": (0.60, 0.90),
+    "footer": (0.85, 1.0),
+    "full": (0.0, 1.0),
+}
+
+
+class DecodedImage:
+    """A reference image decoded once, with a pyramid of downscaled copies.
+
+    levels[0] is the original, every next level is half the size, down to
+    MIN_PYRAMID_SIDE. Crops are cut from the smallest level that still
+    gives MAX_CROP_SIDE pixels, so large crops don't encode more pixels
+    than the model will look at.
+    """
+
+    def __init__(self, image_data: bytes):
+        img = Image.open(io.BytesIO(image_data))
+        self.format = img.format
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "P") else "RGB")
+        img.load()
+
+        self.width, self.height = img.width, img.height
+        self.levels = [img]
+        while max(self.levels[-1].size) // 2 >= MIN_PYRAMID_SIDE:
+            prev = self.levels[-1]
+            self.levels.append(prev.reduce(2))
+
+    def crop(self, x: int, y: int, width: int, height: int, output_format: str = "PNG") -> tuple[str, str]:
+        """Crop a region (original pixel coordinates), returns (base64_data, media_type)."""
+        # Ensure coordinates are within bounds
+        x = max(0, min(x, self.width - 1))
+        y = max(0, min(y, self.height - 1))
+        width = max(1, min(width, self.width - x))
+        height = max(1, min(height, self.height - y))
+
+        # Smallest level keeping the crop at MAX_CROP_SIDE
+        level = 0
+        while level + 1 < len(self.levels) and max(width, height) / 2 ** (level + 1) >= MAX_CROP_SIDE:
+            level += 1
+        scale = 2 ** level
+        source = self.levels[level]
+        box = (
+            x // scale,
+            y // scale,
+            min(source.width, -(-(x + width) // scale)),
+            min(source.height, -(-(y + height) // scale)),
+        )
+        cropped = source.crop(box)
+
+        # Convert to RGB if necessary (for JPEG)
+        if output_format.upper() == "JPEG" and cropped.mode == "RGBA":
+            cropped = cropped.convert("RGB")
+
+        buffer = io.BytesIO()
+        cropped.save(buffer, format=output_format.upper())
+        base64_data = base64.standard_b64encode(buffer.getvalue()).decode("utf-8")
+        return base64_data, MEDIA_TYPES.get(output_format.upper(), "image/png")
+
+    def preview_size(self) -> tuple[int, int]:
+        """Size the model actually sees the full image at (MAX_CROP_SIDE / MAX_IMAGE_PIXELS)."""
+        scale = min(
+            1.0,
+            MAX_CROP_SIDE / max(self.width, self.height),
+            (MAX_IMAGE_PIXELS / (self.width * self.height)) ** 0.5,
+        )
+        return max(1, int(self.width * scale)), max(1, int(self.height * scale))
+
+    def preview(self) -> tuple[str, str]:
+        """Full image downscaled to preview_size(), returns (base64_data, media_type).
+
+        JPEG unless the image has transparency - the preview is only for the
+        overall layout, details come from crops.
+        """
+        width, height = self.preview_size()
+        source = self.levels[0]
+        for level in self.levels:
+            if level.width >= width and level.height >= height:
+                source = level
+        img = source if source.size == (width, height) else source.resize((width, height), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        if img.mode == "RGBA":
+            img.save(buffer, format="PNG")
+            media_type = MEDIA_TYPES["PNG"]
+        else:
+            img.save(buffer, format="JPEG", quality=90)
+            media_type = MEDIA_TYPES["JPEG"]
+        return base64.standard_b64encode(buffer.getvalue()).decode("utf-8"), media_type
+
+    def crop_region(self, region: RegionName, output_format: str = "PNG") -> tuple[str, str]:
+        """Crop a named region (see REGIONS)."""
+        top, bottom = REGIONS.get(region, REGIONS["full"])
+        y1, y2 = int(self.height * top), int(self.height * bottom)
+        return self.crop(0, y1, self.width, y2 - y1, output_format)
+
+
 def get_image_info(image_data: bytes) -> dict:
     """Get image dimensions and format."""
     img = Image.open(io.BytesIO(image_data))
@@ -25,95 +141,27 @@ def crop_image(
     height: int,
     output_format: str = "PNG",
 ) -> tuple[str, str]:
-    """Crop a region from the image.
+    """Crop a region from raw image bytes.
 
-    Args:
-        image_data: Raw image bytes
-        x: Left coordinate (pixels from left edge)
-        y: Top coordinate (pixels from top edge)
-        width: Width of crop region
-        height: Height of crop region
-        output_format: Output format (PNG, JPEG, WEBP)
+    Decodes the image on every call - the agent loop uses DecodedImage instead.
 
     Returns:
         Tuple of (base64_data, media_type)
     """
-    img = Image.open(io.BytesIO(image_data))
-
-    # Ensure coordinates are within bounds
-    x = max(0, min(x, img.width - 1))
-    y = max(0, min(y, img.height - 1))
-    width = min(width, img.width - x)
-    height = min(height, img.height - y)
-
-    # Crop the region
-    cropped = img.crop((x, y, x + width, y + height))
-
-    # Convert to RGB if necessary (for JPEG)
-    if output_format.upper() == "JPEG" and cropped.mode in ("RGBA", "P"):
-        cropped = cropped.convert("RGB")
-
-    # Save to bytes
-    buffer = io.BytesIO()
-    cropped.save(buffer, format=output_format.upper())
-    buffer.seek(0)
-
-    # Encode to base64
-    base64_data = base64.standard_b64encode(buffer.read()).decode("utf-8")
-
-    media_types = {
-        "PNG": "image/png",
-        "JPEG": "image/jpeg",
-        "WEBP": "image/webp",
-        "GIF": "image/gif",
-    }
-    media_type = media_types.get(output_format.upper(), "image/png")
-
-    return base64_data, media_type
+    return DecodedImage(image_data).crop(x, y, width, height, output_format)
 
 
 def crop_region(
     image_data: bytes,
-    region: Literal["header", "hero", "content_top", "content_middle", "content_bottom", "footer", "full"],
+    region: RegionName,
     output_format: str = "PNG",
 ) -> tuple[str, str]:
-    """Crop a named region from the image.
-
-    Regions are defined as percentages of image height:
-    - header: top 10%
-    - hero: 10-35%
-    - content_top: 25-50%
-    - content_middle: 40-70%
-    - content_bottom: 60-90%
-    - footer: bottom 15%
-    - full: entire image
-
-    Args:
-        image_data: Raw image bytes
-        region: Named region to crop
-        output_format: Output format
+    """Crop a named region (see REGIONS) from raw image bytes.
 
     Returns:
         Tuple of (base64_data, media_type)
     """
-    img = Image.open(io.BytesIO(image_data))
-    w, h = img.width, img.height
-
-    regions = {
-        "header": (0, 0, w, int(h * 0.10)),
-        "hero": (0, int(h * 0.10), w, int(h * 0.35)),
-        "content_top": (0, int(h * 0.25), w, int(h * 0.50)),
-        "content_middle": (0, int(h * 0.40), w, int(h * 0.70)),
-        "content_bottom": (0, int(h * 0.60), w, int(h * 0.90)),
-        "footer": (0, int(h * 0.85), w, h),
-        "full": (0, 0, w, h),
-    }
-
-    if region not in regions:
-        region = "full"
-
-    x1, y1, x2, y2 = regions[region]
-    return crop_image(image_data, x1, y1, x2 - x1, y2 - y1, output_format)
+    return DecodedImage(image_data).crop_region(region, output_format)
 
 
 # Tool definitions for Claude API
@@ -133,6 +181,10 @@ The image coordinate system: (0,0) is top-left corner. X increases rightward, Y
         "input_schema": {
             "type": "object",
             "properties": {
+                "image_index": {
+                    "type": "integer",
+                    "description": "Which reference image to crop (1 = first). Defaults to 1."
+                },
                 "x": {
                     "type": "integer",
                     "description": "Left edge X coordinate in pixels"
@@ -170,6 +222,10 @@ Use this for quick section-by-section analysis of the layout.""",
         "input_schema": {
             "type": "object",
             "properties": {
+                "image_index": {
+                    "type": "integer",
+                    "description": "Which reference image to crop (1 = first). Defaults to 1."
+                },
                 "region": {
                     "type": "string",
                     "enum": ["header", "hero", "content_top", "content_middle", "content_bottom", "footer", "full"],
@@ -181,7 +237,7 @@ Use this for quick section-by-section analysis of the layout.""",
     },
     {
         "name": "get_image_dimensions",
-        "description": "Get the dimensions (width and height in pixels) of the reference image. Use this first to understand the image size before making crop requests.",
+        "description": "Get the dimensions (width and height in pixels) of every reference image. Use this first to understand the image sizes before making crop requests.",
         "input_schema": {
             "type": "object",
             "properties": {},
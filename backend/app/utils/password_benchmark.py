@@ -0,0 +1,102 @@
+"""
+Latency of other endpoints during a login burst.
+
+Sends GET /health requests to the app in-process (one at a time, due every
+few milliseconds) while a burst of concurrent logins verifies passwords,
+and prints p50/p99 /health latency for three runs:
+    idle      - no logins
+    blocking  - bcrypt on the event loop (how login used to work)
+    off-loop  - bcrypt in the password thread pool (verify_and_update_password)
+
+The off-loop p99 should stay close to idle (bcrypt threads still share the
+CPU with the event loop on machines with few cores), the blocking one
+grows with the bcrypt cost. No database is needed, only the password check of the
+login handler is run:
+    python -m app.utils.password_benchmark [--logins 50] [--rounds 12]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from passlib.context import CryptContext
+
+from app.core import security
+from app.main import app
+
+PROBE_INTERVAL = 0.01  # Seconds between /health requests
+PASSWORD = "correct horse battery staple"
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    """Latencies (ms) of /health requests until stop is set.
+
+    Requests are due on a fixed schedule and latency counts from the due
+    time, so time a request spends waiting for a blocked event loop is
+    included (no coordinated omission).
+    """
+    latencies = []
+    due = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - due) * 1000)
+        due += PROBE_INTERVAL
+    return latencies
+
+
+async def blocking_login(hashed: str) -> None:
+    security.pwd_context.verify(PASSWORD, hashed)
+
+
+async def off_loop_login(hashed: str) -> None:
+    valid, _ = await security.verify_and_update_password(PASSWORD, hashed)
+    assert valid
+
+
+async def run(client: httpx.AsyncClient, login, hashed: str, logins: int, idle_seconds: float) -> list[float]:
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(client, stop))
+    await asyncio.sleep(0.1)  # Warm up
+
+    if login is None:
+        await asyncio.sleep(idle_seconds)
+    else:
+        await asyncio.gather(*(login(hashed) for _ in range(logins)))
+
+    stop.set()
+    return await probe_task
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+async def main(logins: int, rounds: int) -> None:
+    security.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    hashed = security.pwd_context.hash(PASSWORD)
+
+    started = time.perf_counter()
+    security.pwd_context.verify(PASSWORD, hashed)
+    verify_ms = (time.perf_counter() - started) * 1000
+    print(f"bcrypt cost {rounds}: {verify_ms:.0f} ms per verification, {logins} concurrent logins")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        idle_seconds = verify_ms * logins / 1000 / security.settings.PASSWORD_HASH_WORKERS
+        for name, login in (("idle", None), ("blocking", blocking_login), ("off-loop", off_loop_login)):
+            latencies = await run(client, login, hashed, logins, idle_seconds)
+            print(
+                f"{name:>9}: {len(latencies):4d} requests, "
+                f"p50 {percentile(latencies, 50):7.1f} ms, p99 {percentile(latencies, 99):7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=security.settings.PASSWORD_BCRYPT_ROUNDS)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.rounds))
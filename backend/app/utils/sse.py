@@ -0,0 +1,20 @@
+"""Server-Sent Events helpers."""
+
+import json
+from typing import Optional
+
+
+def format_sse(data: dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    message = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    return message
+
+
+SSE_KEEPALIVE = ": keep-alive\n\n"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable nginx response buffering
+}
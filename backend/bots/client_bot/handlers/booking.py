@@ -5,14 +5,16 @@ from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from sqlalchemy import select, and_
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.client import Client
 from app.models.service import Service
-from app.models.schedule import Schedule
 from app.models.appointment import Appointment, AppointmentStatus
 from app.models.user import User
+from app.services.availability import get_doctor_slots
+from app.services.booking import flush_booking, SlotTakenError
+from app.services.slot_holds import client_holder, hold_slot, release_holds
 from bots.i18n import t
 from bots.notifications import notify_doctor_new_appointment
 from bots.client_bot.keyboards import (
@@ -66,6 +68,34 @@ async def get_client_lang(session: AsyncSession, telegram_id: int) -> str:
     return client.language if client else "uk"
 
 
+async def get_services_data(session: AsyncSession, company_id: int) -> list[dict]:
+    """Active services of a company for the services keyboard."""
+    result = await session.execute(
+        select(Service).where(
+            Service.company_id == company_id,
+            Service.is_active == True
+        )
+    )
+    return [
+        {"id": s.id, "name": s.name, "price": float(s.price), "duration_minutes": s.duration_minutes}
+        for s in result.scalars().all()
+    ]
+
+
+def upcoming_dates() -> list[str]:
+    """Bookable dates (next 14 days) for the dates keyboard."""
+    today = date.today()
+    return [(today + timedelta(days=i)).strftime("%d.%m") for i in range(1, 15)]
+
+
+def format_slots(day_slots: list) -> list[dict]:
+    """Slots from get_doctor_slots as HH:MM strings for the times keyboard."""
+    return [
+        {"start_time": start_time.strftime("%H:%M"), "end_time": end_time.strftime("%H:%M")}
+        for _, start_time, end_time in day_slots
+    ]
+
+
 @router.message(Command("book"))
 @router.message(F.text.in_([
     t("book_appointment", "uk"),
@@ -95,25 +125,14 @@ async def start_booking(message: Message, state: FSMContext, session: AsyncSessi
         )
         return
 
-    # Get active services for this company only
-    result = await session.execute(
-        select(Service).where(
-            Service.company_id == company_id,
-            Service.is_active == True
-        )
-    )
-    services = result.scalars().all()
+    services_data = await get_services_data(session, company_id)
 
-    if not services:
+    if not services_data:
         await message.answer(t("booking.no_services", lang))
         return
 
-    services_data = [
-        {"id": s.id, "name": s.name, "price": float(s.price), "duration_minutes": s.duration_minutes}
-        for s in services
-    ]
-
-    await state.update_data(services=services_data, lang=lang, company_id=company_id)
+    # FSM data keeps only ids - the lists are rebuilt from the database
+    await state.update_data(lang=lang, company_id=company_id)
     await state.set_state(BookingStates.selecting_service)
 
     await message.answer(
@@ -144,9 +163,7 @@ async def select_service(callback: CallbackQuery, state: FSMContext, session: As
         doctor_id=service.doctor_id,
     )
 
-    # Generate available dates (next 14 days)
-    today = date.today()
-    dates = [(today + timedelta(days=i)).strftime("%d.%m") for i in range(1, 15)]
+    dates = upcoming_dates()
 
     await state.set_state(BookingStates.selecting_date)
     await callback.message.edit_text(
@@ -175,66 +192,16 @@ async def select_date(callback: CallbackQuery, state: FSMContext, session: Async
     doctor_id = data.get("doctor_id")
     duration = data.get("service_duration", 60)
 
-    # Get doctor's schedule for this day
-    day_of_week = selected_date.weekday()
-    result = await session.execute(
-        select(Schedule).where(
-            and_(
-                Schedule.doctor_id == doctor_id,
-                Schedule.day_of_week == day_of_week,
-                Schedule.is_working_day == True,
-            )
-        )
-    )
-    schedule = result.scalar_one_or_none()
-
-    if not schedule:
-        await callback.answer(t("booking.no_available_slots", lang))
-        return
-
-    # Get existing appointments for this day
-    result = await session.execute(
-        select(Appointment).where(
-            and_(
-                Appointment.doctor_id == doctor_id,
-                Appointment.date == selected_date,
-                Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]),
-            )
-        )
+    day_slots = await get_doctor_slots(
+        session, doctor_id, duration, selected_date, selected_date,
+        client_holder(callback.from_user.id),
     )
-    existing_appointments = result.scalars().all()
-
-    # Generate available slots
-    slots = []
-    current_time = datetime.combine(selected_date, schedule.start_time)
-    end_time = datetime.combine(selected_date, schedule.end_time)
-    slot_duration = timedelta(minutes=duration)
-
-    while current_time + slot_duration <= end_time:
-        slot_start = current_time.time()
-        slot_end = (current_time + slot_duration).time()
-
-        # Check if slot is available
-        is_available = True
-        for appt in existing_appointments:
-            if not (slot_end <= appt.start_time or slot_start >= appt.end_time):
-                is_available = False
-                break
-
-        # Don't show past slots for today
-        if selected_date == date.today() and slot_start <= datetime.now().time():
-            is_available = False
-
-        if is_available:
-            slots.append({"start_time": slot_start.strftime("%H:%M"), "end_time": slot_end.strftime("%H:%M")})
-
-        current_time += timedelta(minutes=30)
+    slots = format_slots(day_slots)
 
     if not slots:
         await callback.message.edit_text(t("booking.no_available_slots", lang))
         return
 
-    await state.update_data(slots=slots)
     await state.set_state(BookingStates.selecting_time)
 
     await callback.message.edit_text(
@@ -245,19 +212,38 @@ async def select_date(callback: CallbackQuery, state: FSMContext, session: Async
 
 
 @router.callback_query(F.data.startswith("time_"), BookingStates.selecting_time)
-async def select_time(callback: CallbackQuery, state: FSMContext):
+async def select_time(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
     data = await state.get_data()
     lang = data.get("lang", "uk")
     time_str = callback.data.split("_")[1]
 
-    # Find the slot
-    slots = data.get("slots", [])
+    # Find the slot (recomputed, so a time booked meanwhile is rejected)
+    holder = client_holder(callback.from_user.id)
+    selected_date = date.fromisoformat(data["selected_date"])
+    day_slots = await get_doctor_slots(
+        session, data.get("doctor_id"), data.get("service_duration", 60), selected_date, selected_date,
+        holder,
+    )
+    slots = format_slots(day_slots)
     selected_slot = next((s for s in slots if s["start_time"] == time_str), None)
 
     if not selected_slot:
         await callback.answer("Slot not found")
         return
 
+    # Hold the slot while the client confirms
+    held = await hold_slot(
+        session,
+        data["doctor_id"],
+        selected_date,
+        datetime.strptime(selected_slot["start_time"], "%H:%M").time(),
+        datetime.strptime(selected_slot["end_time"], "%H:%M").time(),
+        holder,
+    )
+    if not held:
+        await callback.answer(t("booking.slot_taken", lang), show_alert=True)
+        return
+
     await state.update_data(
         start_time=selected_slot["start_time"],
         end_time=selected_slot["end_time"],
@@ -321,8 +307,34 @@ async def confirm_booking(callback: CallbackQuery, state: FSMContext, session: A
         status=AppointmentStatus.PENDING,
     )
     session.add(appointment)
+    try:
+        await flush_booking(session)  # Get the generated ID
+    except SlotTakenError:
+        # Someone else booked this time first
+        await state.set_state(BookingStates.selecting_date)
+        await callback.message.edit_text(
+            t("booking.slot_taken", lang),
+            reply_markup=dates_keyboard(upcoming_dates(), lang),
+        )
+        await callback.answer()
+        return
+    # Only after the flush: the hold delete would autoflush the appointment
+    await release_holds(session, client_holder(callback.from_user.id))
+
+    # Notify doctor with action buttons (sent by the outbox dispatcher after commit)
+    if doctor and doctor.telegram_id:
+        client_name = f"{client.first_name} {client.last_name or ''}".strip()
+        notify_doctor_new_appointment(
+            session,
+            doctor_telegram_id=doctor.telegram_id,
+            client_name=client_name,
+            service_name=data["service_name"],
+            appointment_date=selected_date.strftime("%d.%m.%Y"),
+            appointment_time=data["start_time"],
+            appointment_id=appointment.id,
+        )
+
     await session.commit()
-    await session.refresh(appointment)  # Get the generated ID
 
     await state.clear()
 
@@ -343,23 +355,14 @@ async def confirm_booking(callback: CallbackQuery, state: FSMContext, session: A
     )
     await callback.answer()
 
-    # Send notification to doctor with action buttons
-    if doctor and doctor.telegram_id:
-        client_name = f"{client.first_name} {client.last_name or ''}".strip()
-        await notify_doctor_new_appointment(
-            doctor_telegram_id=doctor.telegram_id,
-            client_name=client_name,
-            service_name=data["service_name"],
-            appointment_date=selected_date.strftime("%d.%m.%Y"),
-            appointment_time=data["start_time"],
-            appointment_id=appointment.id,
-        )
-
 
 @router.callback_query(F.data == "cancel")
 async def cancel_booking(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
     lang = await get_client_lang(session, callback.from_user.id)
 
+    await release_holds(session, client_holder(callback.from_user.id))
+    await session.commit()
+
     await state.clear()
     await callback.message.edit_text(t("booking.booking_cancelled", lang))
     await callback.message.answer(
@@ -370,10 +373,10 @@ async def cancel_booking(callback: CallbackQuery, state: FSMContext, session: As
 
 
 @router.callback_query(F.data == "back_to_services")
-async def back_to_services(callback: CallbackQuery, state: FSMContext):
+async def back_to_services(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
     data = await state.get_data()
     lang = data.get("lang", "uk")
-    services = data.get("services", [])
+    services = await get_services_data(session, data.get("company_id"))
 
     await state.set_state(BookingStates.selecting_service)
     await callback.message.edit_text(
@@ -388,8 +391,7 @@ async def back_to_dates(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     lang = data.get("lang", "uk")
 
-    today = date.today()
-    dates = [(today + timedelta(days=i)).strftime("%d.%m") for i in range(1, 15)]
+    dates = upcoming_dates()
 
     await state.set_state(BookingStates.selecting_date)
     await callback.message.edit_text(
@@ -189,19 +189,12 @@ async def process_cancel_reason(message: Message, state: FSMContext, session: As
     appt.status = AppointmentStatus.CANCELLED
     appt.cancelled_by = CancelledBy.CLIENT
     appt.cancellation_reason = reason
-    await session.commit()
-
-    await state.clear()
-
-    await message.answer(
-        t("appointments.cancelled_success", lang),
-        reply_markup=main_menu_keyboard(lang),
-    )
 
     # Notify doctor
     if doctor and doctor.telegram_id:
         client_name = f"{client.first_name} {client.last_name or ''}".strip()
-        await notify_doctor_client_cancelled(
+        notify_doctor_client_cancelled(
+            session,
             doctor_telegram_id=doctor.telegram_id,
             client_name=client_name,
             service_name=service.name,
@@ -210,6 +203,15 @@ async def process_cancel_reason(message: Message, state: FSMContext, session: As
             cancellation_reason=reason,
         )
 
+    await session.commit()
+
+    await state.clear()
+
+    await message.answer(
+        t("appointments.cancelled_success", lang),
+        reply_markup=main_menu_keyboard(lang),
+    )
+
 
 @router.message(F.text.in_([
     t("change_language", "uk"),
@@ -2,12 +2,12 @@ import asyncio
 import logging
 
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
 from app.core.config import settings
 from app.core.database import async_session_maker
+from bots.storage import create_storage
 from bots.client_bot.handlers import start, registration, booking, services
 
 logging.basicConfig(level=logging.INFO)
@@ -31,7 +31,7 @@ async def main():
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
 
-    storage = MemoryStorage()
+    storage = create_storage("fsm:client")
     dp = Dispatcher(storage=storage)
 
     # Add database middleware
@@ -46,7 +46,10 @@ async def main():
 
     logger.info("Starting client bot...")
 
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await storage.close()
 
 
 if __name__ == "__main__":
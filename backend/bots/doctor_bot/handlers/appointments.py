@@ -158,13 +158,8 @@ async def confirm_appointment(callback: CallbackQuery, session: AsyncSession):
         return
 
     appt.status = AppointmentStatus.CONFIRMED
-    await session.commit()
-
-    text = await format_appointment(session, appt)
-    await callback.message.edit_text(text)
-    await callback.answer("Запис підтверджено ✅")
 
-    # Send notification to client
+    # Queue notification to client, committed together with the status
     result = await session.execute(
         select(Client).where(Client.id == appt.client_id)
     )
@@ -181,9 +176,10 @@ async def confirm_appointment(callback: CallbackQuery, session: AsyncSession):
     if client and client.telegram_id:
         # Get language as string (handle both enum and string)
         lang = str(client.language.value) if hasattr(client.language, 'value') else str(client.language) if client.language else "uk"
-        logger.info(f"Sending confirmation to client {client.telegram_id}, lang={lang}")
+        logger.info(f"Queueing confirmation to client {client.telegram_id}, lang={lang}")
 
-        await notify_client_appointment_confirmed(
+        notify_client_appointment_confirmed(
+            session,
             client_telegram_id=client.telegram_id,
             doctor_name=doctor_name,
             service_name=service.name,
@@ -194,6 +190,12 @@ async def confirm_appointment(callback: CallbackQuery, session: AsyncSession):
     else:
         logger.warning(f"Cannot send notification: client={client}, telegram_id={client.telegram_id if client else None}")
 
+    await session.commit()
+
+    text = await format_appointment(session, appt)
+    await callback.message.edit_text(text)
+    await callback.answer("Запис підтверджено ✅")
+
 
 @router.callback_query(F.data.startswith("cancel_"))
 async def cancel_appointment(callback: CallbackQuery, session: AsyncSession):
@@ -212,13 +214,8 @@ async def cancel_appointment(callback: CallbackQuery, session: AsyncSession):
 
     appt.status = AppointmentStatus.CANCELLED
     appt.cancelled_by = CancelledBy.DOCTOR
-    await session.commit()
-
-    text = await format_appointment(session, appt)
-    await callback.message.edit_text(text)
-    await callback.answer("Запис скасовано ❌")
 
-    # Send notification to client
+    # Queue notification to client, committed together with the status
     result = await session.execute(
         select(Client).where(Client.id == appt.client_id)
     )
@@ -232,9 +229,10 @@ async def cancel_appointment(callback: CallbackQuery, session: AsyncSession):
     if client and client.telegram_id:
         # Get language as string (handle both enum and string)
         lang = str(client.language.value) if hasattr(client.language, 'value') else str(client.language) if client.language else "uk"
-        logger.info(f"Sending cancellation to client {client.telegram_id}, lang={lang}")
+        logger.info(f"Queueing cancellation to client {client.telegram_id}, lang={lang}")
 
-        await notify_client_appointment_cancelled(
+        notify_client_appointment_cancelled(
+            session,
             client_telegram_id=client.telegram_id,
             service_name=service.name,
             appointment_date=appt.date.strftime("%d.%m.%Y"),
@@ -244,6 +242,12 @@ async def cancel_appointment(callback: CallbackQuery, session: AsyncSession):
     else:
         logger.warning(f"Cannot send cancellation: client={client}, telegram_id={client.telegram_id if client else None}")
 
+    await session.commit()
+
+    text = await format_appointment(session, appt)
+    await callback.message.edit_text(text)
+    await callback.answer("Запис скасовано ❌")
+
 
 @router.callback_query(F.data.startswith("complete_"))
 async def complete_appointment(callback: CallbackQuery, session: AsyncSession):
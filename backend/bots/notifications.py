@@ -1,17 +1,60 @@
 """
 Notification utilities for sending messages via Telegram bots
+
+notify_* functions render the message and add it to the notification
+outbox in the caller's session, so it is committed together with the
+appointment change. The dispatcher (bots/outbox.py) sends it afterwards.
+
+The dispatcher is the only process that sends: it keeps its Bots in a
+registry, one per token, so every send reuses the same aiohttp session and
+its open connections to api.telegram.org, and closes them on shutdown
+(close_bots).
 """
 import logging
+from typing import Optional
 
 from aiogram import Bot
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.core.config import settings
+from app.models.notification_outbox import NotificationOutbox, NotificationBot
 
 logger = logging.getLogger(__name__)
 
+_bots: dict[str, Bot] = {}
+
+
+def get_bot(token: str) -> Bot:
+    """Shared Bot for a token (created on first use)."""
+    bot = _bots.get(token)
+    if bot is None:
+        bot = Bot(
+            token=token,
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+        )
+        _bots[token] = bot
+    return bot
+
+
+def bot_token(bot: str) -> Optional[str]:
+    """Token of a NotificationBot."""
+    if bot == NotificationBot.DOCTOR.value:
+        return settings.DOCTOR_BOT_TOKEN
+    if bot == NotificationBot.CLIENT.value:
+        return settings.CLIENT_BOT_TOKEN
+    return None
+
+
+async def close_bots() -> None:
+    """Close sessions of all bots in the registry."""
+    while _bots:
+        _, bot = _bots.popitem()
+        await bot.session.close()
+
 
 def appointment_action_keyboard(appointment_id: int) -> InlineKeyboardMarkup:
     """Inline keyboard for appointment actions"""
@@ -31,7 +74,26 @@ def appointment_action_keyboard(appointment_id: int) -> InlineKeyboardMarkup:
     )
 
 
-async def notify_doctor_new_appointment(
+def enqueue_message(
+    db: AsyncSession,
+    bot: NotificationBot,
+    chat_id: int,
+    text: str,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+) -> NotificationOutbox:
+    """Add a message to the outbox. Sent after the caller commits."""
+    notification = NotificationOutbox(
+        bot=bot.value,
+        chat_id=chat_id,
+        text=text,
+        reply_markup=reply_markup.model_dump(mode="json", exclude_none=True) if reply_markup else None,
+    )
+    db.add(notification)
+    return notification
+
+
+def notify_doctor_new_appointment(
+    db: AsyncSession,
     doctor_telegram_id: int,
     client_name: str,
     service_name: str,
@@ -39,34 +101,25 @@ async def notify_doctor_new_appointment(
     appointment_time: str,
     appointment_id: int = None,
 ):
-    """Send notification to doctor about new appointment"""
+    """Queue notification to doctor about new appointment"""
     if not settings.DOCTOR_BOT_TOKEN or not doctor_telegram_id:
         return
 
-    bot = Bot(
-        token=settings.DOCTOR_BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    message = (
+        f"🆕 <b>Новий запис!</b>\n\n"
+        f"👤 Клієнт: {client_name}\n"
+        f"💆 Послуга: {service_name}\n"
+        f"📅 Дата: {appointment_date}\n"
+        f"🕐 Час: {appointment_time}"
     )
 
-    try:
-        message = (
-            f"🆕 <b>Новий запис!</b>\n\n"
-            f"👤 Клієнт: {client_name}\n"
-            f"💆 Послуга: {service_name}\n"
-            f"📅 Дата: {appointment_date}\n"
-            f"🕐 Час: {appointment_time}"
-        )
-
-        # Add action buttons if appointment_id provided
-        keyboard = appointment_action_keyboard(appointment_id) if appointment_id else None
-        await bot.send_message(doctor_telegram_id, message, reply_markup=keyboard)
-    except Exception as e:
-        print(f"Failed to send notification to doctor: {e}")
-    finally:
-        await bot.session.close()
+    # Add action buttons if appointment_id provided
+    keyboard = appointment_action_keyboard(appointment_id) if appointment_id else None
+    enqueue_message(db, NotificationBot.DOCTOR, doctor_telegram_id, message, keyboard)
 
 
-async def notify_client_appointment_confirmed(
+def notify_client_appointment_confirmed(
+    db: AsyncSession,
     client_telegram_id: int,
     doctor_name: str,
     service_name: str,
@@ -74,9 +127,7 @@ async def notify_client_appointment_confirmed(
     appointment_time: str,
     lang: str = "uk",
 ):
-    """Send notification to client that appointment is confirmed"""
-    logger.info(f"notify_client_appointment_confirmed called: client_id={client_telegram_id}, lang={lang}")
-
+    """Queue notification to client that appointment is confirmed"""
     if not settings.CLIENT_BOT_TOKEN:
         logger.error("CLIENT_BOT_TOKEN is not set!")
         return
@@ -85,11 +136,6 @@ async def notify_client_appointment_confirmed(
         logger.error("client_telegram_id is empty!")
         return
 
-    bot = Bot(
-        token=settings.CLIENT_BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-    )
-
     messages = {
         "uk": (
             f"✅ <b>Ваш запис підтверджено!</b>\n\n"
@@ -117,33 +163,23 @@ async def notify_client_appointment_confirmed(
         ),
     }
 
-    try:
-        message = messages.get(lang, messages["uk"])
-        logger.info(f"Sending message to client {client_telegram_id}")
-        await bot.send_message(client_telegram_id, message)
-        logger.info(f"Message sent successfully to client {client_telegram_id}")
-    except Exception as e:
-        logger.exception(f"Failed to send notification to client {client_telegram_id}: {e}")
-    finally:
-        await bot.session.close()
+    message = messages.get(lang, messages["uk"])
+    enqueue_message(db, NotificationBot.CLIENT, client_telegram_id, message)
+    logger.info(f"Queued confirmation for client {client_telegram_id}")
 
 
-async def notify_client_appointment_cancelled(
+def notify_client_appointment_cancelled(
+    db: AsyncSession,
     client_telegram_id: int,
     service_name: str,
     appointment_date: str,
     appointment_time: str,
     lang: str = "uk",
 ):
-    """Send notification to client that appointment is cancelled"""
+    """Queue notification to client that appointment is cancelled"""
     if not settings.CLIENT_BOT_TOKEN or not client_telegram_id:
         return
 
-    bot = Bot(
-        token=settings.CLIENT_BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-    )
-
     messages = {
         "uk": (
             f"❌ <b>Ваш запис скасовано</b>\n\n"
@@ -168,16 +204,12 @@ async def notify_client_appointment_cancelled(
         ),
     }
 
-    try:
-        message = messages.get(lang, messages["uk"])
-        await bot.send_message(client_telegram_id, message)
-    except Exception as e:
-        print(f"Failed to send notification to client: {e}")
-    finally:
-        await bot.session.close()
+    message = messages.get(lang, messages["uk"])
+    enqueue_message(db, NotificationBot.CLIENT, client_telegram_id, message)
 
 
-async def notify_doctor_client_cancelled(
+def notify_doctor_client_cancelled(
+    db: AsyncSession,
     doctor_telegram_id: int,
     client_name: str,
     service_name: str,
@@ -185,15 +217,10 @@ async def notify_doctor_client_cancelled(
     appointment_time: str,
     cancellation_reason: str = None,
 ):
-    """Send notification to doctor that client cancelled appointment"""
+    """Queue notification to doctor that client cancelled appointment"""
     if not settings.DOCTOR_BOT_TOKEN or not doctor_telegram_id:
         return
 
-    bot = Bot(
-        token=settings.DOCTOR_BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-    )
-
     reason_text = f"\n\n💬 <i>Причина: {cancellation_reason}</i>" if cancellation_reason else ""
 
     message = (
@@ -205,9 +232,4 @@ async def notify_doctor_client_cancelled(
         f"{reason_text}"
     )
 
-    try:
-        await bot.send_message(doctor_telegram_id, message)
-    except Exception as e:
-        print(f"Failed to send notification to doctor: {e}")
-    finally:
-        await bot.session.close()
+    enqueue_message(db, NotificationBot.DOCTOR, doctor_telegram_id, message)
@@ -0,0 +1,231 @@
+"""
+Notification outbox dispatcher.
+
+Drains notification_outbox: claims due messages with
+SELECT ... FOR UPDATE SKIP LOCKED, sends them concurrently through the
+shared bots and records the result. Sends are spaced to stay within
+Telegram's limits (about 30 messages/s per bot, 1 message/s per chat).
+Failed sends are retried with exponential backoff, RetryAfter from
+Telegram is honoured.
+
+Run exactly one dispatcher process (the notification-dispatcher service):
+    python -m bots.outbox
+
+The rate limiter lives in the process, a second dispatcher would double
+the send rate per bot and run into Telegram's 429s.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_session_maker
+from app.models.notification_outbox import NotificationOutbox, NotificationStatus
+from bots.notifications import get_bot, bot_token, close_bots
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1.0  # Seconds between outbox polls when idle
+BATCH_SIZE = 100  # Messages claimed per poll
+CLAIM_LEASE = timedelta(minutes=5)  # Claimed messages are retried after this if the dispatcher dies
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 5  # Seconds, doubled after every failed attempt
+BACKOFF_MAX = 3600
+
+BOT_MESSAGES_PER_SECOND = 25  # Telegram allows ~30/s per bot
+CHAT_MESSAGE_INTERVAL = 1.0  # Seconds between messages to one chat
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next attempt after `attempts` failures."""
+    return timedelta(seconds=min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX))
+
+
+class RateLimiter:
+    """Spaces sends per bot and per chat.
+
+    wait() reserves the next free send time under a lock, then sleeps until
+    it, so concurrent senders queue up instead of bursting.
+    """
+
+    def __init__(self, per_second: float, chat_interval: float):
+        self._interval = 1 / per_second
+        self._chat_interval = chat_interval
+        self._next_bot: dict[str, float] = defaultdict(float)
+        self._next_chat: dict[tuple[str, int], float] = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, bot: str, chat_id: int) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next_bot[bot], self._next_chat.get((bot, chat_id), 0.0))
+            self._next_bot[bot] = at + self._interval
+            self._next_chat[(bot, chat_id)] = at + self._chat_interval
+
+            if len(self._next_chat) > 10000:
+                self._next_chat = {k: v for k, v in self._next_chat.items() if v > now}
+
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+async def queue_depth(db: AsyncSession) -> dict[str, int]:
+    """Number of pending messages, and how many of them are due now."""
+    result = await db.execute(
+        select(
+            func.count(),
+            func.count().filter(NotificationOutbox.next_attempt_at <= func.now()),
+        ).where(NotificationOutbox.status == NotificationStatus.PENDING.value)
+    )
+    pending, due = result.one()
+    return {"pending": pending, "due": due}
+
+
+async def claim_batch() -> list[NotificationOutbox]:
+    """Claim due messages by moving next_attempt_at past the lease."""
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(NotificationOutbox)
+            .where(
+                NotificationOutbox.status == NotificationStatus.PENDING.value,
+                NotificationOutbox.next_attempt_at <= func.now(),
+            )
+            .order_by(NotificationOutbox.id)
+            .limit(BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        batch = list(result.scalars().all())
+        for notification in batch:
+            notification.next_attempt_at = utcnow() + CLAIM_LEASE
+        await db.commit()
+        return batch
+
+
+async def record_result(notification_id: int, values: dict) -> None:
+    async with async_session_maker() as db:
+        await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id == notification_id)
+            .values(**values)
+        )
+        await db.commit()
+
+
+async def send_one(notification: NotificationOutbox, limiter: RateLimiter) -> None:
+    """Send one message and record the outcome."""
+    attempts = notification.attempts + 1
+    token = bot_token(notification.bot)
+    if not token:
+        await record_result(notification.id, {
+            "status": NotificationStatus.FAILED.value,
+            "attempts": attempts,
+            "last_error": f"Bot '{notification.bot}' is not configured",
+        })
+        return
+
+    reply_markup = (
+        InlineKeyboardMarkup.model_validate(notification.reply_markup)
+        if notification.reply_markup else None
+    )
+
+    await limiter.wait(notification.bot, notification.chat_id)
+    try:
+        await get_bot(token).send_message(
+            notification.chat_id, notification.text, reply_markup=reply_markup
+        )
+    except TelegramRetryAfter as e:
+        # Flood control - not the message's fault, try again when allowed
+        await record_result(notification.id, {
+            "next_attempt_at": utcnow() + timedelta(seconds=e.retry_after),
+            "last_error": str(e),
+        })
+        return
+    except (TelegramForbiddenError, TelegramBadRequest) as e:
+        # Bot blocked or chat not found - retrying won't help
+        logger.warning("Notification %s rejected: %s", notification.id, e)
+        await record_result(notification.id, {
+            "status": NotificationStatus.FAILED.value,
+            "attempts": attempts,
+            "last_error": str(e),
+        })
+        return
+    except Exception as e:
+        logger.warning("Notification %s failed (attempt %s): %s", notification.id, attempts, e)
+        values = {"attempts": attempts, "last_error": str(e)}
+        if attempts >= MAX_ATTEMPTS:
+            values["status"] = NotificationStatus.FAILED.value
+        else:
+            values["next_attempt_at"] = utcnow() + retry_delay(attempts)
+        await record_result(notification.id, values)
+        return
+
+    await record_result(notification.id, {
+        "status": NotificationStatus.SENT.value,
+        "attempts": attempts,
+        "sent_at": utcnow(),
+        "last_error": None,
+    })
+
+
+async def send_chat(notifications: list[NotificationOutbox], limiter: RateLimiter) -> None:
+    """Send one chat's messages in order."""
+    for notification in notifications:
+        try:
+            await send_one(notification, limiter)
+        except Exception:
+            # Recording failed - the lease expires and the message is retried
+            logger.exception("Failed to process notification %s", notification.id)
+
+
+async def dispatch_batch(limiter: RateLimiter) -> int:
+    """Claim and send one batch. Returns the number of messages claimed."""
+    batch = await claim_batch()
+    if not batch:
+        return 0
+
+    by_chat: dict[tuple[str, int], list[NotificationOutbox]] = defaultdict(list)
+    for notification in batch:
+        by_chat[(notification.bot, notification.chat_id)].append(notification)
+
+    await asyncio.gather(*(send_chat(items, limiter) for items in by_chat.values()))
+    return len(batch)
+
+
+async def run_dispatcher(limiter: Optional[RateLimiter] = None) -> None:
+    """Drain the outbox forever."""
+    limiter = limiter or RateLimiter(BOT_MESSAGES_PER_SECOND, CHAT_MESSAGE_INTERVAL)
+    logger.info("Notification dispatcher started")
+
+    while True:
+        try:
+            sent = await dispatch_batch(limiter)
+        except Exception:
+            logger.exception("Notification dispatch failed")
+            sent = 0
+
+        # A full batch means more messages are probably waiting
+        if sent < BATCH_SIZE:
+            await asyncio.sleep(POLL_INTERVAL)
+
+
+async def main() -> None:
+    try:
+        await run_dispatcher()
+    finally:
+        await close_bots()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
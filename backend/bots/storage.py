@@ -0,0 +1,34 @@
+"""
+FSM storage for the bots.
+
+With REDIS_URL set, FSM state lives in Redis, so in-progress conversations
+survive restarts and several replicas of a bot can poll side by side.
+Without it (local development, tests) state is kept in process memory.
+"""
+import logging
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+STATE_TTL = 60 * 60 * 24  # Seconds; abandoned conversations expire after a day
+
+
+def create_storage(prefix: str) -> BaseStorage:
+    """FSM storage for a bot; `prefix` keeps the bots' keys apart."""
+    if not settings.REDIS_URL:
+        logger.info("REDIS_URL is not set, using in-memory FSM storage")
+        return MemoryStorage()
+
+    # Imported here so the redis package is only needed when it is used
+    from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
+
+    return RedisStorage.from_url(
+        settings.REDIS_URL,
+        key_builder=DefaultKeyBuilder(prefix=prefix, with_bot_id=True),
+        state_ttl=STATE_TTL,
+        data_ttl=STATE_TTL,
+    )
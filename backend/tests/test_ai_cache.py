@@ -0,0 +1,84 @@
+"""AI generation result cache."""
+import asyncio
+import hashlib
+import json
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services import ai_cache
+from app.services.ai_cache import cache_key, get_cached, set_cached
+
+MODEL = "claude-sonnet"
+MESSAGES = [{"role": "user", "content": [{"type": "text", "text": "Make the header blue"}]}]
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_cache, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(settings, "AI_CACHE_MAX_MB", 1)
+    return tmp_path
+
+
+def test_cache_key_is_a_hash_of_the_canonical_request():
+    payload = json.dumps(
+        ["improve-site", MODEL, [MESSAGES]], ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+    )
+    assert cache_key("improve-site", MODEL, MESSAGES) == hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def test_cache_key_ignores_dict_order_and_sequence_type():
+    first = cache_key("generate", MODEL, {"name": "Clinic", "city": "Riga"}, ("a", "b"))
+    second = cache_key("generate", MODEL, {"city": "Riga", "name": "Clinic"}, ["a", "b"])
+    assert first == second
+
+
+def test_cache_key_hashes_bytes():
+    image = b"\x89PNG" + bytes(range(256)) * 100
+    assert cache_key("generate", MODEL, image) == cache_key("generate", MODEL, bytes(image))
+    assert cache_key("generate", MODEL, image) == cache_key(
+        "generate", MODEL, {"sha256": hashlib.sha256(image).hexdigest()}
+    )
+    assert cache_key("generate", MODEL, image) != cache_key("generate", MODEL, image + b"\x00")
+
+
+@pytest.mark.parametrize("other", [
+    ("improve-section", MODEL, MESSAGES),
+    ("improve-site", "claude-opus", MESSAGES),
+    ("improve-site", MODEL, MESSAGES, "system prompt"),
+    ("improve-site", MODEL, [{"role": "user", "content": "Make the header red"}]),
+])
+def test_cache_key_changes_with_any_part(other):
+    assert cache_key("improve-site", MODEL, MESSAGES) != cache_key(*other)
+
+
+def test_cached_result_round_trip(cache_dir):
+    key = cache_key("improve-site", MODEL, MESSAGES)
+    assert asyncio.run(get_cached(key)) is None
+
+    asyncio.run(set_cached(key, {"html": "<html>é</html>", "usage": {"input_tokens": 10}}))
+    assert asyncio.run(get_cached(key)) == {"html": "<html>é</html>", "usage": {"input_tokens": 10}}
+
+
+def test_cache_disabled(cache_dir, monkeypatch):
+    monkeypatch.setattr(settings, "AI_CACHE_MAX_MB", 0)
+    asyncio.run(set_cached("k" * 64, {"html": "x"}))
+    assert asyncio.run(get_cached("k" * 64)) is None
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_least_recently_used_entries_are_pruned(cache_dir):
+    value = {"html": "x" * 300 * 1024}
+    keys = [cache_key("generate", MODEL, n) for n in range(3)]
+    for age, key in enumerate(keys):
+        asyncio.run(set_cached(key, value))
+        path = ai_cache._cache_file(key)
+        os.utime(path, (1000 + age, 1000 + age))
+
+    # Reading the oldest entry makes it the most recently used
+    assert asyncio.run(get_cached(keys[0])) == value
+
+    asyncio.run(set_cached(cache_key("generate", MODEL, 3), value))
+    assert asyncio.run(get_cached(keys[1])) is None
+    assert asyncio.run(get_cached(keys[0])) == value
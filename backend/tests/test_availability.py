@@ -0,0 +1,169 @@
+"""Availability engine against the slot loop it replaced."""
+import random
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.models.schedule import ScheduleExceptionType
+from app.services.availability import (
+    MINUTES_PER_DAY,
+    build_availability,
+    compute_slots,
+    day_mask,
+    free_intervals,
+)
+
+DATE_FROM = date(2026, 3, 2)  # Monday
+DATE_TO = DATE_FROM + timedelta(days=13)
+NOW = datetime(2026, 3, 4, 11, 20, 30)
+
+
+def reference_slots(schedules, exceptions, appointments, duration, date_from, date_to, now):
+    """The per-candidate loop of get_available_slots before the engine."""
+    schedules = {s.day_of_week: s for s in schedules}
+    day_exceptions = {}
+    breaks_by_date = {}
+    for e in exceptions:
+        if e.type == ScheduleExceptionType.BREAK:
+            breaks_by_date.setdefault(e.date, []).append(e)
+        else:
+            day_exceptions[e.date] = e
+    appointments_by_date = {}
+    for appt in appointments:
+        appointments_by_date.setdefault(appt.date, []).append(appt)
+
+    slots = []
+    slot_duration = timedelta(minutes=duration)
+    current_date = date_from
+    while current_date <= date_to:
+        schedule = schedules.get(current_date.weekday())
+        day_exception = day_exceptions.get(current_date)
+        day_start_time = day_end_time = None
+
+        if day_exception:
+            if day_exception.type == ScheduleExceptionType.DAY_OFF:
+                current_date += timedelta(days=1)
+                continue
+            if day_exception.start_time and day_exception.end_time:
+                day_start_time = day_exception.start_time
+                day_end_time = day_exception.end_time
+        elif schedule and schedule.is_working_day:
+            day_start_time = schedule.start_time
+            day_end_time = schedule.end_time
+
+        if day_start_time and day_end_time:
+            current_time = datetime.combine(current_date, day_start_time)
+            end_time = datetime.combine(current_date, day_end_time)
+            busy = appointments_by_date.get(current_date, []) + breaks_by_date.get(current_date, [])
+
+            while current_time + slot_duration <= end_time:
+                slot_start = current_time.time()
+                slot_end = (current_time + slot_duration).time()
+                available = all(
+                    slot_end <= b.start_time or slot_start >= b.end_time for b in busy
+                )
+                if current_date == now.date() and slot_start <= now.time():
+                    available = False
+                if available:
+                    slots.append((current_date, slot_start, slot_end))
+                current_time += timedelta(minutes=30)
+
+        current_date += timedelta(days=1)
+
+    return slots
+
+
+def random_time(rng: random.Random, first_hour: int, last_hour: int) -> time:
+    return time(rng.randint(first_hour, last_hour), rng.choice(range(0, 60, 5)))
+
+
+def random_interval(rng: random.Random) -> tuple[time, time]:
+    """A non-empty interval within the day."""
+    start = random_time(rng, 7, 20)
+    length = rng.choice(range(5, 180, 5))
+    end_minutes = min(start.hour * 60 + start.minute + length, MINUTES_PER_DAY - 1)
+    return start, time(end_minutes // 60, end_minutes % 60)
+
+
+def random_doctor(rng: random.Random):
+    schedules = [
+        SimpleNamespace(
+            day_of_week=dow,
+            is_working_day=rng.random() < 0.8,
+            start_time=random_time(rng, 7, 10),
+            end_time=random_time(rng, 16, 21),
+        )
+        for dow in range(7)
+    ]
+
+    exceptions = []
+    appointments = []
+    for offset in range((DATE_TO - DATE_FROM).days + 1):
+        day = DATE_FROM + timedelta(days=offset)
+        roll = rng.random()
+        if roll < 0.1:
+            exceptions.append(SimpleNamespace(
+                date=day, type=ScheduleExceptionType.DAY_OFF, start_time=None, end_time=None,
+            ))
+        elif roll < 0.25:
+            exceptions.append(SimpleNamespace(
+                date=day,
+                type=rng.choice([ScheduleExceptionType.MODIFIED, ScheduleExceptionType.WORKING]),
+                start_time=random_time(rng, 8, 11),
+                end_time=random_time(rng, 14, 19),
+            ))
+        for _ in range(rng.randint(0, 2)):
+            start, end = random_interval(rng)
+            exceptions.append(SimpleNamespace(
+                date=day, type=ScheduleExceptionType.BREAK, start_time=start, end_time=end,
+            ))
+        for _ in range(rng.randint(0, 6)):
+            start, end = random_interval(rng)
+            appointments.append(SimpleNamespace(date=day, start_time=start, end_time=end))
+
+    return schedules, exceptions, appointments
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_compute_slots_matches_reference(seed):
+    rng = random.Random(seed)
+    schedules, exceptions, appointments = random_doctor(rng)
+    duration = rng.choice([15, 30, 45, 60, 90])
+
+    availability = build_availability(schedules, exceptions, appointments)
+    slots = compute_slots(availability, duration, DATE_FROM, DATE_TO, now=NOW)
+
+    assert slots == reference_slots(
+        schedules, exceptions, appointments, duration, DATE_FROM, DATE_TO, NOW
+    )
+
+
+def test_day_mask_busy_intervals():
+    mask = day_mask(9 * 60, 18 * 60, [(time(10, 0), time(11, 30)), (time(11, 0), time(12, 0))])
+    starts, ends = free_intervals(mask)
+    assert starts.tolist() == [9 * 60, 12 * 60]
+    assert ends.tolist() == [10 * 60, 18 * 60]
+
+
+def test_day_mask_end_at_midnight_blocks_rest_of_day():
+    mask = day_mask(9 * 60, 23 * 60, [(time(20, 0), time(0, 0))])
+    starts, ends = free_intervals(mask)
+    assert starts.tolist() == [9 * 60]
+    assert ends.tolist() == [20 * 60]
+
+
+def test_day_mask_ignores_zero_length_intervals():
+    mask = day_mask(9 * 60, 18 * 60, [(time(12, 0), time(12, 0))])
+    assert np.array_equal(mask, day_mask(9 * 60, 18 * 60, []))
+
+
+def test_compute_slots_skips_past_slots_today():
+    schedules = [
+        SimpleNamespace(day_of_week=dow, is_working_day=True, start_time=time(9), end_time=time(13))
+        for dow in range(7)
+    ]
+    availability = build_availability(schedules, [], [])
+    slots = compute_slots(availability, 60, NOW.date(), NOW.date(), now=NOW)
+    assert [start for _, start, _ in slots] == [time(11, 30), time(12, 0)]
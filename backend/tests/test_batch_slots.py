@@ -0,0 +1,131 @@
+"""Batch availability loading for several specialists."""
+import asyncio
+from datetime import date, time, timedelta
+
+import pytest
+
+import app.models  # noqa: F401 - configures the mappers of the related models
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.schedule import Schedule, ScheduleException, ScheduleExceptionType
+from app.models.slot_hold import SlotHold
+from app.services import slot_holds
+from app.services.availability import (
+    build_availability,
+    compute_slots,
+    load_availability,
+    load_availability_many,
+)
+
+DATE_FROM = date(2026, 3, 2)  # Monday
+DATE_TO = DATE_FROM + timedelta(days=6)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    """Answers each SELECT with the stored rows of its entity."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        entity = statement.column_descriptions[0]["entity"]
+        return FakeResult([row for row in self.rows if isinstance(row, entity)])
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(slot_holds, "get_redis", lambda: None)
+
+
+def week(doctor_id: int, start: time, end: time) -> list[Schedule]:
+    return [
+        Schedule(doctor_id=doctor_id, day_of_week=dow, is_working_day=dow < 5, start_time=start, end_time=end)
+        for dow in range(7)
+    ]
+
+
+def sample_rows() -> list:
+    rows = week(1, time(9), time(17)) + week(2, time(12), time(20))
+    rows += [
+        ScheduleException(doctor_id=1, date=DATE_FROM, type=ScheduleExceptionType.DAY_OFF),
+        ScheduleException(
+            doctor_id=2, date=DATE_FROM, type=ScheduleExceptionType.BREAK,
+            start_time=time(14), end_time=time(15),
+        ),
+        Appointment(
+            doctor_id=1, date=DATE_FROM + timedelta(days=1), start_time=time(10), end_time=time(11),
+            status=AppointmentStatus.CONFIRMED,
+        ),
+        Appointment(
+            doctor_id=2, date=DATE_FROM + timedelta(days=1), start_time=time(12), end_time=time(13),
+            status=AppointmentStatus.PENDING,
+        ),
+        SlotHold(
+            doctor_id=2, date=DATE_FROM + timedelta(days=2), start_time=time(16), end_time=time(17),
+            holder="client:1",
+        ),
+    ]
+    return rows
+
+
+def doctor_rows(rows: list, doctor_id: int, model) -> list:
+    return [row for row in rows if isinstance(row, model) and row.doctor_id == doctor_id]
+
+
+def test_load_availability_many_groups_rows_by_doctor():
+    rows = sample_rows()
+    db = FakeSession(rows)
+
+    availability = asyncio.run(load_availability_many(db, [1, 2, 3], DATE_FROM, DATE_TO))
+
+    assert set(availability) == {1, 2, 3}
+    for doctor_id in (1, 2):
+        expected = build_availability(
+            doctor_rows(rows, doctor_id, Schedule),
+            doctor_rows(rows, doctor_id, ScheduleException),
+            doctor_rows(rows, doctor_id, Appointment),
+            [(h.date, h.start_time, h.end_time) for h in doctor_rows(rows, doctor_id, SlotHold)],
+        )
+        assert availability[doctor_id] == expected
+
+    # A specialist without a schedule has no slots
+    assert compute_slots(availability[3], 30, DATE_FROM, DATE_TO) == []
+
+
+def test_load_availability_many_query_count_does_not_depend_on_doctors():
+    few = FakeSession(sample_rows())
+    asyncio.run(load_availability_many(few, [1], DATE_FROM, DATE_TO))
+
+    many = FakeSession(sample_rows())
+    asyncio.run(load_availability_many(many, list(range(1, 51)), DATE_FROM, DATE_TO))
+
+    assert few.queries == many.queries == 4
+
+
+def test_load_availability_many_without_doctors_skips_queries():
+    db = FakeSession(sample_rows())
+    assert asyncio.run(load_availability_many(db, [], DATE_FROM, DATE_TO)) == {}
+    assert db.queries == 0
+
+
+def test_batch_slots_match_single_doctor_slots():
+    rows = sample_rows()
+    batch = asyncio.run(load_availability_many(FakeSession(rows), [1, 2], DATE_FROM, DATE_TO))
+
+    for doctor_id in (1, 2):
+        single = asyncio.run(load_availability(FakeSession(rows), doctor_id, DATE_FROM, DATE_TO))
+        assert compute_slots(batch[doctor_id], 60, DATE_FROM, DATE_TO) == compute_slots(
+            single, 60, DATE_FROM, DATE_TO
+        )
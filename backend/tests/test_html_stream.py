@@ -0,0 +1,66 @@
+"""Incremental HTML extraction from streamed model output."""
+import pytest
+
+from app.services.site_generation import HtmlStreamExtractor, extract_html_content
+
+PAGE = (
+    "<!DOCTYPE html>\n<html>\n<head><title>Clinic</title></head>\n"
+    "<body><p>Book `now`</p></body>\n</html>"
+)
+
+RESPONSES = [
+    PAGE,
+    f"Here is the page:\n\n```html\n{PAGE}\n```\n\nLet me know if you need changes.",
+    f"```html\n{PAGE}\n```",
+    f"{PAGE}\n\nThe page uses a single </html> tag.",
+    f"{PAGE}\n<!-- trailing -->\n</html>",
+    "<!doctype html><html><body>unterminated",
+    f"Notes:\n```\nnothing\n```\n{PAGE}",
+    "No HTML at all, sorry.",
+]
+
+
+def stream(text: str, chunk_sizes) -> str:
+    extractor = HtmlStreamExtractor()
+    out = []
+    pos = 0
+    for size in chunk_sizes:
+        out.append(extractor.feed(text[pos:pos + size]))
+        pos += size
+    out.append(extractor.feed(text[pos:]))
+    out.append(extractor.finish())
+    return "".join(out)
+
+
+@pytest.mark.parametrize("text", RESPONSES)
+def test_single_chunk_matches_extract_html_content(text):
+    assert stream(text, []).rstrip() == extract_html_content(text)
+
+
+@pytest.mark.parametrize("text", RESPONSES)
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 13])
+def test_fixed_chunks_match_extract_html_content(text, size):
+    assert stream(text, [size] * (len(text) // size)).rstrip() == extract_html_content(text)
+
+
+@pytest.mark.parametrize("text", RESPONSES)
+def test_every_split_point_matches_extract_html_content(text):
+    expected = extract_html_content(text)
+    for split in range(len(text) + 1):
+        assert stream(text, [split]).rstrip() == expected, split
+
+
+def test_html_is_emitted_before_the_stream_ends():
+    extractor = HtmlStreamExtractor()
+    assert extractor.feed("Sure!\n```html\n<!DOC") == ""
+    emitted = extractor.feed("TYPE html>\n<html><body>" + "x" * 100)
+    assert emitted.startswith("<!DOCTYPE html>")
+
+
+def test_marker_split_across_chunks_is_held_back():
+    extractor = HtmlStreamExtractor()
+    emitted = extractor.feed("<!DOCTYPE html><html><body></body></ht")
+    assert "</ht" not in emitted
+    emitted += extractor.feed("ml>\n``")
+    emitted += extractor.feed("`\nExplanation.")
+    assert emitted + extractor.finish() == "<!DOCTYPE html><html><body></body></html>"
@@ -0,0 +1,56 @@
+"""ETag and conditional GET helpers."""
+import pytest
+from fastapi import HTTPException, Request, Response
+
+from app.utils.http_cache import PUBLIC_CACHE_CONTROL, check_etag, etag_matches, make_etag
+
+
+def make_request(if_none_match=None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_make_etag_is_weak_and_stable():
+    assert make_etag("services", 3, 17) == 'W/"services-3-17"'
+    assert make_etag("services", 3, 17) == make_etag("services", 3, 17)
+    assert make_etag("services", 3, 17) != make_etag("services", 3, 18)
+
+
+@pytest.mark.parametrize("header", [
+    'W/"services-3-17"',
+    '"services-3-17"',
+    'W/"other", W/"services-3-17"',
+    ' W/"other" ,"services-3-17" ',
+    "*",
+])
+def test_etag_matches(header):
+    assert etag_matches(make_request(header), make_etag("services", 3, 17))
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    'W/"services-3-18"',
+    'W/"services-3-1"',
+    'W/"other", "services-3"',
+])
+def test_etag_does_not_match(header):
+    assert not etag_matches(make_request(header), make_etag("services", 3, 17))
+
+
+def test_check_etag_answers_not_modified():
+    etag = make_etag("company", 5)
+    with pytest.raises(HTTPException) as exc_info:
+        check_etag(make_request(etag), Response(), etag, PUBLIC_CACHE_CONTROL)
+    assert exc_info.value.status_code == 304
+    assert exc_info.value.headers == {"ETag": etag, "Cache-Control": PUBLIC_CACHE_CONTROL}
+
+
+def test_check_etag_sets_caching_headers():
+    etag = make_etag("company", 5)
+    response = Response()
+    check_etag(make_request('W/"company-4"'), response, etag, PUBLIC_CACHE_CONTROL)
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == PUBLIC_CACHE_CONTROL
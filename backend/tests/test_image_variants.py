@@ -0,0 +1,108 @@
+"""Derived image variants."""
+import pytest
+from PIL import Image
+
+from app.services import image_variants
+from app.services.image_variants import (
+    VARIANTS_DIRNAME,
+    derive_variants,
+    has_variants,
+    remove_variants,
+    resolve_variant_url,
+    upload_path,
+)
+
+URL = "/static/uploads/services/abc.jpg"
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_variants, "UPLOADS_DIR", tmp_path.resolve())
+    (tmp_path / "services").mkdir()
+    return tmp_path / "services"
+
+
+def variant_names(directory) -> set[str]:
+    return {path.name for path in (directory / VARIANTS_DIRNAME).iterdir()}
+
+
+def test_variants_below_original_width(uploads):
+    Image.new("RGB", (700, 350), (200, 40, 40)).save(uploads / "abc.jpg", "JPEG")
+
+    assert derive_variants(str(uploads / "abc.jpg")) == 4
+    assert variant_names(uploads) == {
+        f"abc_{label}{ext}" for label in ("160", "320", "640", "full") for ext in (".webp", ".jpg")
+    }
+    with Image.open(uploads / VARIANTS_DIRNAME / "abc_320.webp") as variant:
+        assert variant.size == (320, 160)
+    with Image.open(uploads / VARIANTS_DIRNAME / "abc_full.jpg") as variant:
+        assert variant.size == (700, 350)
+
+
+def test_exif_orientation_is_applied_and_stripped(uploads):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotated 90° clockwise
+    exif[0x010F] = "Camera"
+    Image.new("RGB", (200, 100)).save(uploads / "abc.jpg", "JPEG", exif=exif)
+
+    derive_variants(str(uploads / "abc.jpg"))
+
+    with Image.open(uploads / "abc.jpg") as original:
+        assert original.size == (100, 200)
+        assert "exif" not in original.info
+    with Image.open(uploads / VARIANTS_DIRNAME / "abc_full.jpg") as variant:
+        assert variant.size == (100, 200)
+        assert not variant.getexif()
+
+
+def test_transparent_png_is_flattened_for_jpeg(uploads):
+    Image.new("RGBA", (200, 200), (0, 0, 0, 0)).save(uploads / "abc.png", "PNG")
+
+    derive_variants(str(uploads / "abc.png"))
+
+    with Image.open(uploads / VARIANTS_DIRNAME / "abc_full.jpg") as variant:
+        assert variant.mode == "RGB"
+        assert variant.getpixel((0, 0)) == (255, 255, 255)
+    with Image.open(uploads / VARIANTS_DIRNAME / "abc_full.webp") as variant:
+        assert variant.mode == "RGBA"
+
+
+def test_animation_is_passed_through(uploads):
+    frames = [Image.new("RGB", (300, 300), color) for color in ("red", "blue")]
+    frames[0].save(uploads / "abc.gif", save_all=True, append_images=frames[1:])
+
+    assert derive_variants(str(uploads / "abc.gif")) == 0
+    assert variant_names(uploads) == {"abc_passthrough"}
+
+    url = "/static/uploads/services/abc.gif"
+    assert has_variants(url)
+    assert resolve_variant_url(url, 640) == url
+
+
+def test_resolve_variant_url(uploads):
+    Image.new("RGB", (1000, 500)).save(uploads / "abc.jpg", "JPEG")
+    assert not has_variants(URL)
+    assert resolve_variant_url(URL, 640) == URL
+
+    derive_variants(str(uploads / "abc.jpg"))
+
+    assert has_variants(URL)
+    assert resolve_variant_url(URL, 300) == "/static/uploads/services/variants/abc_320.webp"
+    assert resolve_variant_url(URL, 640, "jpeg") == "/static/uploads/services/variants/abc_640.jpg"
+    # No 1280 variant of a 1000px image - the full size one is the smallest that fits
+    assert resolve_variant_url(URL, 1000) == "/static/uploads/services/variants/abc_full.webp"
+
+    remove_variants(URL)
+    assert not has_variants(URL)
+    assert (uploads / "abc.jpg").exists()
+
+
+@pytest.mark.parametrize("url", [
+    None,
+    "https://example.com/abc.jpg",
+    "/static/uploads/../secret.jpg",
+    "/static/uploads/services/variants/abc_320.webp",
+])
+def test_upload_path_rejects_other_urls(uploads, url):
+    assert upload_path(url) is None
+    assert resolve_variant_url(url, 640) == url
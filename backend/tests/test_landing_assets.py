@@ -0,0 +1,72 @@
+"""Precompressed landing pages."""
+import gzip
+
+import pytest
+from sqlalchemy import inspect
+
+import app.models  # noqa: F401 - configures the mappers of the related models
+from app.models.company import Company
+from app.services import landing_assets
+from app.services.landing_assets import choose_encoding, landing_digest, landing_file, write_landing_files
+
+HTML = "<!DOCTYPE html><html><body>" + "Clinic " * 500 + "</body></html>"
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    monkeypatch.setattr(landing_assets, "brotli", object())
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(landing_assets, "brotli", None)
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate, br", "br"),
+    ("br;q=1.0, gzip;q=0.8", "br"),
+    ("gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("*", "br"),
+    ("*, br;q=0", "gzip"),
+    ("deflate", None),
+    ("gzip;q=0", None),
+    ("gzip;q=abc", None),
+    ("", None),
+    (None, None),
+])
+def test_choose_encoding(with_brotli, accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_choose_encoding_without_brotli(without_brotli):
+    assert choose_encoding("br") is None
+    assert choose_encoding("gzip, br") == "gzip"
+
+
+def test_write_landing_files(tmp_path, monkeypatch, without_brotli):
+    monkeypatch.setattr(landing_assets, "LANDING_DIR", tmp_path)
+
+    old_digest = write_landing_files(1, "<html>old</html>")
+    digest = write_landing_files(1, HTML)
+
+    assert digest == landing_digest(HTML)
+    assert landing_file(1, digest).read_text(encoding="utf-8") == HTML
+    assert gzip.decompress(landing_file(1, digest, "gzip").read_bytes()).decode("utf-8") == HTML
+    # Pages of the previous version are removed
+    assert not landing_file(1, old_digest).exists()
+    assert not landing_file(1, old_digest, "gzip").exists()
+
+
+def test_gzip_output_is_deterministic(tmp_path, monkeypatch, without_brotli):
+    monkeypatch.setattr(landing_assets, "LANDING_DIR", tmp_path)
+
+    digest = write_landing_files(1, HTML)
+    first = landing_file(1, digest, "gzip").read_bytes()
+    write_landing_files(1, HTML)
+    assert landing_file(1, digest, "gzip").read_bytes() == first
+
+
+def test_landing_html_is_deferred():
+    assert inspect(Company).attrs.landing_html.deferred
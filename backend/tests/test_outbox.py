@@ -0,0 +1,143 @@
+"""Notification outbox rate limiting and retry backoff."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+import app.models  # noqa: F401 - configures the mappers of the related models
+from app.models.notification_outbox import NotificationOutbox, NotificationStatus
+from bots import outbox
+from bots.outbox import BACKOFF_BASE, BACKOFF_MAX, MAX_ATTEMPTS, RateLimiter, retry_delay
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Freeze the limiter's clock at 0 and record the requested sleeps."""
+    recorded = []
+
+    async def fake_sleep(seconds):
+        recorded.append(round(seconds, 6))
+
+    monkeypatch.setattr(outbox, "time", SimpleNamespace(monotonic=lambda: 0.0))
+    monkeypatch.setattr(outbox.asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+def test_retry_delay_doubles_up_to_the_cap():
+    assert retry_delay(1) == timedelta(seconds=BACKOFF_BASE)
+    assert retry_delay(2) == timedelta(seconds=BACKOFF_BASE * 2)
+    assert retry_delay(3) == timedelta(seconds=BACKOFF_BASE * 4)
+    assert retry_delay(30) == timedelta(seconds=BACKOFF_MAX)
+
+
+def test_rate_limiter_spaces_sends_of_one_bot(sleeps):
+    limiter = RateLimiter(per_second=10, chat_interval=1.0)
+
+    async def send_all():
+        for chat_id in range(4):
+            await limiter.wait("client", chat_id)
+
+    asyncio.run(send_all())
+    assert sleeps == [0.1, 0.2, 0.3]
+
+
+def test_rate_limiter_spaces_sends_to_one_chat(sleeps):
+    limiter = RateLimiter(per_second=10, chat_interval=1.0)
+
+    async def send_all():
+        await limiter.wait("client", 1)
+        await limiter.wait("client", 2)
+        await limiter.wait("client", 1)
+
+    asyncio.run(send_all())
+    # The other chat only waits for the bot's interval
+    assert sleeps == [0.1, 1.0]
+
+
+def test_rate_limiter_bots_are_independent(sleeps):
+    limiter = RateLimiter(per_second=10, chat_interval=1.0)
+
+    async def send_all():
+        await limiter.wait("client", 1)
+        await limiter.wait("doctor", 1)
+
+    asyncio.run(send_all())
+    assert sleeps == []
+
+
+def test_rate_limiter_concurrent_waiters_queue_up(sleeps):
+    limiter = RateLimiter(per_second=5, chat_interval=1.0)
+
+    async def send_all():
+        await asyncio.gather(*(limiter.wait("client", chat_id) for chat_id in range(5)))
+
+    asyncio.run(send_all())
+    assert sorted(sleeps) == [0.2, 0.4, 0.6, 0.8]
+
+
+class NoWait:
+    async def wait(self, bot, chat_id):
+        pass
+
+
+def run_send(monkeypatch, error, attempts=0):
+    """send_one() with a bot raising `error`, returns the recorded values."""
+    recorded = []
+
+    class FakeBot:
+        async def send_message(self, chat_id, text, reply_markup=None):
+            if error:
+                raise error
+
+    async def fake_record_result(notification_id, values):
+        recorded.append(values)
+
+    monkeypatch.setattr(outbox, "bot_token", lambda bot: "token")
+    monkeypatch.setattr(outbox, "get_bot", lambda token: FakeBot())
+    monkeypatch.setattr(outbox, "record_result", fake_record_result)
+    monkeypatch.setattr(outbox, "utcnow", lambda: NOW)
+
+    notification = NotificationOutbox(
+        id=1, bot="client", chat_id=42, text="Reminder", attempts=attempts,
+    )
+    asyncio.run(outbox.send_one(notification, NoWait()))
+    assert len(recorded) == 1
+    return recorded[0]
+
+
+def test_send_one_records_success(monkeypatch):
+    values = run_send(monkeypatch, None)
+    assert values["status"] == NotificationStatus.SENT.value
+    assert values["attempts"] == 1
+    assert values["sent_at"] == NOW
+
+
+def test_send_one_backs_off_after_failure(monkeypatch):
+    values = run_send(monkeypatch, ConnectionError("reset"), attempts=2)
+    assert values["attempts"] == 3
+    assert values["next_attempt_at"] == NOW + retry_delay(3)
+    assert "status" not in values
+
+
+def test_send_one_fails_after_max_attempts(monkeypatch):
+    values = run_send(monkeypatch, ConnectionError("reset"), attempts=MAX_ATTEMPTS - 1)
+    assert values["status"] == NotificationStatus.FAILED.value
+    assert "next_attempt_at" not in values
+
+
+def test_send_one_honours_retry_after(monkeypatch):
+    error = TelegramRetryAfter(method=None, message="Too Many Requests", retry_after=17)
+    values = run_send(monkeypatch, error, attempts=2)
+    # Flood control does not use up an attempt
+    assert "attempts" not in values
+    assert values["next_attempt_at"] == NOW + timedelta(seconds=17)
+
+
+def test_send_one_does_not_retry_blocked_chats(monkeypatch):
+    error = TelegramForbiddenError(method=None, message="bot was blocked by the user")
+    values = run_send(monkeypatch, error)
+    assert values["status"] == NotificationStatus.FAILED.value
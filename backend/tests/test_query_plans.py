@@ -0,0 +1,185 @@
+"""
+Query plans of the hot appointment/schedule queries.
+
+Creates the tables in a scratch Postgres schema (qp_check), seeds a
+realistic dataset (~500k appointments), runs EXPLAIN on each hot query and
+fails if any of them falls back to a sequential scan of a large table. The
+scratch schema is dropped afterwards.
+
+Skipped unless TEST_DATABASE_URL points to a local/dev database (FK
+triggers are disabled while seeding, which needs a superuser):
+    TEST_DATABASE_URL=postgresql+asyncpg://... python -m pytest tests/test_query_plans.py
+"""
+import asyncio
+import json
+import os
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.database import Base
+from app.models import *  # noqa: F401, F403
+from app.models.appointment import Appointment
+from app.models.schedule import Schedule, ScheduleException
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+DOCTORS = 200
+DAYS = 365
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+SCHEMA = "qp_check"
+START_DATE = date(2026, 1, 1)
+ACTIVE_STATUSES = ["pending", "confirmed"]
+
+# A sequential scan of these tables is a regression
+LARGE_TABLES = {"appointments", "schedule_exceptions"}
+
+
+async def seed(conn: AsyncConnection, doctors: int, days: int) -> None:
+    """Seed doctors' schedules, exceptions and ~8 appointments per working day."""
+    params = {"doctors": doctors, "days": days, "start": START_DATE}
+
+    # 20 companies, doctors spread over them, ~50 clients per doctor
+    await conn.execute(text("""
+        INSERT INTO schedules (doctor_id, day_of_week, start_time, end_time, is_working_day)
+        SELECT d, dow, time '09:00', time '18:00', dow < 6
+        FROM generate_series(1, CAST(:doctors AS integer)) d, generate_series(0, 6) dow
+    """), params)
+
+    await conn.execute(text("""
+        INSERT INTO schedule_exceptions (doctor_id, date, type, start_time, end_time)
+        SELECT d, CAST(:start AS date) + day, 'break', time '13:00', time '14:00'
+        FROM generate_series(1, CAST(:doctors AS integer)) d, generate_series(0, CAST(:days AS integer) - 1) day
+        WHERE (d + day) % 3 = 0
+    """), params)
+
+    await conn.execute(text("""
+        INSERT INTO appointments
+            (company_id, doctor_id, client_id, service_id, date, start_time, end_time, status)
+        SELECT
+            d % 20 + 1,
+            d,
+            d * 50 + (day * 8 + slot) % 50,
+            d % 10 + 1,
+            CAST(:start AS date) + day,
+            time '09:00' + slot * interval '1 hour',
+            time '10:00' + slot * interval '1 hour',
+            (ARRAY['completed', 'completed', 'cancelled', 'pending', 'confirmed'])[(d + day + slot) % 5 + 1]
+        FROM generate_series(1, CAST(:doctors AS integer)) d,
+             generate_series(0, CAST(:days AS integer) - 1) day,
+             generate_series(0, 7) slot
+        WHERE extract(isodow FROM CAST(:start AS date) + day) < 7
+    """), params)
+
+    await conn.execute(text("ANALYZE schedules, schedule_exceptions, appointments"))
+
+
+def hot_queries() -> dict[str, object]:
+    """The queries to check, mirroring the ones in the API and bots."""
+    doctor_ids = [1, 2, 3]
+    date_from = START_DATE + timedelta(days=100)
+    date_to = date_from + timedelta(days=14)
+    company_id = 3  # Doctors 2, 22, 42, ... with clients 100-149, 1100-1149, ...
+
+    return {
+        # app/services/availability.py: load_availability_many
+        "slots: active appointments": select(Appointment).where(
+            Appointment.doctor_id.in_(doctor_ids),
+            Appointment.date >= date_from,
+            Appointment.date <= date_to,
+            Appointment.status.in_(ACTIVE_STATUSES),
+        ),
+        "slots: schedule exceptions": select(ScheduleException).where(
+            ScheduleException.doctor_id.in_(doctor_ids),
+            ScheduleException.date >= date_from,
+            ScheduleException.date <= date_to,
+        ),
+        "slots: schedules": select(Schedule).where(Schedule.doctor_id.in_(doctor_ids)),
+        # app/api/v1/appointments.py: get_appointments
+        "appointments list": (
+            select(Appointment)
+            .where(
+                Appointment.company_id == company_id,
+                Appointment.date >= date_from,
+                Appointment.date <= date_to,
+            )
+            .order_by(Appointment.date, Appointment.start_time)
+        ),
+        # app/api/v1/clients.py: get_clients appointment stats
+        "client stats": (
+            select(Appointment.client_id, func.count(Appointment.id))
+            .where(
+                Appointment.client_id.in_([100, 101, 102, 103]),
+                Appointment.company_id == company_id,
+            )
+            .group_by(Appointment.client_id)
+        ),
+    }
+
+
+def seq_scans(plan: dict) -> list[str]:
+    """Large tables read with a sequential scan anywhere in the plan."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in LARGE_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+async def explain_hot_queries(database_url: str) -> dict[str, dict]:
+    """Seed the scratch schema and return the plan of every hot query."""
+    engine = create_async_engine(database_url)
+    plans = {}
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            try:
+                # Only the scratch schema: with public on the path create_all would see
+                # the app's tables as existing and the seed would go into them
+                await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+                await conn.run_sync(Base.metadata.create_all)
+
+                schema = await conn.scalar(text(
+                    "SELECT relnamespace::regnamespace::text FROM pg_class "
+                    "WHERE oid = to_regclass('appointments')"
+                ))
+                if schema != SCHEMA:
+                    raise RuntimeError(f"appointments resolves to schema {schema!r}, not {SCHEMA}")
+
+                await conn.execute(text("SET session_replication_role = replica"))
+                await seed(conn, DOCTORS, DAYS)
+                await conn.execute(text("SET session_replication_role = DEFAULT"))
+
+                for name, query in hot_queries().items():
+                    sql = str(query.compile(
+                        dialect=postgresql.dialect(),
+                        compile_kwargs={"literal_binds": True},
+                    ))
+                    result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+                    plan = result.scalar()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    plans[name] = plan[0]["Plan"]
+            finally:
+                await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    finally:
+        await engine.dispose()
+    return plans
+
+
+@pytest.fixture(scope="module")
+def plans() -> dict[str, dict]:
+    return asyncio.run(explain_hot_queries(DATABASE_URL))
+
+
+@pytest.mark.parametrize("name", list(hot_queries()))
+def test_no_seq_scan_of_large_tables(plans, name):
+    scans = seq_scans(plans[name])
+    assert not scans, f"Seq Scan on {', '.join(scans)}:\n{json.dumps(plans[name], indent=2)}"
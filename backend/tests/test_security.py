@@ -0,0 +1,62 @@
+"""Password hashing off the event loop and rehashing on login."""
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import hash_password, verify_and_update_password
+
+PASSWORD = "correct horse battery staple"
+
+
+@pytest.fixture
+def fast_context(monkeypatch):
+    """bcrypt at the minimum cost, so the tests don't spend seconds hashing."""
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4)
+    monkeypatch.setattr(security, "pwd_context", context)
+    return context
+
+
+def bcrypt_hash(rounds: int) -> str:
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds).hash(PASSWORD)
+
+
+def test_context_uses_configured_cost():
+    assert security.pwd_context.hash(PASSWORD).startswith(f"$2b${settings.PASSWORD_BCRYPT_ROUNDS:02d}$")
+
+
+def test_current_hash_is_kept(fast_context):
+    valid, new_hash = asyncio.run(verify_and_update_password(PASSWORD, bcrypt_hash(4)))
+    assert valid
+    assert new_hash is None
+
+
+def test_hash_with_other_cost_is_replaced(fast_context):
+    valid, new_hash = asyncio.run(verify_and_update_password(PASSWORD, bcrypt_hash(5)))
+    assert valid
+    assert new_hash.startswith("$2b$04$")
+    assert fast_context.verify(PASSWORD, new_hash)
+
+
+def test_wrong_password_is_not_rehashed(fast_context):
+    valid, new_hash = asyncio.run(verify_and_update_password("wrong", bcrypt_hash(5)))
+    assert not valid
+    assert new_hash is None
+
+
+def test_hashing_runs_in_the_password_pool(fast_context, monkeypatch):
+    threads = []
+    original_hash = fast_context.hash
+
+    def recording_hash(secret):
+        threads.append(threading.current_thread().name)
+        return original_hash(secret)
+
+    monkeypatch.setattr(fast_context, "hash", recording_hash)
+    hashed = asyncio.run(hash_password(PASSWORD))
+
+    assert fast_context.verify(PASSWORD, hashed)
+    assert threads and threads[0].startswith("password-hash")
@@ -0,0 +1,144 @@
+"""Slot holds and their effect on availability."""
+import asyncio
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import Select
+
+import app.models  # noqa: F401 - configures the mappers of the related models
+from app.models.schedule import Schedule
+from app.models.slot_hold import SlotHold
+from app.services import slot_holds
+from app.services.availability import build_availability, compute_slots
+from app.services.slot_holds import client_holder, get_holds, hold_slot
+
+DAY = date(2026, 3, 2)  # Monday
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    """Postgres backend session whose SELECT returns the holds of other holders."""
+
+    def __init__(self, other_holds=()):
+        self.other_holds = list(other_holds)
+        self.added = []
+        self.committed = False
+        self.rolled_back = False
+
+    async def execute(self, statement, params=None):
+        if isinstance(statement, Select):
+            return FakeResult(self.other_holds)
+        return FakeResult([])
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.keys = []
+
+    def zrangebyscore(self, key, low, high):
+        self.keys.append(key)
+
+    async def execute(self):
+        return [self.redis.members.get(key, []) for key in self.keys]
+
+
+class FakeRedis:
+    """Day keys and their (unexpired) members."""
+
+    def __init__(self, members):
+        self.members = members
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(slot_holds, "get_redis", lambda: None)
+
+
+def hold(db, start, end, holder="client:1"):
+    return asyncio.run(hold_slot(db, 7, DAY, start, end, holder))
+
+
+def test_hold_is_placed_and_committed(no_redis):
+    db = FakeSession()
+    assert hold(db, time(10), time(11)) is not None
+    assert db.committed
+    [placed] = db.added
+    assert (placed.start_time, placed.end_time, placed.holder) == (time(10), time(11), "client:1")
+
+
+@pytest.mark.parametrize("other", [
+    (time(10, 30), time(11, 30)),
+    (time(9), time(12)),
+    (time(10), time(11)),
+])
+def test_overlapping_hold_is_rejected(no_redis, other):
+    db = FakeSession([other])
+    assert hold(db, time(10), time(11)) is None
+    assert db.rolled_back
+    assert db.added == []
+
+
+@pytest.mark.parametrize("other", [
+    (time(9), time(10)),
+    (time(11), time(12)),
+])
+def test_adjacent_hold_is_allowed(no_redis, other):
+    db = FakeSession([other])
+    assert hold(db, time(10), time(11)) is not None
+
+
+def test_holds_ending_at_midnight_overlap(no_redis):
+    db = FakeSession([(time(23), time(0))])
+    assert hold(db, time(23, 30), time(0)) is None
+
+
+def test_get_holds_reads_redis_members(monkeypatch):
+    redis = FakeRedis({
+        f"slot_holds:7:{DAY.isoformat()}": ["600:660:client:1", "1380:1440:client:2"],
+        f"slot_holds:7:{(DAY + timedelta(days=1)).isoformat()}": ["540:570:client:3"],
+    })
+    monkeypatch.setattr(slot_holds, "get_redis", lambda: redis)
+
+    holds = asyncio.run(get_holds(None, [7, 8], DAY, DAY + timedelta(days=1)))
+    assert holds[7] == [
+        (DAY, time(10), time(11)),
+        (DAY, time(23), time(0)),
+        (DAY + timedelta(days=1), time(9), time(9, 30)),
+    ]
+    assert holds[8] == []
+
+    holds = asyncio.run(get_holds(None, [7], DAY, DAY, exclude_holder="client:1"))
+    assert holds[7] == [(DAY, time(23), time(0))]
+
+
+def test_held_slot_is_busy_for_other_clients_only():
+    schedules = [Schedule(day_of_week=0, is_working_day=True, start_time=time(9), end_time=time(12))]
+    holds = [SlotHold(date=DAY, start_time=time(10), end_time=time(11), holder=client_holder(1))]
+
+    def slot_starts(exclude_holder):
+        visible = [(h.date, h.start_time, h.end_time) for h in holds if h.holder != exclude_holder]
+        availability = build_availability(schedules, [], [], visible)
+        return [start for _, start, _ in compute_slots(availability, 60, DAY, DAY)]
+
+    assert slot_starts(client_holder(2)) == [time(9), time(11)]
+    assert slot_starts(client_holder(1)) == [time(9), time(9, 30), time(10), time(10, 30), time(11)]
@@ -0,0 +1,98 @@
+"""Upload type sniffing, size cap and content-hash names."""
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.uploads import CHUNK_SIZE, MAX_FILE_SIZE, sniff_image_type, write_upload
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 100
+GIF = b"GIF89a" + b"\x00" * 100
+WEBP = b"RIFF\x24\x00\x00\x00WEBPVP8 " + b"\x00" * 100
+
+
+class FakeUploadFile:
+    """The part of UploadFile used by write_upload."""
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+        self.reads = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        return self._data.read(size)
+
+
+def upload(data: bytes, save_dir):
+    file = FakeUploadFile(data)
+    return asyncio.run(write_upload(file, save_dir)), file
+
+
+@pytest.mark.parametrize("data, expected", [
+    (PNG, ("image/png", ".png")),
+    (JPEG, ("image/jpeg", ".jpg")),
+    (GIF, ("image/gif", ".gif")),
+    (b"GIF87a" + b"\x00" * 10, ("image/gif", ".gif")),
+    (WEBP, ("image/webp", ".webp")),
+])
+def test_sniff_image_type(data, expected):
+    assert sniff_image_type(data[:16]) == expected
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"<svg xmlns='http://www.w3.org/2000/svg'/>",
+    b"%PDF-1.7\n",
+    b"RIFF\x24\x00\x00\x00WAVEfmt ",  # RIFF, but not WebP
+    b"XXXX\x24\x00\x00\x00WEBPVP8 ",  # WebP marker without RIFF
+])
+def test_sniff_rejects_other_files(data):
+    assert sniff_image_type(data[:16]) is None
+
+
+def test_write_upload_names_file_by_content(tmp_path):
+    (filename, size, mime_type), _ = upload(PNG, tmp_path)
+
+    assert filename == hashlib.sha256(PNG).hexdigest()[:32] + ".png"
+    assert (size, mime_type) == (len(PNG), "image/png")
+    assert (tmp_path / filename).read_bytes() == PNG
+
+
+def test_identical_uploads_are_stored_once(tmp_path):
+    (first, _, _), _ = upload(JPEG, tmp_path)
+    (second, _, _), _ = upload(JPEG, tmp_path)
+
+    assert first == second
+    assert [path.name for path in tmp_path.iterdir()] == [first]
+
+
+def test_write_upload_accepts_max_size(tmp_path):
+    data = PNG + b"\x00" * (MAX_FILE_SIZE - len(PNG))
+    (_, size, _), _ = upload(data, tmp_path)
+    assert size == MAX_FILE_SIZE
+
+
+def test_write_upload_rejects_too_large_file(tmp_path):
+    data = PNG + b"\x00" * (MAX_FILE_SIZE - len(PNG) + 1)
+    with pytest.raises(HTTPException) as exc_info:
+        upload(data, tmp_path)
+
+    assert exc_info.value.status_code == 400
+    assert "too large" in exc_info.value.detail
+    # The partial file is removed
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_write_upload_rejects_non_image_early(tmp_path):
+    file = FakeUploadFile(b"MZ" + b"\x00" * (4 * CHUNK_SIZE))
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(write_upload(file, tmp_path))
+
+    assert exc_info.value.status_code == 400
+    assert "not allowed" in exc_info.value.detail
+    # Rejected after the first chunk instead of reading the whole file
+    assert file.reads == 1
+    assert list(tmp_path.iterdir()) == []
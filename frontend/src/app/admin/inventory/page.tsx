@@ -499,7 +499,7 @@ export default function InventoryPage() {
                     <div className="aspect-[4/3] bg-muted flex items-center justify-center overflow-hidden">
                       {item.main_image_url ? (
                         <img
-                          src={getFileUrl(item.main_image_url)}
+                          src={getFileUrl(item.main_image_thumbnail_url || item.main_image_url)}
                           alt={item.name}
                           className="object-cover w-full h-full"
                         />
@@ -107,9 +107,10 @@ export default async function CompanyPage({ params }: Props) {
   }
 
   // If company has AI-generated landing, render it directly
-  if (company.landing_html) {
+  if (company.landing_digest) {
+    const landingHtml = await publicApi.getLandingHtml(company.id, company.landing_digest)
     return (
-      <div dangerouslySetInnerHTML={{ __html: company.landing_html }} />
+      <div dangerouslySetInnerHTML={{ __html: landingHtml }} />
     )
   }
 
@@ -183,7 +183,7 @@ export function ProtocolPhotoUpload({
               <div className="relative group aspect-square rounded-lg overflow-hidden border bg-muted">
                 {/* eslint-disable-next-line @next/next/no-img-element */}
                 <img
-                  src={getFileUrl(file.file_path)}
+                  src={getFileUrl(file.thumbnail_url)}
                   alt={file.original_filename}
                   className="w-full h-full object-cover"
                 />
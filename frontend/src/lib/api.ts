@@ -543,6 +543,7 @@ export interface ProtocolFile {
   filename: string
   original_filename: string
   file_path: string
+  thumbnail_url: string
   file_size: number
   mime_type: string
   show_in_portfolio: boolean
@@ -1433,6 +1434,7 @@ export interface InventoryItemListItem {
   total_stock: number
   is_low_stock: boolean
   main_image_url?: string
+  main_image_thumbnail_url?: string
   category_name?: string
   category_id?: number
   parent_id?: number
@@ -44,6 +44,7 @@ export interface PublicCompany {
   working_hours?: string
   social_links?: string
   landing_html?: string
+  landing_digest?: string
 }
 
 export interface PublicWebsiteSection {
@@ -106,4 +107,13 @@ export const publicApi = {
 
   getWebsiteSections: (companySlug: string) =>
     fetchApi<PublicWebsiteSection[]>(`/public/companies/${companySlug}/website-sections`),
+
+  // AI-generated landing as raw HTML (immutable URL, precompressed by the API)
+  getLandingHtml: async (companyId: number, digest: string) => {
+    const res = await fetch(`${API_URL}/public/landings/${companyId}/${digest}`)
+    if (!res.ok) {
+      throw new Error(`API Error: ${res.status}`)
+    }
+    return res.text()
+  },
 }